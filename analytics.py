@@ -0,0 +1,333 @@
+# analytics.py
+"""Admin analytics over REVIEW joined to the MOVIE dimension
+
+The review facts are read once into compact columnar arrays (movie position, rating,
+review month) and joined to MOVIE's release year, genre and director by movie position.
+One vectorized pass per slice of the facts (np.bincount over the keys) yields per-movie,
+per-rating-bucket and per-month totals; every report is then derived from those totals
+instead of running its own GROUP BY scan. NumPy releases the GIL inside these kernels, so
+the slices and then the independent reports run on a thread pool across cores.
+
+    python analytics.py --movies 100000 --users 1000000 --reviews 10000000
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# Months are counted from year 0 so the database does the date arithmetic
+REVIEW_FACTS_QUERY = """
+    SELECT MOVIE_ID, RATING, EXTRACT(YEAR FROM REVIEW_DATE) * 12 + EXTRACT(MONTH FROM REVIEW_DATE) - 1
+    FROM REVIEW
+"""
+MOVIE_DIMENSION_QUERY = "SELECT MOVIE_ID, TITLE, RELEASE_YEAR, GENRE_ID, DIRECTOR_ID FROM MOVIE"
+GENRE_NAMES_QUERY = "SELECT GENRE_ID, GENRE_NAME FROM GENRE"
+DIRECTOR_NAMES_QUERY = "SELECT DIRECTOR_ID, DIRECTOR_NAME FROM DIRECTOR"
+
+LOAD_ARRAYSIZE = 10000
+WORKERS = int(os.getenv("ANALYTICS_WORKERS", "0")) or os.cpu_count() or 1
+# Ratings are bucketed by half stars: 0.0-0.4, 0.5-0.9, ..., 4.5-4.9, 5.0
+RATING_BUCKETS = 11
+# Movies need this many ratings before their variance is listed
+MIN_VARIANCE_RATINGS = 5
+UNKNOWN = "(unknown)"
+# Month of a review with no REVIEW_DATE; such reviews are left out of the monthly totals
+NO_MONTH = -1
+
+
+def _lookup(ids, keys):
+    """Positions of keys in the sorted array ids, -1 where a key is missing"""
+    if not len(ids):
+        return np.full(len(keys), -1, dtype=np.int32)
+    positions = np.searchsorted(ids, keys).clip(0, len(ids) - 1)
+    return np.where(ids[positions] == keys, positions, -1).astype(np.int32)
+
+
+class ReviewFacts:
+    """REVIEW rows as columns, joined by movie position to the MOVIE dimension"""
+
+    def __init__(self):
+        self.movie_ids = np.empty(0, dtype=np.int64)
+        self.titles = []
+        self.release_year = np.empty(0, dtype=np.int32)
+        self.genre = np.empty(0, dtype=np.int32)       # position in genre_names, -1 if unknown
+        self.director = np.empty(0, dtype=np.int32)    # position in director_names, -1 if unknown
+        self.genre_names = []
+        self.director_names = []
+        self.movie = np.empty(0, dtype=np.int32)       # position in movie_ids
+        self.rating = np.empty(0, dtype=np.float32)    # NaN for reviews without a rating
+        self.month = np.empty(0, dtype=np.int32)       # months since year 0, NO_MONTH if undated
+        self.orphans = 0
+        self.undated = 0
+
+    # ---- LOADING ----
+    def load_dimensions(self, movies, genres, directors):
+        """movies: (movie_id, title, release_year, genre_id, director_id); genres/directors: (id, name)"""
+        movies = sorted(movies, key=lambda row: row[0])
+        genres, directors = sorted(genres), sorted(directors)
+        genre_ids = np.array([row[0] for row in genres], dtype=np.int64)
+        director_ids = np.array([row[0] for row in directors], dtype=np.int64)
+        self.genre_names = [name for _, name in genres]
+        self.director_names = [name for _, name in directors]
+        self.movie_ids = np.array([row[0] for row in movies], dtype=np.int64)
+        self.titles = [row[1] for row in movies]
+        columns = np.array([[-1 if value is None else value for value in row[2:5]] for row in movies],
+                           dtype=np.int64).reshape(-1, 3)
+        self.release_year = columns[:, 0].astype(np.int32)
+        self.genre = _lookup(genre_ids, columns[:, 1])
+        self.director = _lookup(director_ids, columns[:, 2])
+
+    def load_reviews(self, batches):
+        """Read (movie_id, rating, month) batches; reviews of movies missing from MOVIE are skipped"""
+        movies, ratings, months = [], [], []
+        self.orphans = self.undated = 0
+        for batch in batches:
+            # None becomes NaN, so unrated reviews still count towards volume
+            data = np.asarray(batch, dtype=np.float64).reshape(-1, 3)
+            positions = _lookup(self.movie_ids, data[:, 0].astype(np.int64))
+            known = positions >= 0
+            self.orphans += len(known) - int(known.sum())
+            movies.append(positions[known])
+            ratings.append(data[known, 1].astype(np.float32))
+            # A NULL date is NaN here, which astype() would turn into INT_MIN
+            month = data[known, 2]
+            undated = np.isnan(month)
+            self.undated += int(undated.sum())
+            months.append(np.where(undated, NO_MONTH, month).astype(np.int32))
+        if movies:
+            self.movie, self.rating, self.month = np.concatenate(movies), np.concatenate(ratings), np.concatenate(months)
+        return len(self.movie)
+
+    def __len__(self):
+        return len(self.movie)
+
+    # ---- TOTALS ----
+    def scan(self, start, stop, first_month, months):
+        """Sums over fact rows start:stop, keyed by movie, rating bucket and month"""
+        movie, rating = self.movie[start:stop], self.rating[start:stop]
+        month = self.month[start:stop]
+        rated = ~np.isnan(rating)
+        dated = month != NO_MONTH
+        rated_movie = movie[rated]
+        month, rated_month = month[dated] - first_month, month[rated & dated] - first_month
+        value = rating[rated].astype(np.float64)
+        count = len(self.movie_ids)
+        buckets = np.minimum(np.floor(value * 2), RATING_BUCKETS - 1).astype(np.intp)
+        return {
+            "reviews": np.bincount(movie, minlength=count),
+            "rated": np.bincount(rated_movie, minlength=count),
+            "sum": np.bincount(rated_movie, weights=value, minlength=count),
+            "sumsq": np.bincount(rated_movie, weights=value * value, minlength=count),
+            "buckets": np.bincount(buckets, minlength=RATING_BUCKETS),
+            "month_reviews": np.bincount(month, minlength=months),
+            "month_rated": np.bincount(rated_month, minlength=months),
+            "month_sum": np.bincount(rated_month, weights=rating[rated & dated].astype(np.float64), minlength=months),
+        }
+
+    def totals(self, pool=None, workers=WORKERS):
+        """scan() over the whole table, one slice per worker, with the partial sums added up"""
+        dated = self.month[self.month != NO_MONTH]
+        first_month = int(dated.min()) if len(dated) else 0
+        months = int(dated.max()) - first_month + 1 if len(dated) else 0
+        edges = np.linspace(0, len(self), workers + 1).astype(int)
+        slices = list(zip(edges[:-1], edges[1:]))
+        if pool is None or workers == 1:
+            parts = [self.scan(start, stop, first_month, months) for start, stop in slices]
+        else:
+            parts = list(pool.map(lambda edge: self.scan(edge[0], edge[1], first_month, months), slices))
+        totals = {key: sum(part[key] for part in parts) for key in parts[0]}
+        totals["first_month"] = first_month
+        return totals
+
+
+def _stats(rated, sums, sumsq):
+    """(average, std dev) from rating counts, sums and sums of squares; NaN where nothing is rated"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sums / rated
+        variance = np.maximum(sumsq / rated - mean * mean, 0)
+    return mean, np.sqrt(variance)
+
+
+def _rounded(values, digits=3):
+    """Rounded floats as a list, with None where the value is NaN"""
+    rounded = np.round(values, digits).astype(object)
+    rounded[np.isnan(values)] = None
+    return rounded.tolist()
+
+
+# ---- REPORTS ----
+def rating_distribution(facts, totals):
+    buckets = totals["buckets"]
+    share = buckets / max(1, buckets.sum()) * 100
+    labels = [f"{i / 2:.1f}-{i / 2 + 0.4:.1f}" for i in range(RATING_BUCKETS - 1)] + [f"{(RATING_BUCKETS - 1) / 2:.1f}"]
+    return list(zip(labels, buckets.tolist(), np.round(share, 2).tolist()))
+
+
+def _by_dimension(keys, names, totals):
+    """Movies, reviews, average and std dev per dimension position (-1 grouped as UNKNOWN)"""
+    slot = np.where(keys >= 0, keys, len(names))
+    size = len(names) + 1
+    movies = np.bincount(slot, minlength=size)
+    sums = {key: np.bincount(slot, weights=totals[key], minlength=size) for key in ("reviews", "rated", "sum", "sumsq")}
+    mean, std = _stats(sums["rated"], sums["sum"], sums["sumsq"])
+    labels = list(names) + [UNKNOWN]
+    order = np.argsort(-sums["reviews"], kind="stable")
+    order = order[sums["reviews"][order] > 0]
+    return [(labels[i], movie_count, int(review_count), average, deviation) for i, movie_count, review_count, average, deviation
+            in zip(order.tolist(), movies[order].tolist(), sums["reviews"][order].tolist(),
+                   _rounded(mean[order]), _rounded(std[order]))]
+
+
+def genre_averages(facts, totals):
+    return _by_dimension(facts.genre, facts.genre_names, totals)
+
+
+def director_averages(facts, totals):
+    return _by_dimension(facts.director, facts.director_names, totals)
+
+
+def release_year_averages(facts, totals):
+    years = facts.release_year
+    known = years >= 0
+    first = int(years[known].min()) if known.any() else 0
+    rows = _by_dimension(np.where(known, years - first, -1), [str(year) for year in range(first, int(years.max()) + 1)]
+                         if known.any() else [], totals)
+    return sorted(rows, key=lambda row: row[0])
+
+
+def review_volume(facts, totals):
+    reviews, rated = totals["month_reviews"], totals["month_rated"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = totals["month_sum"] / rated
+    first = totals["first_month"]
+    labels = [f"{month // 12}-{month % 12 + 1:02d}" for month in range(first, first + len(reviews))]
+    return list(zip(labels, reviews.tolist(), rated.tolist(), _rounded(mean)))
+
+
+def rating_variance(facts, totals):
+    mean, std = _stats(totals["rated"], totals["sum"], totals["sumsq"])
+    listed = np.nonzero(totals["rated"] >= MIN_VARIANCE_RATINGS)[0]
+    listed = listed[np.argsort(-std[listed], kind="stable")]
+    return [(movie_id, facts.titles[i], count, average, deviation) for i, movie_id, count, average, deviation
+            in zip(listed.tolist(), facts.movie_ids[listed].tolist(), totals["rated"][listed].tolist(),
+                   _rounded(mean[listed]), _rounded(std[listed]))]
+
+
+# (name, headers, function(facts, totals) -> rows)
+REPORTS = [
+    ("Rating Distribution", ["Rating", "Ratings", "Share %"], rating_distribution),
+    ("By Genre", ["Genre", "Movies", "Reviews", "Average", "Std Dev"], genre_averages),
+    ("By Director", ["Director", "Movies", "Reviews", "Average", "Std Dev"], director_averages),
+    ("By Release Year", ["Release Year", "Movies", "Reviews", "Average", "Std Dev"], release_year_averages),
+    ("Review Volume", ["Month", "Reviews", "Rated", "Average"], review_volume),
+    ("Rating Variance", ["Movie ID", "Title", "Ratings", "Average", "Std Dev"], rating_variance),
+]
+
+
+def run_reports(facts, workers=WORKERS):
+    """({report name: rows}, {phase or report name: ms}) for every report in REPORTS"""
+    timings = {}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        totals = facts.totals(pool, workers)
+        timings["scan"] = (time.perf_counter() - started) * 1000
+
+        def timed(report):
+            report_started = time.perf_counter()
+            rows = report(facts, totals)
+            return rows, (time.perf_counter() - report_started) * 1000
+
+        futures = {name: pool.submit(timed, report) for name, _, report in REPORTS}
+        results = {}
+        for name, future in futures.items():
+            results[name], timings[name] = future.result()
+    timings["total"] = (time.perf_counter() - started) * 1000
+    return results, timings
+
+
+# ---- SHARED FACTS ----
+_facts = None
+_facts_lock = threading.Lock()
+
+
+def load_facts():
+    """ReviewFacts read from the database: dimensions from the catalog snapshot, reviews streamed"""
+    from db import stream_cursor
+    from catalog_snapshot import fetch_catalog
+    dimensions = []
+    for query in (MOVIE_DIMENSION_QUERY, GENRE_NAMES_QUERY, DIRECTOR_NAMES_QUERY):
+        rows = fetch_catalog(query)
+        if isinstance(rows, str):
+            raise RuntimeError(rows)
+        dimensions.append(rows)
+    facts = ReviewFacts()
+    facts.load_dimensions(*dimensions)
+    facts.load_reviews(stream_cursor(REVIEW_FACTS_QUERY, arraysize=LOAD_ARRAYSIZE, batches=True))
+    return facts
+
+
+def analytics_reports(refresh=False, workers=WORKERS):
+    """([(name, headers, rows)], timings, review count, load seconds) over the shared facts
+
+    The facts are read on first use and again when refresh is set.
+    """
+    global _facts
+    load_seconds = 0.0
+    with _facts_lock:
+        if _facts is None or refresh:
+            started = time.perf_counter()
+            _facts = load_facts()
+            load_seconds = time.perf_counter() - started
+            undated = f" ({_facts.undated} without a review date)" if _facts.undated else ""
+            print(f"📊 Analytics loaded {len(_facts)} reviews in {load_seconds:.1f}s{undated}")
+        facts = _facts
+    results, timings = run_reports(facts, workers)
+    reports = [(name, headers, results[name]) for name, headers, _ in REPORTS]
+    return reports, timings, len(facts), load_seconds
+
+
+def main(argv=None):
+    from datagen import Dataset
+    parser = argparse.ArgumentParser(description="Time the analytics reports over generated reviews")
+    parser.add_argument("--movies", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--reviews", type=int, default=10000000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args(argv)
+
+    dataset = Dataset(args.movies, args.users, args.reviews, args.seed)
+    started = time.perf_counter()
+    facts = ReviewFacts()
+    facts.load_dimensions(
+        [(movie_id, title, year, genre_id, director_id)
+         for movie_id, title, year, _, director_id, genre_id, _ in dataset.rows("MOVIE")],
+        dataset.rows("GENRE"), [row[:2] for row in dataset.rows("DIRECTOR")]
+    )
+
+    def batches():
+        batch = []
+        for _, _, rating, reviewed, _, movie_id in dataset.rows("REVIEW"):
+            batch.append((movie_id, rating, reviewed.year * 12 + reviewed.month - 1))
+            if len(batch) == LOAD_ARRAYSIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    count = facts.load_reviews(batches())
+    print(f"📥 Loaded {count} reviews into {sum(a.nbytes for a in (facts.movie, facts.rating, facts.month)) / 2**20:.0f} MB "
+          f"of columns in {time.perf_counter() - started:.1f}s (generation included)")
+    for workers in sorted({1, args.workers}):
+        results, timings = run_reports(facts, workers)
+        print(f"\n🧮 {workers} worker(s): scan {timings['scan']:.0f} ms, total {timings['total']:.0f} ms")
+        for name, _, _ in REPORTS:
+            print(f"  {name:<20}{len(results[name]):>8} rows {timings[name]:>8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
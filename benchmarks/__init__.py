@@ -0,0 +1 @@
+# Benchmarks; run each one as a module from the repository root, e.g. python -m benchmarks.bench_review_upsert
\ No newline at end of file
@@ -0,0 +1,422 @@
+# bench_panels.py
+"""Time every panel load and review write path against the SQLite stand-in database
+
+Runs the same SQL and db helpers the GUI panels and search_movies use, headless, at a
+chosen scale of movies/users/reviews, and reports wall time, rows/sec, peak RSS and
+allocations per case. Results are saved as JSON under benchmarks/results/ (git-ignored;
+--out picks another directory); pass an earlier file to --compare to see regressions
+between versions, e.g.
+
+    python -m benchmarks.bench_panels --scale medium --label before
+    python -m benchmarks.bench_panels --scale medium --compare benchmarks/results/before.json
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import statistics
+import subprocess
+import tracemalloc
+from contextlib import closing
+import db
+from benchmarks import standin_db
+from catalog_snapshot import CatalogSnapshot, fetch_catalog, search_catalog
+from movie_search import TrigramIndex, search_page
+from panel_queries import (
+    LOGIN_QUERY, MY_REVIEWS_QUERY, ALL_MOVIES_QUERY, TOP_MOVIES_QUERY,
+    ADMIN_USERS_QUERY, ADMIN_MOVIES_QUERY, ADMIN_REVIEWS_QUERY, MOVIE_RATINGS_QUERY
+)
+
+SCALES = {
+    "small": (1000, 500, 20000),
+    "medium": (10000, 5000, 500000),
+    "large": (50000, 50000, 5000000),
+}
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+# Same page size as KeysetTableModel
+PAGE_SIZE = 200
+# Median wall-time growth above which --compare reports a regression
+DEFAULT_THRESHOLD = 0.10
+
+
+def remove_database(path):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def rows_of(result):
+    # fetch_cursor reports failures as a string
+    if isinstance(result, str):
+        raise RuntimeError(result)
+    return result
+
+
+def keyset_pages(query, params=None, max_pages=None):
+    """Page through a keyset query the way KeysetTableModel does; returns the row count"""
+    total, last_key, pages = 0, 0, 0
+    while max_pages is None or pages < max_pages:
+        rows = rows_of(db.fetch_cursor(query, dict(params or {}, last_key=last_key, page_size=PAGE_SIZE)))
+        total += len(rows)
+        pages += 1
+        if len(rows) < PAGE_SIZE:
+            break
+        last_key = rows[-1][0]
+    return total
+
+
+class Context:
+    """State shared by the cases of one run"""
+    def __init__(self, args):
+        self.args = args
+        self.index = None
+        self.written = []
+        self.snapshot = CatalogSnapshot(args.catalog)
+        busiest = rows_of(db.fetch_cursor(
+            "SELECT USER_ID FROM REVIEW GROUP BY USER_ID ORDER BY COUNT(*) DESC FETCH FIRST 1 ROWS ONLY"
+        ))
+        self.busiest_user = busiest[0][0] if busiest else 1
+
+
+# ---- CASES ----
+# Each case returns the number of rows it read or wrote
+
+def case_login(ctx):
+    # Uncached, as authenticate() reads credentials; the PBKDF2 verify is a fixed CPU cost
+    # set by PASSWORD_HASH_ITERATIONS and is left out so the case tracks the database probe
+    for user_id in range(1, ctx.args.writes + 1):
+        rows_of(db.fetch_cursor(LOGIN_QUERY, [user_id]))
+    return ctx.args.writes
+
+
+def case_load_reviews(ctx):
+    return keyset_pages(MY_REVIEWS_QUERY, {"id": ctx.busiest_user})
+
+
+def case_load_all_movies(ctx):
+    return len(rows_of(db.fetch_cursor(ALL_MOVIES_QUERY, cache=True)))
+
+
+def case_load_top_movies(ctx):
+    return len(rows_of(db.fetch_cursor(TOP_MOVIES_QUERY, cache=True)))
+
+
+def case_admin_users(ctx):
+    return sum(len(batch) for batch in db.stream_cursor(ADMIN_USERS_QUERY, batches=True))
+
+
+def case_admin_movies(ctx):
+    return len(rows_of(db.fetch_cursor(ADMIN_MOVIES_QUERY, cache=True)))
+
+
+def case_admin_reviews(ctx):
+    return keyset_pages(ADMIN_REVIEWS_QUERY, max_pages=ctx.args.max_pages)
+
+
+def case_admin_ratings(ctx):
+    return len(rows_of(db.fetch_cursor(MOVIE_RATINGS_QUERY, cache=True)))
+
+
+def search(ctx, index):
+    conn = db.acquire_connection()
+    try:
+        total = 0
+        for term in ("1", "42", "title 7"):
+            after = None
+            for _ in range(ctx.args.max_pages):
+                rows, after = search_page(conn, {"title": term}, after, index=index)
+                total += len(rows)
+                if after is None:
+                    break
+        return total
+    finally:
+        db.release_connection(conn)
+
+
+def case_search_like(ctx):
+    return search(ctx, None)
+
+
+def case_search_index_build(ctx):
+    conn = db.acquire_connection()
+    try:
+        ctx.index = TrigramIndex.from_cursor(conn.cursor())
+    finally:
+        db.release_connection(conn)
+    return len(ctx.index.docs)
+
+
+def case_search_indexed(ctx):
+    return search(ctx, ctx.index)
+
+
+def sync_snapshot(ctx):
+    conn = db.acquire_connection()
+    try:
+        return ctx.snapshot.sync(conn)["changed"]
+    finally:
+        db.release_connection(conn)
+
+
+def case_catalog_cold_sync(ctx):
+    # First start on a machine without a snapshot file: every catalog row is copied
+    remove_database(ctx.snapshot.path)
+    ctx.snapshot = CatalogSnapshot(ctx.snapshot.path)
+    return sync_snapshot(ctx)
+
+
+def case_catalog_warm_sync(ctx):
+    # Later starts: only rows above the high-water mark (less the overlap) are re-read
+    return sync_snapshot(ctx)
+
+
+def case_load_all_movies_local(ctx):
+    return len(rows_of(fetch_catalog(ALL_MOVIES_QUERY, snapshot=ctx.snapshot)))
+
+
+def case_admin_movies_local(ctx):
+    return len(rows_of(fetch_catalog(ADMIN_MOVIES_QUERY, snapshot=ctx.snapshot)))
+
+
+def case_search_as_you_type_local(ctx):
+    # One query per keystroke of each term, as the All Movies search box issues them
+    total = 0
+    for term in ("title 42", "drama", "smith"):
+        for end in range(1, len(term) + 1):
+            total += len(rows_of(search_catalog(term[:end], max_rows=500, snapshot=ctx.snapshot)))
+    return total
+
+
+def case_search_index_local(ctx):
+    with closing(ctx.snapshot.connect()) as local:
+        return len(TrigramIndex.from_cursor(local.cursor()).docs)
+
+
+def case_add_review(ctx):
+    start = rows_of(db.fetch_cursor("SELECT COALESCE(MAX(REVIEW_ID), 0) FROM REVIEW"))[0][0]
+    for i in range(ctx.args.writes):
+        ok, msg = db.call_procedure("ADD_REVIEW", [i % ctx.args.users + 1, i % ctx.args.movies + 1, 3.5, "bench"])
+        if not ok:
+            raise RuntimeError(msg)
+    ctx.written = [row[0] for row in rows_of(db.fetch_cursor(
+        "SELECT REVIEW_ID FROM REVIEW WHERE REVIEW_ID > :1 ORDER BY REVIEW_ID", [start]
+    ))]
+    return ctx.args.writes
+
+
+def case_edit_review(ctx):
+    for i in range(ctx.args.writes):
+        ok, msg = db.call_procedure("EDIT_REVIEW", [i % ctx.args.users + 1, i % ctx.args.movies + 1, 4.0, "edited"])
+        if not ok:
+            raise RuntimeError(msg)
+    return ctx.args.writes
+
+
+def case_bulk_delete_reviews(ctx):
+    result = db.call_procedure_many("DELETE_REVIEW", [[review_id] for review_id in ctx.written])
+    ctx.written = []
+    return result.succeeded
+
+
+# Run in this order every repeat: search_indexed needs the index, the *_local cases read the
+# snapshot catalog_cold_sync builds, and the write cases add, edit and then remove the same
+# reviews so every repeat starts from the same data
+CASES = [
+    ("login", case_login),
+    ("load_reviews", case_load_reviews),
+    ("load_all_movies", case_load_all_movies),
+    ("load_top_movies", case_load_top_movies),
+    ("admin_users", case_admin_users),
+    ("admin_movies", case_admin_movies),
+    ("admin_reviews", case_admin_reviews),
+    ("admin_ratings", case_admin_ratings),
+    ("search_like", case_search_like),
+    ("search_index_build", case_search_index_build),
+    ("search_indexed", case_search_indexed),
+    ("catalog_cold_sync", case_catalog_cold_sync),
+    ("catalog_warm_sync", case_catalog_warm_sync),
+    ("load_all_movies_local", case_load_all_movies_local),
+    ("admin_movies_local", case_admin_movies_local),
+    ("search_as_you_type_local", case_search_as_you_type_local),
+    ("search_index_local", case_search_index_local),
+    ("add_review", case_add_review),
+    ("edit_review", case_edit_review),
+    ("bulk_delete_reviews", case_bulk_delete_reviews),
+]
+
+
+def peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_case(func, ctx):
+    # Cached reads are measured cold; a warm cache would only time a dict lookup
+    db.query_cache.invalidate()
+    started = time.perf_counter()
+    rows = func(ctx)
+    return time.perf_counter() - started, rows
+
+
+def measure_allocations(func, ctx):
+    """Run once under tracemalloc: peak traced bytes and blocks still held when the case returns"""
+    db.query_cache.invalidate()
+    tracemalloc.start()
+    try:
+        func(ctx)
+        _, peak = tracemalloc.get_traced_memory()
+        blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    finally:
+        tracemalloc.stop()
+    return peak, blocks
+
+
+def run(args):
+    cases = [(name, func) for name, func in CASES if not args.cases or name in args.cases]
+    ctx = Context(args)
+    timings = {name: [] for name, _ in cases}
+    rows = {}
+    rss = {name: (0, 0) for name, _ in cases}
+    for repeat in range(args.repeat):
+        for name, func in cases:
+            before = peak_rss_kb()
+            elapsed, rows[name] = run_case(func, ctx)
+            timings[name].append(elapsed)
+            rss[name] = (peak_rss_kb(), max(rss[name][1], peak_rss_kb() - before))
+        print(f"repeat {repeat + 1}/{args.repeat} done", file=sys.stderr)
+
+    allocations = {}
+    if not args.no_alloc:
+        for name, func in cases:
+            allocations[name] = measure_allocations(func, ctx)
+
+    results = {}
+    for name, _ in cases:
+        median = statistics.median(timings[name])
+        peak_alloc, blocks = allocations.get(name, (None, None))
+        results[name] = {
+            "rows": rows[name],
+            "median_s": round(median, 6),
+            "best_s": round(min(timings[name]), 6),
+            "rows_per_s": round(rows[name] / median, 1) if median else None,
+            "peak_rss_kb": rss[name][0],
+            "rss_growth_kb": rss[name][1],
+            "alloc_peak_kb": round(peak_alloc / 1024, 1) if peak_alloc is not None else None,
+            "alloc_blocks": blocks,
+        }
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    print(f"{'case':<22}{'rows':>10}{'median ms':>12}{'best ms':>10}{'rows/s':>12}"
+          f"{'peak RSS MB':>13}{'alloc KB':>11}{'blocks':>10}")
+    for name, r in results.items():
+        alloc = f"{r['alloc_peak_kb']:.0f}" if r["alloc_peak_kb"] is not None else "-"
+        blocks = r["alloc_blocks"] if r["alloc_blocks"] is not None else "-"
+        print(f"{name:<22}{r['rows']:>10}{r['median_s'] * 1000:>12.2f}{r['best_s'] * 1000:>10.2f}"
+              f"{r['rows_per_s'] or 0:>12,.0f}{r['peak_rss_kb'] / 1024:>13.1f}{alloc:>11}{blocks:>10}")
+
+
+def compare(results, baseline_path, threshold):
+    """Print median time changes against a saved run; returns the names that regressed"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline["scale"] != results["scale"]:
+        print(f"⚠️ Baseline scale {baseline['scale']} differs from {results['scale']}")
+    regressed = []
+    print(f"\nAgainst {baseline_path} ({baseline.get('revision') or 'unknown revision'}):")
+    for name, r in results["cases"].items():
+        old = baseline["cases"].get(name)
+        if old is None or not old["median_s"]:
+            print(f"  {name:<22} new")
+            continue
+        change = r["median_s"] / old["median_s"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressed.append(name)
+        print(f"  {name:<22}{old['median_s'] * 1000:>10.2f} -> {r['median_s'] * 1000:>10.2f} ms  {change:+7.1%}{flag}")
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark panel loads and review writes on a local stand-in database")
+    parser.add_argument("--scale", choices=SCALES, default="small", help="preset movies/users/reviews counts")
+    parser.add_argument("--movies", type=int, help="override the preset movie count")
+    parser.add_argument("--users", type=int, help="override the preset user count")
+    parser.add_argument("--reviews", type=int, help="override the preset review count")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--writes", type=int, default=200, help="logins and review writes per repeat")
+    parser.add_argument("--max-pages", type=int, default=50, help="page limit for admin reviews and search")
+    parser.add_argument("--cases", nargs="*", help="only run these cases")
+    parser.add_argument("--no-alloc", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--instrument", action="store_true", help="also save per-statement query_stats")
+    parser.add_argument("--db", help="stand-in database file to create (default: a temp file, removed afterwards)")
+    parser.add_argument("--label", help="results file name (default: revision and time)")
+    parser.add_argument("--out", default=RESULTS_DIR, help="directory for the results file (default: benchmarks/results)")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="regression threshold, e.g. 0.1")
+    args = parser.parse_args(argv)
+
+    preset = SCALES[args.scale]
+    args.movies = args.movies or preset[0]
+    args.users = args.users or preset[1]
+    args.reviews = args.reviews or preset[2]
+
+    path = standin_db.create_database(args.db)
+    args.catalog = path + ".catalog"
+    try:
+        started = time.perf_counter()
+        standin_db.populate(path, args.movies, args.users, args.reviews, args.seed)
+        print(f"Populated {args.movies} movies, {args.users} users, {args.reviews} reviews "
+              f"in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        db.create_pool(driver=standin_db)
+        db.query_stats.enabled = args.instrument
+        cases = run(args)
+    finally:
+        db.close_pool()
+        if not args.db:
+            remove_database(path)
+        remove_database(args.catalog)
+
+    revision = git_revision()
+    results = {
+        "label": args.label,
+        "revision": revision,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": {"movies": args.movies, "users": args.users, "reviews": args.reviews, "seed": args.seed},
+        "repeat": args.repeat,
+        "cases": cases,
+    }
+    if args.instrument:
+        results["query_stats"] = db.query_stats.snapshot()
+    print_results(cases)
+
+    os.makedirs(args.out, exist_ok=True)
+    label = args.label or f"{revision or 'run'}-{time.strftime('%Y%m%d-%H%M%S')}"
+    out = os.path.join(args.out, f"{label}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved {out}")
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+# bench_review_upsert.py
+"""Compare the old SELECT + next_seq + INSERT/UPDATE review path with the single MERGE upsert
+
+Writes reviews for two scratch users over a range of movie ids, then deletes them.
+Round trips come from V$MYSTAT when the schema can read it; otherwise only timings are shown.
+"""
+import time
+import argparse
+from datetime import datetime
+from movies_app import get_connection, upsert_review
+
+ROUND_TRIPS_QUERY = """
+    SELECT m.value FROM v$mystat m JOIN v$statname n ON m.statistic# = n.statistic#
+    WHERE n.name = 'SQL*Net roundtrips to/from client'
+"""
+
+
+def round_trips(conn):
+    try:
+        cur = conn.cursor()
+        cur.execute(ROUND_TRIPS_QUERY)
+        return cur.fetchone()[0]
+    except Exception:
+        return None
+
+
+def legacy_upsert(user_id, movie_id, rating, text, now):
+    """The pre-MERGE path: look up, take NEXTVAL on a second connection, then write"""
+    connects, trips = 1, 0
+    with get_connection() as conn:
+        start = round_trips(conn)
+        cur = conn.cursor()
+        cur.execute("SELECT review_id FROM review WHERE user_id=:1 AND movie_id=:2", (user_id, movie_id))
+        r = cur.fetchone()
+        if r:
+            cur.execute("UPDATE review SET rating=:1, review_text=:2, review_date=:3 WHERE review_id=:4",
+                        (rating, text, now, r[0]))
+        else:
+            with get_connection() as seq_conn:
+                connects += 1
+                seq_start = round_trips(seq_conn)
+                seq_cur = seq_conn.cursor()
+                seq_cur.execute("SELECT review_seq.NEXTVAL FROM dual")
+                rid = seq_cur.fetchone()[0]
+                if seq_start is not None:
+                    trips += round_trips(seq_conn) - seq_start - 1
+            cur.execute("""
+                INSERT INTO review (review_text, rating, review_id, user_id, movie_id, review_date)
+                VALUES (:1, :2, :3, :4, :5, :6)
+            """, (text, rating, rid, user_id, movie_id, now))
+        conn.commit()
+        if start is not None:
+            trips += round_trips(conn) - start - 1
+    return connects, trips if start is not None else None
+
+
+def merge_upsert(user_id, movie_id, rating, text, now):
+    with get_connection() as conn:
+        start = round_trips(conn)
+        upsert_review(conn, user_id, movie_id, rating, text, now)
+        trips = round_trips(conn) - start - 1 if start is not None else None
+    return 1, trips
+
+
+def run(label, func, user_id, movie_ids, rating):
+    connects = trips = 0
+    trips_known = True
+    started = time.perf_counter()
+    for movie_id in movie_ids:
+        c, t = func(user_id, movie_id, rating, "benchmark review", datetime.now())
+        connects += c
+        if t is None:
+            trips_known = False
+        else:
+            trips += t
+    elapsed = time.perf_counter() - started
+    per_call = elapsed * 1000 / len(movie_ids)
+    trips_str = f"{trips / len(movie_ids):.1f} round trips/review" if trips_known else "round trips n/a"
+    print(f"{label:<22} {per_call:8.2f} ms/review  {connects / len(movie_ids):.1f} connects/review  {trips_str}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--legacy-user", type=int, required=True, help="scratch user id for the old path")
+    parser.add_argument("--merge-user", type=int, required=True, help="scratch user id for the MERGE path")
+    parser.add_argument("--movies", type=int, default=50, help="number of movie ids (1..N) to review")
+    args = parser.parse_args()
+    movie_ids = range(1, args.movies + 1)
+
+    run("legacy insert", legacy_upsert, args.legacy_user, movie_ids, 4.0)
+    run("merge insert", merge_upsert, args.merge_user, movie_ids, 4.0)
+    run("legacy update", legacy_upsert, args.legacy_user, movie_ids, 3.0)
+    run("merge update", merge_upsert, args.merge_user, movie_ids, 3.0)
+
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM review WHERE user_id IN (:1, :2) AND movie_id <= :3",
+                    (args.legacy_user, args.merge_user, args.movies))
+        conn.commit()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
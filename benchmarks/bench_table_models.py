@@ -0,0 +1,126 @@
+# bench_table_models.py
+"""Compare filling a table with QTableWidgetItems against ColumnarTableModel
+
+Loads the same generated MOVIE rows both ways and reports the time to fill the table,
+to paint it for the first time and to scroll through it, plus resident memory growth.
+Each approach runs in its own process so their memory does not overlap. Needs a Qt
+platform plugin; on a headless machine run with QT_QPA_PLATFORM=offscreen, e.g.
+
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_table_models --rows 100000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+from PyQt5.QtWidgets import QApplication, QTableWidget, QTableWidgetItem, QTableView
+from datagen import Dataset, COLUMNS
+from table_models import ColumnarTableModel
+
+APPROACHES = ("widget", "model")
+# Pages scrolled through after the first paint
+SCROLL_PAGES = 50
+
+
+def current_rss_kb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        # No /proc (macOS): fall back to the peak, which only ever grows
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def populate_widget(table, rows):
+    """How movies_app_final.populate_table filled a QTableWidget before ColumnarTableModel"""
+    table.setRowCount(len(rows))
+    for r_idx, row in enumerate(rows):
+        for c_idx, val in enumerate(row):
+            table.setItem(r_idx, c_idx, QTableWidgetItem(str(val)))
+
+
+def make_view(approach, headers):
+    if approach == "widget":
+        table = QTableWidget()
+        table.setColumnCount(len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        return table, lambda rows: populate_widget(table, rows)
+    table = QTableView()
+    model = ColumnarTableModel(headers, parent=table)
+    table.setModel(model)
+    return table, model.set_rows
+
+
+def measure(approach, count, seed):
+    """Time and memory for one approach in this process"""
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    headers = list(COLUMNS["MOVIE"])
+    rows = list(Dataset(count, 1, 0, seed).rows("MOVIE"))
+    table, fill = make_view(approach, headers)
+    table.resize(1000, 700)
+    table.show()
+    app.processEvents()
+    rss_before = current_rss_kb()
+
+    started = time.perf_counter()
+    fill(rows)
+    filled = time.perf_counter()
+    table.viewport().repaint()
+    app.processEvents()
+    painted = time.perf_counter()
+
+    scrollbar = table.verticalScrollBar()
+    scroll_started = time.perf_counter()
+    for page in range(1, SCROLL_PAGES + 1):
+        scrollbar.setValue(scrollbar.maximum() * page // SCROLL_PAGES)
+        table.viewport().repaint()
+    app.processEvents()
+    scrolled = time.perf_counter()
+
+    return {
+        "approach": approach,
+        "rows": count,
+        "fill_ms": round((filled - started) * 1000, 1),
+        "first_paint_ms": round((painted - started) * 1000, 1),
+        "scroll_ms": round((scrolled - scroll_started) * 1000, 1),
+        "rss_growth_kb": current_rss_kb() - rss_before,
+    }
+
+
+def run_isolated(approach, args):
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_table_models", "--approach", approach,
+         "--rows", str(args.rows), "--seed", str(args.seed)],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark QTableWidget items against ColumnarTableModel")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--approach", choices=APPROACHES, help="run one approach here and print JSON")
+    args = parser.parse_args(argv)
+
+    if args.approach:
+        print(json.dumps(measure(args.approach, args.rows, args.seed)))
+        return 0
+
+    results = [run_isolated(approach, args) for approach in APPROACHES]
+    print(f"{'approach':<10}{'rows':>10}{'fill ms':>12}{'first paint ms':>16}{'scroll ms':>12}{'RSS growth MB':>15}")
+    for r in results:
+        print(f"{r['approach']:<10}{r['rows']:>10}{r['fill_ms']:>12.1f}{r['first_paint_ms']:>16.1f}"
+              f"{r['scroll_ms']:>12.1f}{r['rss_growth_kb'] / 1024:>15.1f}")
+    widget, model = results
+    if model["first_paint_ms"]:
+        print(f"\nColumnarTableModel: {widget['first_paint_ms'] / model['first_paint_ms']:.0f}x faster to first paint, "
+              f"{(widget['rss_growth_kb'] - model['rss_growth_kb']) / 1024:.0f} MB less memory")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
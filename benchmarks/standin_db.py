@@ -0,0 +1,376 @@
+# standin_db.py
+"""SQLite-backed stand-in for the parts of python-oracledb the app uses
+
+Pass the module to db.create_pool(driver=standin_db) to run panel queries and stored
+procedure calls headless. Oracle-only syntax used by the app (FETCH FIRST, TABLE() over
+a bound collection, PL/SQL call blocks) is rewritten for SQLite; the stored procedures
+and the MOVIE_RATING_STATS and catalog change-tracking triggers are re-implemented here. Timings are only comparable
+between runs of this stand-in, not with a real Oracle server.
+"""
+import os
+import re
+import json
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+from datagen import Dataset, TABLES, COLUMNS
+from catalog_snapshot import CATALOG_TABLES
+
+SCHEMA = """
+CREATE TABLE GENRE (GENRE_ID INTEGER PRIMARY KEY, GENRE_NAME TEXT, CHANGE_SEQ INTEGER DEFAULT 0 NOT NULL);
+CREATE TABLE DIRECTOR (
+    DIRECTOR_ID INTEGER PRIMARY KEY, DIRECTOR_NAME TEXT, BIRTH_YEAR INTEGER, NATIONALITY TEXT,
+    CHANGE_SEQ INTEGER DEFAULT 0 NOT NULL
+);
+CREATE TABLE ACTOR (
+    ACTOR_ID INTEGER PRIMARY KEY, ACTOR_NAME TEXT, BIRTH_YEAR INTEGER, NATIONALITY TEXT,
+    CHANGE_SEQ INTEGER DEFAULT 0 NOT NULL
+);
+CREATE TABLE USER_TABLE (
+    USER_ID INTEGER PRIMARY KEY, NAME TEXT, PASSWORD TEXT, ADMIN TEXT, JOIN_DATE TEXT, PASSWORD_HASH TEXT
+);
+CREATE TABLE MOVIE (
+    MOVIE_ID INTEGER PRIMARY KEY, TITLE TEXT, RELEASE_YEAR INTEGER, DURATION INTEGER,
+    DIRECTOR_ID INTEGER, GENRE_ID INTEGER, ACTOR_ID INTEGER, MOVIE_NAME TEXT,
+    CHANGE_SEQ INTEGER DEFAULT 0 NOT NULL
+);
+CREATE TABLE REVIEW (
+    REVIEW_ID INTEGER PRIMARY KEY, REVIEW_TEXT TEXT, RATING REAL, REVIEW_DATE TEXT,
+    USER_ID INTEGER REFERENCES USER_TABLE(USER_ID) ON DELETE CASCADE,
+    MOVIE_ID INTEGER REFERENCES MOVIE(MOVIE_ID) ON DELETE CASCADE
+);
+CREATE INDEX REVIEW_USER_IDX ON REVIEW(USER_ID, REVIEW_ID);
+CREATE INDEX REVIEW_MOVIE_IDX ON REVIEW(MOVIE_ID);
+CREATE TABLE MOVIE_RATING_STATS (
+    MOVIE_ID INTEGER PRIMARY KEY REFERENCES MOVIE(MOVIE_ID) ON DELETE CASCADE,
+    RATING_COUNT INTEGER DEFAULT 0 NOT NULL,
+    RATING_SUM REAL DEFAULT 0 NOT NULL,
+    RATING_SUMSQ REAL DEFAULT 0 NOT NULL
+);
+
+-- Same deltas as REVIEW_RATING_STATS_TRG in rating_stats_db_sql_code
+CREATE TRIGGER REVIEW_STATS_DEL AFTER DELETE ON REVIEW WHEN OLD.RATING IS NOT NULL BEGIN
+    UPDATE MOVIE_RATING_STATS SET RATING_COUNT = RATING_COUNT - 1, RATING_SUM = RATING_SUM - OLD.RATING,
+           RATING_SUMSQ = RATING_SUMSQ - OLD.RATING * OLD.RATING
+     WHERE MOVIE_ID = OLD.MOVIE_ID;
+END;
+CREATE TRIGGER REVIEW_STATS_INS AFTER INSERT ON REVIEW WHEN NEW.RATING IS NOT NULL BEGIN
+    INSERT INTO MOVIE_RATING_STATS (MOVIE_ID, RATING_COUNT, RATING_SUM, RATING_SUMSQ)
+    VALUES (NEW.MOVIE_ID, 1, NEW.RATING, NEW.RATING * NEW.RATING)
+    ON CONFLICT (MOVIE_ID) DO UPDATE SET RATING_COUNT = RATING_COUNT + 1, RATING_SUM = RATING_SUM + NEW.RATING,
+           RATING_SUMSQ = RATING_SUMSQ + NEW.RATING * NEW.RATING;
+END;
+CREATE TRIGGER REVIEW_STATS_UPD AFTER UPDATE OF RATING, MOVIE_ID ON REVIEW BEGIN
+    UPDATE MOVIE_RATING_STATS SET RATING_COUNT = RATING_COUNT - 1, RATING_SUM = RATING_SUM - OLD.RATING,
+           RATING_SUMSQ = RATING_SUMSQ - OLD.RATING * OLD.RATING
+     WHERE MOVIE_ID = OLD.MOVIE_ID AND OLD.RATING IS NOT NULL;
+    INSERT INTO MOVIE_RATING_STATS (MOVIE_ID, RATING_COUNT, RATING_SUM, RATING_SUMSQ)
+    SELECT NEW.MOVIE_ID, 1, NEW.RATING, NEW.RATING * NEW.RATING WHERE NEW.RATING IS NOT NULL
+    ON CONFLICT (MOVIE_ID) DO UPDATE SET RATING_COUNT = RATING_COUNT + 1, RATING_SUM = RATING_SUM + NEW.RATING,
+           RATING_SUMSQ = RATING_SUMSQ + NEW.RATING * NEW.RATING;
+END;
+"""
+
+# Same change tracking as catalog_change_tracking_sql_code; a one-row table stands in for the sequence
+CHANGE_TRACKING = """
+CREATE TABLE CATALOG_CHANGE_SEQ (VALUE INTEGER NOT NULL);
+INSERT INTO CATALOG_CHANGE_SEQ VALUES (0);
+CREATE TABLE CATALOG_TOMBSTONES (TABLE_NAME TEXT NOT NULL, ROW_KEY INTEGER NOT NULL, CHANGE_SEQ INTEGER NOT NULL);
+""" + "".join(f"""
+CREATE INDEX {table}_CHANGE_SEQ_IDX ON {table}(CHANGE_SEQ);
+CREATE TRIGGER {table}_CHANGE_INS AFTER INSERT ON {table} BEGIN
+    UPDATE CATALOG_CHANGE_SEQ SET VALUE = VALUE + 1;
+    UPDATE {table} SET CHANGE_SEQ = (SELECT VALUE FROM CATALOG_CHANGE_SEQ) WHERE {key} = NEW.{key};
+END;
+CREATE TRIGGER {table}_CHANGE_UPD AFTER UPDATE ON {table} WHEN NEW.CHANGE_SEQ IS OLD.CHANGE_SEQ BEGIN
+    UPDATE CATALOG_CHANGE_SEQ SET VALUE = VALUE + 1;
+    UPDATE {table} SET CHANGE_SEQ = (SELECT VALUE FROM CATALOG_CHANGE_SEQ) WHERE {key} = NEW.{key};
+END;
+CREATE TRIGGER {table}_TOMBSTONE AFTER DELETE ON {table} BEGIN
+    UPDATE CATALOG_CHANGE_SEQ SET VALUE = VALUE + 1;
+    INSERT INTO CATALOG_TOMBSTONES SELECT '{table}', OLD.{key}, VALUE FROM CATALOG_CHANGE_SEQ;
+END;
+""" for table, key in CATALOG_TABLES.items())
+
+_FETCH_FIRST_RE = re.compile(r"FETCH\s+FIRST\s+(:\w+|\d+)\s+ROWS\s+ONLY", re.IGNORECASE)
+_TABLE_BIND_RE = re.compile(r"SELECT\s+COLUMN_VALUE\s+FROM\s+TABLE\((:\w+)\)", re.IGNORECASE)
+_CALL_BLOCK_RE = re.compile(r"^\s*BEGIN\s+(\w+)\s*\((.*)\)\s*;\s*END\s*;?\s*$", re.IGNORECASE | re.DOTALL)
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+
+
+class Error(Exception):
+    pass
+
+
+class DatabaseError(Error):
+    pass
+
+
+class BatchError:
+    def __init__(self, offset, message):
+        self.offset = offset
+        self.message = message
+
+
+def translate(statement):
+    """Rewrite the Oracle-only constructs the app emits into SQLite"""
+    statement = _FETCH_FIRST_RE.sub(r"LIMIT \1", statement)
+    return _TABLE_BIND_RE.sub(r"SELECT value FROM json_each(\1)", statement)
+
+
+# ---- STORED PROCEDURES ----
+def _next_id(cur, table, column):
+    cur.execute(f"SELECT COALESCE(MAX({column}), 0) + 1 FROM {table}")
+    return cur.fetchone()[0]
+
+
+def add_review(cur, user_id, movie_id, rating, text):
+    review_id = _next_id(cur, "REVIEW", "REVIEW_ID")
+    cur.execute("INSERT INTO REVIEW VALUES (?, ?, ?, ?, ?, ?)",
+                (review_id, text, rating, datetime.now().isoformat(" "), user_id, movie_id))
+
+
+def edit_review(cur, user_id, movie_id, rating, text):
+    cur.execute("UPDATE REVIEW SET RATING = ?, REVIEW_TEXT = ?, REVIEW_DATE = ? WHERE USER_ID = ? AND MOVIE_ID = ?",
+                (rating, text, datetime.now().isoformat(" "), user_id, movie_id))
+    if cur.rowcount == 0:
+        raise DatabaseError("ORA-20001: review not found")
+
+
+def delete_review(cur, review_id):
+    cur.execute("DELETE FROM REVIEW WHERE REVIEW_ID = ?", (review_id,))
+    if cur.rowcount == 0:
+        raise DatabaseError("ORA-20002: review not found")
+
+
+def delete_user(cur, user_id):
+    cur.execute("DELETE FROM USER_TABLE WHERE USER_ID = ?", (user_id,))
+    if cur.rowcount == 0:
+        raise DatabaseError("ORA-20003: user not found")
+
+
+def modify_user(cur, user_id, name, admin):
+    cur.execute("UPDATE USER_TABLE SET NAME = ?, ADMIN = ? WHERE USER_ID = ?", (name, admin, user_id))
+    if cur.rowcount == 0:
+        raise DatabaseError("ORA-20003: user not found")
+
+
+def rebuild_movie_rating_stats(cur):
+    cur.execute("DELETE FROM MOVIE_RATING_STATS")
+    cur.execute("""
+        INSERT INTO MOVIE_RATING_STATS (MOVIE_ID, RATING_COUNT, RATING_SUM, RATING_SUMSQ)
+        SELECT MOVIE_ID, COUNT(RATING), SUM(RATING), SUM(RATING * RATING)
+        FROM REVIEW WHERE RATING IS NOT NULL GROUP BY MOVIE_ID
+    """)
+
+
+PROCEDURES = {
+    "ADD_REVIEW": add_review,
+    "EDIT_REVIEW": edit_review,
+    "DELETE_REVIEW": delete_review,
+    "DELETE_USER": delete_user,
+    "MODIFY_USER": modify_user,
+    "REBUILD_MOVIE_RATING_STATS": rebuild_movie_rating_stats,
+}
+
+
+# ---- DRIVER ----
+class ObjectType:
+    """Collection type from Connection.gettype(); objects bind as JSON arrays for json_each()"""
+    def newobject(self, values=()):
+        return json.dumps(list(values))
+
+
+class Cursor:
+    def __init__(self, conn):
+        self.connection = conn
+        self._cursor = conn._conn.cursor()
+        self.arraysize = 100
+        self.prefetchrows = 2
+        self._batch_errors = []
+        self._row_counts = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, statement, parameters=None, **kwargs):
+        call = _CALL_BLOCK_RE.match(statement)
+        if call:
+            return self.callproc(call.group(1), parameters)
+        try:
+            self._cursor.execute(translate(statement), kwargs or parameters or ())
+        except sqlite3.Error as e:
+            raise DatabaseError(str(e)) from e
+        return self if self._cursor.description else None
+
+    def executemany(self, statement, parameters, batcherrors=False, arraydmlrowcounts=False):
+        self._batch_errors = []
+        self._row_counts = []
+        call = _CALL_BLOCK_RE.match(statement)
+        for offset, params in enumerate(parameters):
+            try:
+                if call:
+                    self.callproc(call.group(1), params)
+                else:
+                    self._cursor.execute(translate(statement), params)
+                self._row_counts.append(max(self._cursor.rowcount, 0))
+            except (sqlite3.Error, Error) as e:
+                if not batcherrors:
+                    raise DatabaseError(str(e)) from e
+                self._batch_errors.append(BatchError(offset, str(e)))
+                self._row_counts.append(0)
+
+    def getbatcherrors(self):
+        return self._batch_errors
+
+    def getarraydmlrowcounts(self):
+        return self._row_counts
+
+    def callproc(self, name, parameters=None):
+        proc = PROCEDURES.get(name.upper())
+        if proc is None:
+            raise DatabaseError(f"PLS-00201: identifier '{name}' must be declared")
+        try:
+            proc(self._cursor, *(parameters or ()))
+        except sqlite3.Error as e:
+            raise DatabaseError(str(e)) from e
+        return parameters
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self.arraysize)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class Connection:
+    def __init__(self, path, pool=None):
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._pool = pool
+        self.autocommit = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def cursor(self):
+        return Cursor(self)
+
+    def gettype(self, name):
+        return ObjectType()
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self):
+        self._conn.execute("SELECT 1")
+
+    def cancel(self):
+        # Like Connection.cancel(): the running statement fails with an error
+        self._conn.interrupt()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool._release(self)
+        else:
+            self._conn.close()
+
+
+class ConnectionPool:
+    """Keeps released connections open for reuse, like a session pool"""
+    def __init__(self, path, min=1, max=4, **kwargs):
+        self.path = path
+        self.max = max
+        self._idle = [Connection(path, self) for _ in range(min)]
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return Connection(self.path, self)
+
+    def _release(self, conn):
+        conn._conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.max:
+                self._idle.append(conn)
+                return
+        conn._conn.close()
+
+    def close(self, force=False):
+        with self._lock:
+            for conn in self._idle:
+                conn._conn.close()
+            self._idle = []
+
+
+_database_path = None
+
+
+def create_database(path=None):
+    """Create an empty database with the app schema; connect()/create_pool() then use it"""
+    global _database_path
+    if path is None:
+        handle, path = tempfile.mkstemp(prefix="movies_standin_", suffix=".db")
+        os.close(handle)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA + CHANGE_TRACKING)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.close()
+    _database_path = path
+    return path
+
+
+def connect(user=None, password=None, dsn=None, **kwargs):
+    return Connection(_database_path)
+
+
+def create_pool(user=None, password=None, dsn=None, min=1, max=4, increment=1, **kwargs):
+    return ConnectionPool(_database_path, min=min, max=max)
+
+
+# ---- DATA ----
+def populate(path, movies, users, reviews, seed=0):
+    """Fill the stand-in database with the datagen dataset for this scale and seed"""
+    dataset = Dataset(movies, users, reviews, seed)
+    conn = sqlite3.connect(path)
+    for table in TABLES:
+        columns = COLUMNS[table]
+        conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            dataset.rows(table)
+        )
+    # search_page orders by the console schema's MOVIE_NAME, which datagen does not emit
+    conn.execute("UPDATE MOVIE SET MOVIE_NAME = LOWER(TITLE)")
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
@@ -0,0 +1,393 @@
+# catalog_snapshot.py
+"""On-disk SQLite copy of the catalog tables, kept current by delta syncs
+
+MOVIE, GENRE, DIRECTOR and ACTOR change rarely, so instead of downloading them every
+session the app keeps them in a local SQLite file. A sync copies only the rows whose
+CHANGE_SEQ (see catalog_change_tracking_sql_code) is above the high-water mark saved by
+the previous sync and drops rows listed in CATALOG_TOMBSTONES. Against a database
+without change tracking every sync reloads the tables in full.
+
+    python catalog_snapshot.py          # sync over the db pool and print what changed
+    python catalog_snapshot.py --full   # reload every table
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from contextlib import closing
+from datetime import date, datetime
+from decimal import Decimal
+from instrumentation import startup_log, instrument_connection
+
+# Mirrored tables and their key columns
+CATALOG_TABLES = {"GENRE": "GENRE_ID", "DIRECTOR": "DIRECTOR_ID", "ACTOR": "ACTOR_ID", "MOVIE": "MOVIE_ID"}
+TOMBSTONE_TABLE = "CATALOG_TOMBSTONES"
+STATE_TABLE = "SNAPSHOT_STATE"
+
+# CATALOG_SNAPSHOT=0 sends catalog reads straight to the database again
+SNAPSHOT_ENABLED = os.getenv("CATALOG_SNAPSHOT", "1") != "0"
+SNAPSHOT_PATH = os.getenv(
+    "CATALOG_SNAPSHOT_PATH", os.path.join(os.path.expanduser("~"), ".movies_app", "catalog.sqlite3")
+)
+# CHANGE_SEQ comes from one cached sequence, so values can commit out of order; every delta
+# re-reads rows within this many values of the highest CHANGE_SEQ seen to catch late commits.
+# This is a heuristic bound, not a guarantee: a row whose transaction commits after more than
+# SYNC_OVERLAP later values were handed out (a long transaction, or sequence caches on several
+# RAC instances) is missed if a sync ran in between, until it changes again or a --full sync
+SYNC_OVERLAP = int(os.getenv("CATALOG_SYNC_OVERLAP", "1000"))
+# Rows per fetchmany() round trip while syncing
+FETCH_BATCH = 1000
+
+# Trigram full-text index over the names the All Movies search box matches; rowid = MOVIE_ID
+SEARCH_TABLE = "MOVIE_SEARCH"
+_SEARCH_TABLE_DDL = (
+    f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5"
+    "(TITLE, DIRECTOR_NAME, GENRE_NAME, ACTOR_NAME, tokenize='trigram')"
+)
+_SEARCH_FILL = f"""
+    INSERT INTO {SEARCH_TABLE} (rowid, TITLE, DIRECTOR_NAME, GENRE_NAME, ACTOR_NAME)
+    SELECT m.MOVIE_ID, m.TITLE, d.DIRECTOR_NAME, g.GENRE_NAME, a.ACTOR_NAME
+    FROM MOVIE m
+    LEFT JOIN DIRECTOR d ON d.DIRECTOR_ID = m.DIRECTOR_ID
+    LEFT JOIN GENRE g ON g.GENRE_ID = m.GENRE_ID
+    LEFT JOIN ACTOR a ON a.ACTOR_ID = m.ACTOR_ID
+"""
+# Same columns and order as panel_queries.MOVIE_SEARCH_QUERY
+_SEARCH_QUERY = f"""
+    SELECT m.MOVIE_ID, m.TITLE, d.DIRECTOR_NAME, g.GENRE_NAME, a.ACTOR_NAME
+    FROM {SEARCH_TABLE} s
+    JOIN MOVIE m ON m.MOVIE_ID = s.rowid
+    LEFT JOIN DIRECTOR d ON d.DIRECTOR_ID = m.DIRECTOR_ID
+    LEFT JOIN GENRE g ON g.GENRE_ID = m.GENRE_ID
+    LEFT JOIN ACTOR a ON a.ACTOR_ID = m.ACTOR_ID
+    WHERE {SEARCH_TABLE} MATCH :phrase
+    ORDER BY s.rowid
+"""
+# Trigram lookups need at least this many characters; shorter terms use LIKE
+MIN_INDEXED_TERM = 3
+
+_TRACKING_PROBE = (
+    "SELECT m.CHANGE_SEQ, g.CHANGE_SEQ, d.CHANGE_SEQ, a.CHANGE_SEQ, t.CHANGE_SEQ "
+    f"FROM MOVIE m, GENRE g, DIRECTOR d, ACTOR a, {TOMBSTONE_TABLE} t WHERE 1 = 0"
+)
+
+
+def _local_value(value):
+    # SQLite stores what the app displays; dates keep their sortable ISO form
+    if isinstance(value, datetime):
+        return value.isoformat(" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, "read"):  # LOB
+        return value.read()
+    return value
+
+
+def _local_rows(rows):
+    return [tuple(_local_value(value) for value in row) for row in rows]
+
+
+class CatalogSnapshot:
+    """Local copy of CATALOG_TABLES; sync() brings it up to date over any DB-API connection"""
+    def __init__(self, path=SNAPSHOT_PATH):
+        self.path = path
+        self._sync_lock = threading.Lock()
+        self._ready = None
+        self._searchable = None
+
+    def connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Transactions are explicit (BEGIN/COMMIT in sync), not opened implicitly by sqlite3
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        # WAL lets panels keep reading the snapshot while a sync writes to it
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} "
+            "(TABLE_NAME TEXT PRIMARY KEY, HIGH_WATER INTEGER, COLUMNS TEXT, SYNCED_AT TEXT)"
+        )
+        return conn
+
+    @staticmethod
+    def _state(local):
+        rows = local.execute(f"SELECT TABLE_NAME, HIGH_WATER, COLUMNS FROM {STATE_TABLE}").fetchall()
+        return {name: (high_water, json.loads(columns)) for name, high_water, columns in rows}
+
+    @staticmethod
+    def _save_state(local, table, high_water, columns):
+        local.execute(
+            f"INSERT OR REPLACE INTO {STATE_TABLE} VALUES (?, ?, ?, ?)",
+            (table, high_water, json.dumps(columns), datetime.now().isoformat(" ", "seconds"))
+        )
+
+    def is_ready(self):
+        """True once every catalog table has been synced at least once"""
+        if not self._ready and os.path.exists(self.path):
+            with closing(self.connect()) as local:
+                self._ready = set(CATALOG_TABLES) <= set(self._state(local))
+        return bool(self._ready)
+
+    def is_searchable(self):
+        """True if the snapshot has its trigram search index (needs SQLite 3.34+)"""
+        if self._searchable is None and self.is_ready():
+            with closing(self.connect()) as local:
+                self._searchable = self._has_table(local, SEARCH_TABLE)
+        return bool(self._searchable)
+
+    @staticmethod
+    def _has_table(local, name):
+        return local.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+    def search(self, text, max_rows=None, handle=None):
+        """Movies whose title, director, genre or actor contains text, via the trigram index"""
+        phrase = '"' + text.strip().replace('"', '""') + '"'
+        return self.read(_SEARCH_QUERY, {"phrase": phrase}, max_rows, handle)
+
+    def read(self, query, params=None, max_rows=None, handle=None):
+        """Run a SELECT against the snapshot and return its rows (at most max_rows)
+
+        handle is a db.CancelHandle; cancelling it interrupts the query, which raises
+        sqlite3.OperationalError.
+        """
+        with closing(sqlite3.connect(self.path)) as local:
+            if handle is not None and not handle.attach(local.interrupt):
+                return []
+            try:
+                cursor = local.execute(query, params or ())
+                return cursor.fetchmany(max_rows) if max_rows else cursor.fetchall()
+            finally:
+                if handle is not None:
+                    handle.detach()
+
+    def sync(self, conn, full=False):
+        """Copy catalog changes since the last sync from conn; full=True reloads every table
+
+        Returns {"changed", "deleted", "reloaded", "tracked", "elapsed_ms"}. The whole sync
+        is one local transaction, so readers see either the old or the new snapshot.
+        """
+        started = time.perf_counter()
+        summary = {"changed": 0, "deleted": 0, "reloaded": [], "tracked": False}
+        touched = {table: set() for table in CATALOG_TABLES}  # keys upserted or deleted by a delta
+        remote = conn.cursor()
+        remote.arraysize = FETCH_BATCH
+        with self._sync_lock, closing(self.connect()) as local:
+            state = {} if full else self._state(local)
+            summary["tracked"] = tracked = self._has_change_tracking(remote)
+            marks = [entry[0] for entry in state.values() if entry[0] is not None]
+            overlap_from = max(marks, default=0) - SYNC_OVERLAP
+            local.execute("BEGIN IMMEDIATE")
+            try:
+                for table, key in CATALOG_TABLES.items():
+                    if tracked and state.get(table, (None,))[0] is not None:
+                        changed = self._apply_delta(remote, local, table, key, state[table], overlap_from, touched[table])
+                    else:
+                        changed = None
+                    if changed is None:
+                        changed = self._reload(remote, local, table, key)
+                        summary["reloaded"].append(table)
+                    summary["changed"] += changed
+                if tracked:
+                    summary["deleted"] = self._apply_tombstones(
+                        remote, local, state.get(TOMBSTONE_TABLE, (0,))[0], overlap_from, touched
+                    )
+                self._update_search_index(local, touched, rebuild=bool(summary["reloaded"]))
+                local.execute("COMMIT")
+            except BaseException:
+                local.execute("ROLLBACK")
+                raise
+        self._ready = True
+        summary["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return summary
+
+    @staticmethod
+    def _has_change_tracking(remote):
+        try:
+            remote.execute(_TRACKING_PROBE)
+            remote.fetchall()
+            return True
+        except Exception:
+            # Drivers raise their own error classes; any failure means the columns are missing
+            return False
+
+    @staticmethod
+    def _copy(remote, local, table, columns, key, keys=None):
+        """Upsert every row left on the remote cursor, adding their keys to keys if given
+
+        Returns (rows, highest CHANGE_SEQ or None).
+        """
+        insert = f'INSERT OR REPLACE INTO "{table}" VALUES ({", ".join("?" * len(columns))})'
+        seq_index = columns.index("CHANGE_SEQ") if "CHANGE_SEQ" in columns else None
+        key_index = columns.index(key)
+        count, high_water = 0, None
+        while True:
+            rows = remote.fetchmany(FETCH_BATCH)
+            if not rows:
+                return count, high_water
+            local.executemany(insert, _local_rows(rows))
+            count += len(rows)
+            if keys is not None:
+                keys.update(row[key_index] for row in rows)
+            if seq_index is not None:
+                batch_max = max(row[seq_index] for row in rows)
+                high_water = batch_max if high_water is None else max(high_water, batch_max)
+
+    def _reload(self, remote, local, table, key):
+        remote.execute(f"SELECT * FROM {table}")
+        columns = [d[0].upper() for d in remote.description]
+        local.execute(f'DROP TABLE IF EXISTS "{table}"')
+        local.execute(f'CREATE TABLE "{table}" ({", ".join(self._column_defs(columns, key))})')
+        count, high_water = self._copy(remote, local, table, columns, key)
+        self._save_state(local, table, None if "CHANGE_SEQ" not in columns else int(high_water or 0), columns)
+        return count
+
+    @staticmethod
+    def _column_defs(columns, key):
+        # Untyped columns keep the values exactly as fetched; the key is the rowid for fast joins
+        return [f'"{c}" INTEGER PRIMARY KEY' if c == key else f'"{c}"' for c in columns]
+
+    def _apply_delta(self, remote, local, table, key, table_state, overlap_from, touched):
+        """Upsert rows changed since the high-water mark; None if the table must be reloaded"""
+        high_water, columns = table_state
+        since = min(high_water, overlap_from)
+        remote.execute(f"SELECT * FROM {table} WHERE CHANGE_SEQ > :since", {"since": since})
+        if [d[0].upper() for d in remote.description] != columns:
+            # Columns were added or dropped upstream
+            remote.fetchall()
+            return None
+        count, new_high = self._copy(remote, local, table, columns, key, touched)
+        if new_high is not None and new_high > high_water:
+            self._save_state(local, table, int(new_high), columns)
+        return count
+
+    def _apply_tombstones(self, remote, local, high_water, overlap_from, touched):
+        """Delete rows the database deleted after the local copy's version of them"""
+        remote.execute(
+            f"SELECT TABLE_NAME, ROW_KEY, CHANGE_SEQ FROM {TOMBSTONE_TABLE} WHERE CHANGE_SEQ > :since",
+            {"since": min(high_water or 0, overlap_from)}
+        )
+        deleted, new_high = 0, high_water or 0
+        for table, row_key, seq in remote.fetchall():
+            key = CATALOG_TABLES.get(table.upper())
+            if key is None:
+                continue
+            # A row re-inserted after the delete carries a higher CHANGE_SEQ and is kept
+            if local.execute(
+                f'DELETE FROM "{table.upper()}" WHERE "{key}" = ? AND CHANGE_SEQ < ?', (row_key, seq)
+            ).rowcount:
+                deleted += 1
+                touched[table.upper()].add(row_key)
+            new_high = max(new_high, int(seq))
+        self._save_state(local, TOMBSTONE_TABLE, new_high, [])
+        return deleted
+
+    def _update_search_index(self, local, touched, rebuild):
+        """Rebuild the trigram index after a reload, else re-index only the movies a delta touched"""
+        if rebuild or not self._has_table(local, SEARCH_TABLE):
+            local.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+            try:
+                local.execute(_SEARCH_TABLE_DDL)
+            except sqlite3.OperationalError as e:
+                print("⚠️ No trigram search index (needs SQLite 3.34+); searches will scan:", e)
+                self._searchable = False
+                return
+            local.execute(_SEARCH_FILL)
+            self._searchable = True
+            return
+        if not any(touched.values()):
+            return
+        local.execute("CREATE TEMP TABLE IF NOT EXISTS TOUCHED_MOVIES (MOVIE_ID INTEGER PRIMARY KEY)")
+        local.execute("DELETE FROM TOUCHED_MOVIES")
+        local.executemany("INSERT INTO TOUCHED_MOVIES VALUES (?)", ((key,) for key in touched["MOVIE"]))
+        # A renamed director, genre or actor changes the indexed text of every movie that references it
+        for table, column in (("DIRECTOR", "DIRECTOR_ID"), ("GENRE", "GENRE_ID"), ("ACTOR", "ACTOR_ID")):
+            if touched[table]:
+                local.execute(
+                    f"INSERT OR IGNORE INTO TOUCHED_MOVIES SELECT MOVIE_ID FROM MOVIE "
+                    f"WHERE {column} IN ({', '.join('?' * len(touched[table]))})", sorted(touched[table])
+                )
+        local.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN (SELECT MOVIE_ID FROM TOUCHED_MOVIES)")
+        local.execute(_SEARCH_FILL + " WHERE m.MOVIE_ID IN (SELECT MOVIE_ID FROM TOUCHED_MOVIES)")
+
+
+catalog_snapshot = CatalogSnapshot()
+
+
+def describe(summary):
+    """One-line report of a sync() summary"""
+    reloaded = f", reloaded {', '.join(summary['reloaded'])}" if summary["reloaded"] else ""
+    return (f"📦 Catalog snapshot synced: {summary['changed']} rows copied, "
+            f"{summary['deleted']} deleted{reloaded} in {summary['elapsed_ms']:.0f} ms")
+
+
+def sync_from_pool(full=False, snapshot=None):
+    """Sync the snapshot over a pooled connection; returns the summary, or None if that failed"""
+    import db  # loaded on first use so the CLI can use the snapshot without the pool module
+    snapshot = snapshot or catalog_snapshot
+    if not SNAPSHOT_ENABLED:
+        return None
+    conn = db.acquire_connection()
+    if conn is None:
+        return None
+    started = time.perf_counter()
+    try:
+        summary = snapshot.sync(instrument_connection(conn), full)
+    except Exception as e:
+        print("❌ Catalog sync failed:", e)
+        return None
+    finally:
+        db.release_connection(conn)
+    startup_log.phase("catalog synced", started)
+    print(describe(summary))
+    return summary
+
+
+def fetch_catalog(query, params=None, refresh=False, snapshot=None, max_rows=None, handle=None):
+    """fetch_cursor for catalog-only SELECTs: answered from the snapshot once it has been synced
+
+    refresh=True syncs first. Queries touching other tables, and any query before the
+    first sync, go to the database through db.fetch_cursor (cached unless max_rows is set).
+    max_rows and handle work as in db.fetch_cursor.
+    """
+    import db
+    snapshot = snapshot or catalog_snapshot
+    tables = db.query_tables(query)
+    if SNAPSHOT_ENABLED and tables and tables <= set(CATALOG_TABLES):
+        if refresh:
+            sync_from_pool(snapshot=snapshot)
+        if snapshot.is_ready():
+            return snapshot.read(query, params, max_rows, handle)
+    return db.fetch_cursor(query, params, cache=True, max_rows=max_rows, handle=handle)
+
+
+def search_catalog(text, max_rows=None, handle=None, snapshot=None):
+    """Rows for the All Movies search box: movies whose title, director, genre or actor contains text
+
+    Uses the snapshot's trigram index for terms of MIN_INDEXED_TERM characters or more, and
+    panel_queries.MOVIE_SEARCH_QUERY (a LIKE scan, local or remote) otherwise.
+    """
+    from panel_queries import MOVIE_SEARCH_QUERY, movie_search_pattern
+    snapshot = snapshot or catalog_snapshot
+    if SNAPSHOT_ENABLED and len(text.strip()) >= MIN_INDEXED_TERM and snapshot.is_searchable():
+        return snapshot.search(text, max_rows, handle)
+    return fetch_catalog(MOVIE_SEARCH_QUERY, {"pattern": movie_search_pattern(text)},
+                         snapshot=snapshot, max_rows=max_rows, handle=handle)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync the local catalog snapshot from the database")
+    parser.add_argument("--full", action="store_true", help="reload every table instead of a delta")
+    parser.add_argument("--path", default=SNAPSHOT_PATH, help="snapshot file")
+    args = parser.parse_args(argv)
+    summary = sync_from_pool(args.full, CatalogSnapshot(args.path))
+    return 0 if summary else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
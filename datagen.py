@@ -0,0 +1,277 @@
+# datagen.py
+"""Deterministic synthetic data for the GENRE/DIRECTOR/ACTOR/USER_TABLE/MOVIE/REVIEW schema
+
+The same --seed and sizes always produce the same rows. Reviews per movie follow a Zipf
+law over a shuffled popularity ranking, ratings mix a per-movie quality, a per-user bias
+and noise, and review dates fall between the later of the movie's release and the user's
+join date and END_DATE. Rows are streamed: memory grows with movies and users, never with
+reviews, so tens of millions of reviews can go straight to CSV/JSONL files or into the
+database through ingest.load().
+
+    python datagen.py --movies 100000 --users 1000000 --reviews 20000000 --format csv --out data/
+    python datagen.py --movies 5000 --users 20000 --reviews 1000000 --format db
+"""
+import os
+import sys
+import csv
+import json
+import math
+import time
+import random
+import argparse
+from array import array
+from datetime import datetime, timedelta
+
+GENRES = [
+    "Action", "Drama", "Comedy", "Thriller", "Science Fiction", "Romance", "Adventure", "Fantasy",
+    "Horror", "Animation", "Documentary", "Crime", "Mystery", "Family", "War", "Western",
+    "Musical", "History", "Biography", "Sport",
+]
+FIRST_NAMES = [
+    "Aarav", "Priya", "Rohit", "Ananya", "Neha", "Karan", "Vikram", "Diya", "Rahul", "Isha",
+    "James", "Maria", "Chen", "Fatima", "Lucas", "Sofia", "Kenji", "Amara", "Noah", "Elena",
+    "Omar", "Greta", "Diego", "Hana", "Liam", "Zara", "Mateo", "Ingrid", "Kofi", "Yuki",
+]
+LAST_NAMES = [
+    "Patel", "Sharma", "Kumar", "Das", "Singh", "Mehta", "Rao", "Nair", "Sen", "Verma",
+    "Smith", "Garcia", "Wang", "Khan", "Silva", "Rossi", "Tanaka", "Okafor", "Brown", "Ivanova",
+    "Haddad", "Larsen", "Lopez", "Kim", "Murphy", "Ahmed", "Fernandez", "Berg", "Mensah", "Sato",
+]
+NATIONALITIES = ["American", "British", "Canadian", "Indian", "French", "Japanese", "Australian", "German"]
+TITLE_WORDS = [
+    "Silent", "Last", "Crimson", "Hidden", "Broken", "Golden", "Distant", "Endless", "Midnight", "Fallen",
+    "River", "Empire", "Horizon", "Shadow", "Garden", "Signal", "Harbor", "Storm", "Mirror", "Frontier",
+]
+REVIEW_PHRASES = {
+    1: ["A waste of time.", "Could not finish it.", "Weak plot and flat acting."],
+    2: ["Had its moments but mostly dull.", "Too long for what it says.", "Disappointing."],
+    3: ["Decent watch.", "Good movie but a bit long.", "Enjoyable enough once."],
+    4: ["Brilliant acting and direction.", "Really well made.", "Would watch again."],
+    5: ["A visually stunning and emotional film.", "A masterpiece.", "One of the best I have seen."],
+}
+
+START_DATE = datetime(2015, 1, 1)
+END_DATE = datetime(2024, 12, 31)
+FIRST_RELEASE_YEAR = 1950
+LAST_RELEASE_YEAR = 2024
+DEFAULT_ZIPF = 1.0
+PROGRESS_EVERY = 1000000
+
+TABLES = ["GENRE", "DIRECTOR", "ACTOR", "USER_TABLE", "MOVIE", "REVIEW"]
+COLUMNS = {
+    "GENRE": ("GENRE_ID", "GENRE_NAME"),
+    "DIRECTOR": ("DIRECTOR_ID", "DIRECTOR_NAME", "BIRTH_YEAR", "NATIONALITY"),
+    "ACTOR": ("ACTOR_ID", "ACTOR_NAME", "BIRTH_YEAR", "NATIONALITY"),
+    "USER_TABLE": ("USER_ID", "NAME", "PASSWORD", "ADMIN", "JOIN_DATE"),
+    "MOVIE": ("MOVIE_ID", "TITLE", "RELEASE_YEAR", "DURATION", "DIRECTOR_ID", "GENRE_ID", "ACTOR_ID"),
+    "REVIEW": ("REVIEW_ID", "REVIEW_TEXT", "RATING", "REVIEW_DATE", "USER_ID", "MOVIE_ID"),
+}
+
+
+def person_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def zipf_counts(total, n, exponent, cap):
+    """Split total into n Zipf-distributed counts (rank order), none above cap"""
+    weights = [1 / rank ** exponent for rank in range(1, n + 1)]
+    remaining, weight_left = total, sum(weights)
+    counts = array("l")
+    for w in weights:
+        # Sharing out what is left keeps the sum exact; anything over cap spills to later ranks
+        count = min(cap, remaining, round(remaining * w / weight_left))
+        counts.append(count)
+        remaining -= count
+        weight_left -= w
+    return counts
+
+
+class Dataset:
+    """Seeded generator for one dataset; rows(table) can be replayed any number of times"""
+    def __init__(self, movies, users, reviews, seed=0, zipf=DEFAULT_ZIPF, genres=len(GENRES), people=None):
+        self.movies = movies
+        self.users = users
+        self.reviews = reviews
+        self.seed = seed
+        self.zipf = zipf
+        self.genres = min(genres, len(GENRES))
+        self.people = people or max(10, movies // 20)
+
+    def rng(self, name):
+        # Each table draws from its own stream, so generating one never shifts another
+        return random.Random(f"{self.seed}:{name}")
+
+    def rows(self, table):
+        return getattr(self, f"_{table.lower()}")()
+
+    def _genre(self):
+        for genre_id in range(1, self.genres + 1):
+            yield genre_id, GENRES[genre_id - 1]
+
+    def _people(self, table):
+        rng = self.rng(table)
+        for person_id in range(1, self.people + 1):
+            yield person_id, person_name(rng), rng.randint(1930, 2000), rng.choice(NATIONALITIES)
+
+    def _director(self):
+        return self._people("DIRECTOR")
+
+    def _actor(self):
+        return self._people("ACTOR")
+
+    def user_join_dates(self):
+        """Join date per user id (index 0 unused), as days after START_DATE"""
+        rng = self.rng("USER_TABLE.join")
+        span = (END_DATE - START_DATE).days
+        days = array("l", [0])
+        for _ in range(self.users):
+            days.append(int(span * rng.random() ** 0.7))  # sign-ups pick up over time
+        return days
+
+    def _user_table(self):
+        rng = self.rng("USER_TABLE")
+        join_days = self.user_join_dates()
+        for user_id in range(1, self.users + 1):
+            admin = "Y" if rng.random() < 0.02 else "N"
+            joined = START_DATE + timedelta(days=join_days[user_id])
+            yield user_id, person_name(rng), f"pw{rng.getrandbits(32):08x}", admin, joined
+
+    def movie_release_years(self):
+        rng = self.rng("MOVIE.year")
+        years = array("l", [0])
+        for _ in range(self.movies):
+            # Skewed towards recent releases
+            span = LAST_RELEASE_YEAR - FIRST_RELEASE_YEAR
+            years.append(LAST_RELEASE_YEAR - int(span * rng.random() ** 2))
+        return years
+
+    def _movie(self):
+        rng = self.rng("MOVIE")
+        years = self.movie_release_years()
+        for movie_id in range(1, self.movies + 1):
+            title = f"The {rng.choice(TITLE_WORDS)} {rng.choice(TITLE_WORDS)} {movie_id}"
+            duration = max(70, min(240, int(rng.gauss(115, 22))))
+            yield (movie_id, title, years[movie_id], duration, rng.randint(1, self.people),
+                   rng.randint(1, self.genres), rng.randint(1, self.people))
+
+    def review_counts(self):
+        """Reviews per movie id (index 0 unused): Zipf by popularity rank, ranks shuffled over ids"""
+        ranked = list(range(1, self.movies + 1))
+        self.rng("REVIEW.rank").shuffle(ranked)
+        counts = array("l", [0]) * (self.movies + 1)
+        for movie_id, count in zip(ranked, zipf_counts(self.reviews, self.movies, self.zipf, self.users)):
+            counts[movie_id] = count
+        return counts
+
+    def _review(self):
+        rng = self.rng("REVIEW")
+        quality_rng, bias_rng = self.rng("REVIEW.quality"), self.rng("REVIEW.bias")
+        quality = array("d", (min(4.8, max(1.5, quality_rng.gauss(3.5, 0.6))) for _ in range(self.movies + 1)))
+        bias = array("d", (bias_rng.gauss(0, 0.45) for _ in range(self.users + 1)))
+        counts = self.review_counts()
+        years = self.movie_release_years()
+        join_days = self.user_join_dates()
+        span = (END_DATE - START_DATE).days
+        review_id = 0
+        for movie_id in range(1, self.movies + 1):
+            count = counts[movie_id]
+            if not count:
+                continue
+            # user = (start + k * step) mod users visits distinct users, so nobody reviews a movie twice
+            step = rng.randrange(1, self.users) if self.users > 1 else 1
+            while math.gcd(step, self.users) != 1:
+                step += 1
+            start = rng.randrange(self.users)
+            released = max(0, (datetime(years[movie_id], 1, 1) - START_DATE).days)
+            for k in range(count):
+                user_id = (start + k * step) % self.users + 1
+                rating = round(min(5.0, max(0.5, quality[movie_id] + bias[user_id] + rng.gauss(0, 0.7))), 1)
+                first_day = min(span, max(released, join_days[user_id]))
+                # Most reviews land soon after the earliest possible day
+                day = first_day + int((span - first_day) * rng.random() ** 2)
+                review_id += 1
+                text = rng.choice(REVIEW_PHRASES[max(1, min(5, round(rating)))])
+                yield review_id, text, rating, START_DATE + timedelta(days=day), user_id, movie_id
+
+
+# ---- OUTPUT ----
+def records(dataset, tables=TABLES):
+    """(line_no, table, columns, values) records in the shape ingest.load() takes"""
+    for table in tables:
+        for line_no, row in enumerate(dataset.rows(table), 1):
+            yield line_no, table, COLUMNS[table], list(row)
+
+
+def text_value(value):
+    return value.strftime("%Y-%m-%d") if isinstance(value, datetime) else value
+
+
+def write_files(dataset, out_dir, fmt, tables=TABLES):
+    """Write one <TABLE>.csv or <TABLE>.jsonl per table; returns {table: rows}"""
+    os.makedirs(out_dir, exist_ok=True)
+    written = {}
+    for table in tables:
+        path = os.path.join(out_dir, f"{table}.{fmt}")
+        columns, count = COLUMNS[table], 0
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            if fmt == "csv":
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                for row in dataset.rows(table):
+                    writer.writerow([text_value(v) for v in row])
+                    count += 1
+                    report_progress(table, count)
+            else:
+                for row in dataset.rows(table):
+                    f.write(json.dumps(dict(zip(columns, map(text_value, row)))) + "\n")
+                    count += 1
+                    report_progress(table, count)
+        written[table] = count
+    return written
+
+
+def report_progress(table, count):
+    if count % PROGRESS_EVERY == 0:
+        print(f"  {table}: {count:,} rows", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a reproducible synthetic movie dataset")
+    parser.add_argument("--movies", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--reviews", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--zipf", type=float, default=DEFAULT_ZIPF, help="Zipf exponent of reviews per movie")
+    parser.add_argument("--tables", nargs="*", choices=TABLES, default=TABLES, help="only generate these tables")
+    parser.add_argument("--format", choices=["csv", "jsonl", "db"], default="csv")
+    parser.add_argument("--out", default="synthetic_data", help="output directory for csv/jsonl")
+    parser.add_argument("--batch-size", type=int, default=None, help="rows per executemany call (db)")
+    args = parser.parse_args(argv)
+
+    dataset = Dataset(args.movies, args.users, args.reviews, args.seed, args.zipf)
+    tables = [t for t in TABLES if t in args.tables]
+    started = time.perf_counter()
+    if args.format == "db":
+        # Imported here so file output works without a database driver installed
+        import ingest
+        from db import acquire_connection, release_connection
+        conn = acquire_connection()
+        if conn is None:
+            return 1
+        try:
+            stats = ingest.load(records(dataset, tables), conn, args.batch_size or ingest.DEFAULT_BATCH_SIZE)
+        finally:
+            release_connection(conn)
+        stats.report("synthetic data")
+        return 1 if stats.errors else 0
+
+    written = write_files(dataset, args.out, args.format, tables)
+    elapsed = time.perf_counter() - started
+    for table, count in written.items():
+        print(f"{table}: {count:,} rows -> {os.path.join(args.out, f'{table}.{args.format}')}")
+    print(f"Done in {elapsed:.1f}s ({sum(written.values()) / elapsed:,.0f} rows/sec)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
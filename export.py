@@ -0,0 +1,348 @@
+# export.py
+"""Stream query results to CSV, JSONL, Arrow IPC or Parquet files in constant memory
+
+Rows come from db.stream_cursor in fetchmany() batches and each batch is written before
+the next one is fetched, so memory stays flat whatever the table size. The format follows
+the file extension (.csv, .jsonl, .arrow/.feather, .parquet). CSV and JSONL are compressed
+when the name ends in .gz, .bz2 or .xz; Arrow IPC takes zstd or lz4 and Parquet any codec
+pyarrow supports. pyarrow is only needed for the Arrow formats and is imported on use.
+
+    python export.py Reviews reviews.parquet --compression zstd
+    python export.py "Movie Search" matches.csv.gz --search "nolan"
+"""
+import os
+import sys
+import bz2
+import csv
+import gzip
+import json
+import lzma
+import time
+import argparse
+from decimal import Decimal
+from datetime import date, datetime
+from panel_queries import (
+    ADMIN_USERS_QUERY, ADMIN_MOVIES_QUERY, ADMIN_REVIEWS_EXPORT_QUERY, MOVIE_RATINGS_QUERY,
+    MOVIE_SEARCH_QUERY, movie_search_pattern
+)
+
+# Dataset name -> (query, (column name, Arrow type) per column written to the file). The types
+# are declared because a NUMBER comes back as int or float row by row, and a first batch
+# of whole ratings must not fix the column as integer
+EXPORT_DATASETS = {
+    "Users": (ADMIN_USERS_QUERY, (("USER_ID", "int64"), ("NAME", "string"), ("ADMIN", "string"))),
+    "Movies": (ADMIN_MOVIES_QUERY, (("MOVIE_ID", "int64"), ("TITLE", "string"), ("RELEASE_YEAR", "int64"),
+                                    ("DURATION", "int64"))),
+    "Reviews": (ADMIN_REVIEWS_EXPORT_QUERY, (("REVIEW_ID", "int64"), ("MOVIE_ID", "int64"), ("USER_ID", "int64"),
+                                             ("RATING", "float64"), ("REVIEW_TEXT", "string"))),
+    "Average Ratings": (MOVIE_RATINGS_QUERY, (("TITLE", "string"), ("MOVIE_ID", "int64"), ("AVERAGE_RATING", "float64"))),
+    # Bind :pattern with panel_queries.movie_search_pattern()
+    "Movie Search": (MOVIE_SEARCH_QUERY, (("MOVIE_ID", "int64"), ("TITLE", "string"), ("DIRECTOR_NAME", "string"),
+                                          ("GENRE_NAME", "string"), ("ACTOR_NAME", "string"))),
+}
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".arrow": "arrow", ".feather": "arrow",
+           ".ipc": "arrow", ".parquet": "parquet"}
+# Library defaults are the slowest levels (gzip 9, xz 6); these keep exports close to fetch speed
+TEXT_CODECS = {
+    "gzip": lambda path, mode, **kw: gzip.open(path, mode, compresslevel=6, **kw),
+    "bz2": lambda path, mode, **kw: bz2.open(path, mode, compresslevel=5, **kw),
+    "xz": lambda path, mode, **kw: lzma.open(path, mode, preset=1, **kw),
+}
+TEXT_CODEC_SUFFIXES = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz"}
+ARROW_CODECS = ("zstd", "lz4")
+PARQUET_CODECS = ("snappy", "gzip", "brotli", "zstd", "lz4")
+# Save dialog filter, one entry per format
+FILE_FILTER = "CSV (*.csv *.csv.gz *.csv.bz2 *.csv.xz);;JSON Lines (*.jsonl *.jsonl.gz *.jsonl.bz2 *.jsonl.xz);;" \
+              "Arrow IPC (*.arrow *.feather);;Parquet (*.parquet)"
+EXPORT_ARRAYSIZE = 5000
+# Fetched batches are gathered into Parquet row groups of about this many rows
+PARQUET_ROW_GROUP = 100000
+
+
+class ExportResult:
+    """Outcome of an export: rows and bytes written and how long it took"""
+    def __init__(self, path, fmt, compression):
+        self.path = path
+        self.format = fmt
+        self.compression = compression
+        self.rows = 0
+        self.bytes = 0
+        self.cancelled = False
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def rate(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        if self.cancelled:
+            return f"cancelled after {self.rows} rows"
+        codec = f" ({self.compression})" if self.compression else ""
+        return (f"{self.rows} rows, {self.bytes / 2**20:.1f} MB {self.format}{codec} "
+                f"in {self.elapsed:.2f}s ({self.rate:,.0f} rows/sec)")
+
+
+def detect_format(path, compression=None):
+    """(format, compression) from the file name, e.g. 'reviews.csv.gz' -> ('csv', 'gzip')"""
+    stem, suffix = os.path.splitext(path.lower())
+    if suffix in TEXT_CODEC_SUFFIXES:
+        compression = compression or TEXT_CODEC_SUFFIXES[suffix]
+        suffix = os.path.splitext(stem)[1]
+    if suffix not in FORMATS:
+        raise ValueError(f"Unknown export format '{suffix or path}'; use one of {', '.join(FORMATS)}")
+    fmt = FORMATS[suffix]
+    codecs = TEXT_CODECS if fmt in ("csv", "jsonl") else ARROW_CODECS if fmt == "arrow" else PARQUET_CODECS
+    if compression and compression not in codecs:
+        raise ValueError(f"{fmt} export does not support {compression} compression; use one of {', '.join(codecs)}")
+    return fmt, compression
+
+
+def _plain(value):
+    """Text-friendly value: LOBs read, dates in ISO form, Decimals as floats"""
+    if hasattr(value, "read"):  # LOB
+        return value.read()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _settle_lob_columns(rows, undecided, lobs):
+    """Decide the columns in undecided that have a value in rows: LOBs go into lobs
+
+    A column stays undecided while it is NULL in every row so far, so a CLOB that is NULL
+    throughout the first batch is still read once a later batch has a value.
+    """
+    for i in list(undecided):
+        value = next((row[i] for row in rows if row[i] is not None), None)
+        if value is not None:
+            undecided.discard(i)
+            if hasattr(value, "read"):
+                lobs.add(i)
+
+
+# ---- WRITERS ----
+class _TextWriter:
+    def __init__(self, path, columns, compression):
+        opener = TEXT_CODECS[compression] if compression else open
+        self.file = opener(path, "wt", newline="", encoding="utf-8")
+        self.columns = columns
+
+    def close(self):
+        self.file.close()
+
+
+class _CsvWriter(_TextWriter):
+    def __init__(self, path, columns, compression):
+        super().__init__(path, columns, compression)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+
+class _JsonlWriter(_TextWriter):
+    def write(self, rows):
+        columns = self.columns
+        self.file.write("".join(json.dumps(dict(zip(columns, row)), default=_plain) + "\n" for row in rows))
+
+
+class _ArrowWriter:
+    """Arrow IPC file or Parquet, one record batch per fetched batch
+
+    Column types are the declared ones (pyarrow type names such as "int64"). Without them
+    they are guessed from the first batch, widened so later batches still fit: integers
+    become float64 and everything that is neither a number nor a date is written as text.
+    """
+    def __init__(self, path, columns, compression, parquet, types=None):
+        try:
+            import pyarrow
+        except ImportError:
+            raise RuntimeError("Arrow and Parquet export need pyarrow (pip install pyarrow)") from None
+        self.pa = pyarrow
+        self.path = path
+        self.columns = columns
+        self.compression = compression
+        self.parquet = parquet
+        self.schema = None
+        if types:
+            self.schema = pyarrow.schema([(name, getattr(pyarrow, kind)()) for name, kind in zip(columns, types)])
+        self.text_columns = ()
+        self.writer = None
+        self.pending = []
+        self.pending_rows = 0
+
+    def write(self, rows):
+        pa = self.pa
+        values = list(zip(*rows))
+        if self.schema is None:
+            self.schema = pa.schema([(name, self._guess_type(column)) for name, column in zip(self.columns, values)])
+            self.text_columns = [i for i, field in enumerate(self.schema) if field.type == pa.string()]
+        if self.writer is None:
+            self.writer = self._open()
+        for i in self.text_columns:
+            values[i] = [value if value is None or isinstance(value, str) else str(value) for value in values[i]]
+        arrays = [self._array(column, field.type) for column, field in zip(values, self.schema)]
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        if not self.parquet:
+            self.writer.write_batch(batch)
+            return
+        self.pending.append(batch)
+        self.pending_rows += len(rows)
+        if self.pending_rows >= PARQUET_ROW_GROUP:
+            self._flush()
+
+    def _array(self, column, kind):
+        pa = self.pa
+        try:
+            return pa.array(column, type=kind)
+        except pa.ArrowInvalid:
+            if not pa.types.is_floating(kind):
+                raise
+            # Decimals (fetched NUMBERs with oracledb.defaults.fetch_decimals set)
+            return pa.array([None if value is None else float(value) for value in column], type=kind)
+
+    def _guess_type(self, column):
+        pa = self.pa
+        try:
+            kind = pa.array(column).type
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return pa.string()
+        if pa.types.is_integer(kind) or pa.types.is_floating(kind) or pa.types.is_decimal(kind):
+            return pa.float64()
+        if pa.types.is_temporal(kind):
+            return kind
+        # Text, and columns with only NULLs so far, which would otherwise lock in the null type
+        return pa.string()
+
+    def _flush(self):
+        if self.pending:
+            self.writer.write_table(self.pa.Table.from_batches(self.pending), row_group_size=self.pending_rows)
+            self.pending, self.pending_rows = [], 0
+
+    def _open(self):
+        if self.parquet:
+            import pyarrow.parquet as pq
+            return pq.ParquetWriter(self.path, self.schema, compression=self.compression or "snappy")
+        options = self.pa.ipc.IpcWriteOptions(compression=self.compression)
+        return self.pa.ipc.new_file(self.path, self.schema, options=options)
+
+    def close(self):
+        if self.writer is None:
+            # No rows: still leave a readable file with the column names
+            if self.schema is None:
+                self.schema = self.pa.schema([(name, self.pa.string()) for name in self.columns])
+            self.writer = self._open()
+        self._flush()
+        self.writer.close()
+
+
+def open_writer(path, columns, fmt, compression, types=None):
+    if fmt == "csv":
+        return _CsvWriter(path, columns, compression)
+    if fmt == "jsonl":
+        return _JsonlWriter(path, columns, compression)
+    return _ArrowWriter(path, columns, compression, parquet=fmt == "parquet", types=types)
+
+
+# ---- EXPORT ----
+def export_batches(batches, columns, path, compression=None, total=0, progress=None, stop=None, types=None):
+    """Write batches of rows to path and return an ExportResult
+
+    progress(done, total) is called after every batch (total is 0 when unknown). Setting
+    the threading.Event stop ends the export after the current batch; a cancelled or failed
+    export removes its partial file. types are the Arrow column types, if declared.
+    """
+    fmt, compression = detect_format(path, compression)
+    result = ExportResult(path, fmt, compression)
+    writer = open_writer(path, list(columns), fmt, compression, types)
+    lobs, undecided, finished = set(), None, False
+    try:
+        try:
+            for rows in batches:
+                if stop is not None and stop.is_set():
+                    result.cancelled = True
+                    break
+                if undecided is None and rows:
+                    undecided = set(range(len(rows[0])))
+                if undecided:
+                    _settle_lob_columns(rows, undecided, lobs)
+                if lobs:
+                    rows = [tuple(_plain(value) if i in lobs else value for i, value in enumerate(row)) for row in rows]
+                writer.write(rows)
+                result.rows += len(rows)
+                if progress:
+                    progress(result.rows, total)
+        finally:
+            try:
+                # Stopping early closes stream_cursor's generator, which hands its connection back
+                if hasattr(batches, "close"):
+                    batches.close()
+            finally:
+                writer.close()
+        finished = not result.cancelled
+    finally:
+        # Also reached when closing the writer fails, which leaves a truncated file
+        if not finished and os.path.exists(path):
+            os.remove(path)
+    result.elapsed = time.perf_counter() - result.started
+    result.bytes = os.path.getsize(path) if finished else 0
+    return result
+
+
+def export_query(query, columns, path, params=None, compression=None, count=False, progress=None, stop=None,
+                 types=None):
+    """Stream a SELECT into path; count=True runs a COUNT(*) first so progress has a total"""
+    from db import fetch_cursor, stream_cursor
+    total = 0
+    if count:
+        counted = fetch_cursor(f"SELECT COUNT(*) FROM ({query})", params)
+        if isinstance(counted, str):
+            raise RuntimeError(counted)
+        total = counted[0][0]
+    batches = stream_cursor(query, params, arraysize=EXPORT_ARRAYSIZE, batches=True)
+    return export_batches(batches, columns, path, compression, total, progress, stop, types)
+
+
+def export_dataset(name, path, params=None, **kwargs):
+    """export_query for one of EXPORT_DATASETS"""
+    query, columns = EXPORT_DATASETS[name]
+    names, types = zip(*columns)
+    return export_query(query, names, path, params, types=types, **kwargs)
+
+
+def search_params(text):
+    """Binds for the "Movie Search" dataset"""
+    return {"pattern": movie_search_pattern(text)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export an admin dataset to CSV, JSONL, Arrow IPC or Parquet")
+    parser.add_argument("dataset", choices=sorted(EXPORT_DATASETS))
+    parser.add_argument("path", help="output file; the extension picks the format")
+    parser.add_argument("--compression", help="gzip/bz2/xz for CSV and JSONL, zstd/lz4 for Arrow, any pyarrow codec for Parquet")
+    parser.add_argument("--search", default="", help="search text for the Movie Search dataset")
+    args = parser.parse_args(argv)
+
+    from db import DatabaseError
+    params = search_params(args.search) if args.dataset == "Movie Search" else None
+
+    def report(done, total):
+        print(f"\r  {done:,} of {total:,} rows" if total else f"\r  {done:,} rows", end="", file=sys.stderr)
+
+    try:
+        result = export_dataset(args.dataset, args.path, params, compression=args.compression,
+                                count=True, progress=report)
+    except (ValueError, RuntimeError, DatabaseError) as e:
+        print(f"❌ Export failed: {e}")
+        return 1
+    print(f"\n✅ {args.dataset} -> {args.path}: {result.summary()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
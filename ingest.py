@@ -0,0 +1,297 @@
+# ingest.py
+import re
+import sys
+import csv
+import json
+import time
+import argparse
+from datetime import datetime
+from db import acquire_connection, release_connection, close_pool
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_COMMIT_INTERVAL = 50000
+MAX_REPORTED_ERRORS = 20
+
+_INSERT_RE = re.compile(
+    r"INSERT\s+INTO\s+(\w+)\s*(?:\(([^)]*)\))?\s*VALUES\s*\((.*)\)\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+_VALUE_RE = re.compile(
+    r"""\s*(?:
+        '(?P<str>(?:[^']|'')*)'
+      | TO_DATE\(\s*'(?P<date>[^']*)'\s*,\s*'(?P<fmt>[^']*)'\s*\)
+      | (?P<num>[-+]?\d+(?:\.\d+)?)
+      | (?P<null>NULL)
+    )\s*(?:,|$)""",
+    re.IGNORECASE | re.VERBOSE
+)
+# Oracle TO_DATE format elements -> strptime directives
+_DATE_FORMATS = [("YYYY", "%Y"), ("HH24", "%H"), ("MM", "%m"), ("DD", "%d"), ("MI", "%M"), ("SS", "%S")]
+_ISO_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2})?)?$")
+
+
+def oracle_date(value, fmt):
+    for element, directive in _DATE_FORMATS:
+        fmt = fmt.replace(element, directive)
+    return datetime.strptime(value, fmt)
+
+
+def parse_values(text):
+    """Parse the inside of a VALUES (...) list into Python values"""
+    values, pos = [], 0
+    while pos < len(text):
+        match = _VALUE_RE.match(text, pos)
+        if not match:
+            raise ValueError(f"cannot parse value at: {text[pos:pos + 30]!r}")
+        if match.group("str") is not None:
+            values.append(match.group("str").replace("''", "'"))
+        elif match.group("date") is not None:
+            values.append(oracle_date(match.group("date"), match.group("fmt")))
+        elif match.group("num") is not None:
+            num = match.group("num")
+            values.append(float(num) if "." in num else int(num))
+        else:
+            values.append(None)
+        pos = match.end()
+    return values
+
+
+def scalar_kind(value):
+    """Type a CSV/JSON scalar would take: int, float, datetime (ISO dates) or str; None for NULL or ''"""
+    if value is None or value == "":
+        return None
+    if not isinstance(value, str):
+        return float if isinstance(value, float) else int if isinstance(value, int) else str
+    if _ISO_DATE_RE.match(value):
+        return datetime
+    for kind in (int, float):
+        try:
+            kind(value)
+            return kind
+        except ValueError:
+            pass
+    return str
+
+
+def wider_kind(a, b):
+    """The kind that holds values of both a and b: ints widen to float, anything else mixed to str"""
+    if a is None or a == b:
+        return b
+    if b is None:
+        return a
+    return float if {a, b} == {int, float} else str
+
+
+def column_kinds(rows):
+    """One kind per column name over every (line_no, columns, values) row of a file"""
+    kinds = {}
+    for _, columns, values in rows:
+        if isinstance(values, ValueError):
+            continue
+        for column, value in zip(columns, values):
+            kinds[column] = wider_kind(kinds.get(column), scalar_kind(value))
+    return kinds
+
+
+def coerce(value, kind):
+    """Convert a CSV/JSON scalar to its column's kind, so every row binds the same type; '' becomes NULL"""
+    if value is None or value == "":
+        return None
+    if kind is str:
+        return value if isinstance(value, str) else json.dumps(value)
+    if kind is datetime:
+        return datetime.fromisoformat(value)
+    return kind(value)
+
+
+def read_sql_inserts(path):
+    """Yield (line_no, table, columns, values) for each INSERT statement in a SQL script
+
+    values is the ValueError for a VALUES list that cannot be parsed, as in read_typed.
+    """
+    statement, start = [], None
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            stripped = line.strip()
+            if not statement and (not stripped or stripped.startswith("--")):
+                continue
+            if start is None:
+                start = line_no
+            statement.append(line)
+            if not stripped.endswith(";"):
+                continue
+            text = "".join(statement).strip()
+            statement, first = [], start
+            start = None
+            match = _INSERT_RE.match(text)
+            if not match:
+                continue  # COMMIT and other non-insert statements
+            table, cols, values = match.groups()
+            columns = tuple(c.strip().upper() for c in cols.split(",")) if cols else None
+            try:
+                values = parse_values(values)
+            except ValueError as e:
+                values = e
+            yield first, table.upper(), columns, values
+
+
+def _csv_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        columns = tuple(c.strip().upper() for c in next(reader))
+        for line_no, row in enumerate(reader, 2):
+            if len(row) != len(columns):
+                row = ValueError(f"expected {len(columns)} values, got {len(row)}")
+            yield line_no, columns, row
+
+
+def _jsonl_rows(path):
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_no, (), ValueError(f"invalid JSON: {e}")
+                continue
+            if not isinstance(record, dict):
+                yield line_no, (), ValueError("expected a JSON object")
+                continue
+            yield line_no, tuple(k.upper() for k in record), list(record.values())
+
+
+def read_typed(rows, path, table):
+    """Yield (line_no, table, columns, values) with each column coerced to one kind for the whole file
+
+    The file is read twice: once to settle the column kinds, once to load. Coercing cell by
+    cell would let a column bind as NUMBER in one row and VARCHAR2 in the next. A row that
+    cannot be read or coerced is yielded with the ValueError as its values.
+    """
+    kinds = column_kinds(rows(path))
+    for line_no, columns, values in rows(path):
+        if not isinstance(values, ValueError):
+            try:
+                values = [coerce(value, kinds[column]) for column, value in zip(columns, values)]
+            except ValueError as e:
+                values = e
+        yield line_no, table, columns, values
+
+
+def read_csv(path, table):
+    return read_typed(_csv_rows, path, table)
+
+
+def read_jsonl(path, table):
+    return read_typed(_jsonl_rows, path, table)
+
+
+def read_source(path, table=None):
+    if path.endswith(".csv") or path.endswith(".jsonl"):
+        if not table:
+            raise ValueError(f"{path}: --table is required for CSV/JSONL input")
+        reader = read_csv if path.endswith(".csv") else read_jsonl
+        return reader(path, table.upper())
+    return read_sql_inserts(path)
+
+
+def insert_sql(table, columns, width):
+    binds = ", ".join(f":{i}" for i in range(1, width + 1))
+    if columns:
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({binds})"
+    return f"INSERT INTO {table} VALUES ({binds})"
+
+
+class IngestStats:
+    def __init__(self):
+        self.rows = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def report(self, path):
+        rate = self.rows / self.elapsed if self.elapsed else 0
+        print(f"{path}: {self.rows} rows loaded, {len(self.errors)} rejected "
+              f"in {self.elapsed:.2f}s ({rate:,.0f} rows/sec)")
+        for line_no, message in sorted(self.errors, key=lambda error: error[0])[:MAX_REPORTED_ERRORS]:
+            print(f"  line {line_no}: {message}")
+        if len(self.errors) > MAX_REPORTED_ERRORS:
+            print(f"  ... {len(self.errors) - MAX_REPORTED_ERRORS} more")
+
+
+def load(records, conn, batch_size=DEFAULT_BATCH_SIZE, commit_interval=DEFAULT_COMMIT_INTERVAL):
+    """Insert (line_no, table, columns, values) records with array-bound executemany
+
+    Rows the readers could not parse carry a ValueError as their values; they are reported
+    in stats.errors next to the rows the database rejected, and the load carries on.
+    """
+    stats = IngestStats()
+    cursor = conn.cursor()
+    batch, lines, shape = [], [], None
+    since_commit = 0
+
+    def flush():
+        nonlocal since_commit
+        if not batch:
+            return
+        table, columns, width = shape
+        cursor.executemany(insert_sql(table, columns, width), batch, batcherrors=True)
+        failed = cursor.getbatcherrors()
+        for error in failed:
+            stats.errors.append((lines[error.offset], error.message))
+        stats.rows += len(batch) - len(failed)
+        since_commit += len(batch)
+        batch.clear()
+        lines.clear()
+        if since_commit >= commit_interval:
+            conn.commit()
+            since_commit = 0
+
+    try:
+        for line_no, table, columns, values in records:
+            if isinstance(values, ValueError):
+                stats.errors.append((line_no, str(values)))
+                continue
+            # A change of target table or column list starts a new batch
+            if shape != (table, columns, len(values)):
+                flush()
+                shape = (table, columns, len(values))
+            batch.append(values)
+            lines.append(line_no)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+        conn.commit()
+    finally:
+        cursor.close()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-load SQL INSERT scripts, CSV or JSONL files into Oracle")
+    parser.add_argument("files", nargs="+", help="SQL scripts (INSERT INTO ... VALUES), .csv or .jsonl files")
+    parser.add_argument("--table", help="target table for CSV/JSONL input")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="rows per executemany call")
+    parser.add_argument("--commit-interval", type=int, default=DEFAULT_COMMIT_INTERVAL, help="rows between commits")
+    args = parser.parse_args(argv)
+
+    conn = acquire_connection()
+    if conn is None:
+        return 1
+    try:
+        failed = False
+        for path in args.files:
+            stats = load(read_source(path, args.table), conn, args.batch_size, args.commit_interval)
+            stats.report(path)
+            failed = failed or bool(stats.errors)
+        return 1 if failed else 0
+    finally:
+        release_connection(conn)
+        close_pool()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,312 @@
+# instrumentation.py
+import os
+import re
+import json
+import math
+import bisect
+import time
+import atexit
+import threading
+
+# Record per-statement timings from startup; the admin Diagnostics tab can also switch this on
+INSTRUMENT = os.getenv("DB_INSTRUMENT", "0") == "1"
+# When set, recorded statistics are written to this JSON file at exit
+STATS_EXPORT_PATH = os.getenv("DB_STATS_EXPORT")
+
+# Latency histogram bucket upper bounds in ms: 4 buckets per doubling from 0.05 ms to ~3.5 min,
+# so a reported percentile is at most ~19% above the true value
+LATENCY_BOUNDS_MS = tuple(0.05 * 2 ** (i / 4) for i in range(89))
+PERCENTILES = (50, 95, 99)
+MAX_NORMALIZED = 1024
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![:\w])\d+(?:\.\d+)?")
+_normalized = {}
+
+
+def normalize(statement):
+    """Collapse whitespace and replace literals with ? so repeats of one statement share a row"""
+    key = _normalized.get(statement)
+    if key is None:
+        key = " ".join(_NUMBER_RE.sub("?", _STRING_RE.sub("?", statement)).split())
+        if len(_normalized) >= MAX_NORMALIZED:
+            _normalized.clear()
+        _normalized[statement] = key
+    return key
+
+
+def estimate_round_trips(rows, arraysize, prefetchrows):
+    """Round trips to execute a query and drain rows from it: rows past the prefetch come arraysize at a time"""
+    return 1 + math.ceil(max(0, rows - prefetchrows + 1) / arraysize)
+
+
+class Timer:
+    """Phase stopwatch for one instrumented call"""
+    __slots__ = ("last", "connect", "execute", "fetch")
+
+    def __init__(self):
+        self.last = time.perf_counter()
+        self.connect = self.execute = self.fetch = 0.0
+
+    def lap(self, phase):
+        """Charge the time since the previous lap to phase"""
+        now = time.perf_counter()
+        setattr(self, phase, getattr(self, phase) + now - self.last)
+        self.last = now
+
+    def resume(self):
+        """Restart the clock, e.g. after a generator was suspended in its consumer"""
+        self.last = time.perf_counter()
+
+
+class StatementStats:
+    """Running totals and a latency histogram for one normalized statement"""
+    __slots__ = ("calls", "errors", "rows", "round_trips", "connect", "execute", "fetch", "max", "buckets")
+
+    def __init__(self):
+        self.calls = self.errors = self.rows = self.round_trips = 0
+        self.connect = self.execute = self.fetch = self.max = 0.0
+        self.buckets = [0] * (len(LATENCY_BOUNDS_MS) + 1)
+
+    def add(self, timer, rows, round_trips, error):
+        latency = (timer.connect + timer.execute + timer.fetch) * 1000
+        self.calls += 1
+        self.errors += error
+        self.rows += rows
+        self.round_trips += round_trips
+        self.connect += timer.connect
+        self.execute += timer.execute
+        self.fetch += timer.fetch
+        self.max = max(self.max, latency)
+        self.buckets[bisect.bisect_left(LATENCY_BOUNDS_MS, latency)] += 1
+
+    def percentile(self, p):
+        """Upper bound (ms) of the histogram bucket holding the p-th percentile call"""
+        rank, seen = math.ceil(self.calls * p / 100), 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return min(LATENCY_BOUNDS_MS[i], self.max) if i < len(LATENCY_BOUNDS_MS) else self.max
+        return 0.0
+
+    def as_dict(self, statement):
+        total = self.connect + self.execute + self.fetch
+        report = {
+            "statement": statement,
+            "calls": self.calls,
+            "errors": self.errors,
+            "rows": self.rows,
+            "round_trips": self.round_trips,
+            "connect_ms": round(self.connect * 1000, 3),
+            "execute_ms": round(self.execute * 1000, 3),
+            "fetch_ms": round(self.fetch * 1000, 3),
+            "total_ms": round(total * 1000, 3),
+            "mean_ms": round(total * 1000 / self.calls, 3) if self.calls else 0.0,
+            "max_ms": round(self.max, 3),
+        }
+        for p in PERCENTILES:
+            report[f"p{p}_ms"] = round(self.percentile(p), 3)
+        return report
+
+
+class QueryStats:
+    """Per-statement call counts, rows, round trips and connect/execute/fetch latency
+
+    When disabled, start() returns None and callers skip every clock read, so the
+    only cost left is that check.
+    """
+    def __init__(self, enabled=INSTRUMENT):
+        self.enabled = enabled
+        self.since = time.time()
+        self._statements = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        return Timer() if self.enabled else None
+
+    def finish(self, timer, statement, rows=0, round_trips=1, error=False):
+        if timer is None:
+            return
+        key = normalize(statement)
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                stats = self._statements[key] = StatementStats()
+            stats.add(timer, rows, round_trips, error)
+
+    def snapshot(self):
+        """Per-statement reports, slowest total time first"""
+        with self._lock:
+            reports = [stats.as_dict(statement) for statement, stats in self._statements.items()]
+        return sorted(reports, key=lambda r: r["total_ms"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self.since = time.time()
+
+    def to_json(self):
+        return json.dumps({
+            "enabled": self.enabled,
+            "since": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.since)),
+            "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "latency_bucket_bounds_ms": [round(b, 4) for b in LATENCY_BOUNDS_MS],
+            "statements": self.snapshot(),
+        }, indent=2)
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+
+
+query_stats = QueryStats()
+
+
+class StartupLog:
+    """Startup phase timings, printed as they happen and measured from when this module loaded"""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []  # (name, seconds since start, duration or None)
+        self._lock = threading.Lock()
+
+    def phase(self, name, since=None):
+        """Log that a phase finished; since= is when it began, to show its own duration too"""
+        now = time.perf_counter()
+        duration = now - since if since is not None else None
+        with self._lock:
+            self.phases.append((name, now - self.started, duration))
+        took = f" (took {duration * 1000:.0f} ms)" if duration is not None else ""
+        print(f"⏱️ {name}: {(now - self.started) * 1000:.0f} ms after start{took}")
+
+
+startup_log = StartupLog()
+
+if STATS_EXPORT_PATH:
+    atexit.register(lambda: query_stats.export_json(STATS_EXPORT_PATH))
+
+
+class InstrumentedCursor:
+    """Cursor wrapper that records each execute and the fetches that follow it in query_stats
+
+    A call is closed off by the next execute, by draining the result, or by closing the cursor.
+    """
+    def __init__(self, cursor, stats):
+        object.__setattr__(self, "_cursor", cursor)
+        object.__setattr__(self, "_stats", stats)
+        object.__setattr__(self, "_pending", None)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        self._finish()
+
+    def _finish(self, drained=False):
+        pending = self._pending
+        if pending is None:
+            return
+        object.__setattr__(self, "_pending", None)
+        timer, statement, rows, error = pending
+        cursor = self._cursor
+        round_trips = estimate_round_trips(rows, cursor.arraysize, getattr(cursor, "prefetchrows", 2)) if drained else 1
+        self._stats.finish(timer, statement, rows, round_trips, error)
+
+    def _run(self, method, statement, args, kwargs):
+        self._finish()
+        timer = self._stats.start()
+        try:
+            result = method(statement, *args, **kwargs)
+        except Exception:
+            if timer is not None:
+                timer.lap("execute")
+                self._stats.finish(timer, statement, error=True)
+            raise
+        if timer is not None:
+            timer.lap("execute")
+            object.__setattr__(self, "_pending", [timer, statement, 0, False])
+        return result
+
+    def execute(self, statement, *args, **kwargs):
+        return self._run(self._cursor.execute, statement, args, kwargs)
+
+    def executemany(self, statement, *args, **kwargs):
+        return self._run(self._cursor.executemany, statement, args, kwargs)
+
+    def _fetched(self, rows, drained):
+        pending = self._pending
+        if pending is not None:
+            pending[0].lap("fetch")
+            pending[2] += rows
+            if drained:
+                self._finish(drained=True)
+
+    def fetchone(self):
+        if self._pending is not None:
+            self._pending[0].resume()
+        row = self._cursor.fetchone()
+        self._fetched(row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        if self._pending is not None:
+            self._pending[0].resume()
+        size = size or self._cursor.arraysize
+        rows = self._cursor.fetchmany(size)
+        self._fetched(len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        if self._pending is not None:
+            self._pending[0].resume()
+        rows = self._cursor.fetchall()
+        self._fetched(len(rows), True)
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+
+class InstrumentedConnection:
+    """Connection wrapper whose cursors are InstrumentedCursors"""
+    def __init__(self, conn, stats):
+        object.__setattr__(self, "_conn", conn)
+        object.__setattr__(self, "_stats", stats)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._conn.close()
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs), self._stats)
+
+
+def instrument_connection(conn, stats=query_stats):
+    """Wrap a raw driver connection for statement timing; returned unchanged while stats is disabled"""
+    if not stats.enabled:
+        return conn
+    return InstrumentedConnection(conn, stats)
@@ -0,0 +1,205 @@
+# movie_search.py
+import sys
+import time
+from collections import defaultdict
+
+SEARCH_FIELDS = ("title", "movie_name", "actor", "director", "genre")
+# Substring filters and the column each one matches
+LIKE_COLUMNS = {"title": "m.title", "movie_name": "m.movie_name", "actor": "a.actor_name", "director": "d.director_name"}
+
+PAGE_SIZE = 20
+# Largest id list bound as SYS.ODCINUMBERLIST; bigger candidate sets fall back to LIKE filters
+MAX_INDEXED_CANDIDATES = 32000
+
+CATALOG_QUERY = """
+    SELECT m.movie_id, m.title, m.movie_name, a.actor_name, d.director_name, g.genre_name
+    FROM movie m
+    LEFT JOIN genre g ON m.genre_id = g.genre_id
+    LEFT JOIN director d ON m.director_id = d.director_id
+    LEFT JOIN actor a ON m.actor_id = a.actor_id
+"""
+
+
+# Averages come from the maintained MOVIE_RATING_STATS row, so REVIEW is never fanned out into the join
+SEARCH_PAGE_QUERY = """
+    SELECT m.movie_id, m.title, m.movie_name, m.release_year, m.duration, g.genre_name, d.director_name, a.actor_name,
+           rs.rating_sum / NULLIF(rs.rating_count, 0) AS avg_rating
+    FROM movie m
+    LEFT JOIN genre g ON m.genre_id = g.genre_id
+    LEFT JOIN director d ON m.director_id = d.director_id
+    LEFT JOIN actor a ON m.actor_id = a.actor_id
+    LEFT JOIN movie_rating_stats rs ON rs.movie_id = m.movie_id
+    WHERE 1=1
+"""
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """In-memory trigram -> movie id postings over the name fields used by search_movies
+
+    Lookups confirm each candidate against the stored text, so they return exactly
+    the movies LOWER(col) LIKE '%term%' would match.
+    """
+    def __init__(self):
+        self.postings = {field: defaultdict(set) for field in SEARCH_FIELDS}
+        self.docs = {}
+        self.built_at = None
+
+    @classmethod
+    def from_cursor(cls, cursor):
+        index = cls()
+        cursor.execute(CATALOG_QUERY)
+        for row in cursor:
+            index.add(*row)
+        index.built_at = time.monotonic()
+        return index
+
+    def add(self, movie_id, title, movie_name, actor, director, genre):
+        """Insert or replace one movie's searchable fields"""
+        self.remove(movie_id)
+        doc = {}
+        for field, value in zip(SEARCH_FIELDS, (title, movie_name, actor, director, genre)):
+            text = (value or "").lower()
+            doc[field] = text
+            for gram in trigrams(text):
+                self.postings[field][gram].add(movie_id)
+        self.docs[movie_id] = doc
+
+    def remove(self, movie_id):
+        doc = self.docs.pop(movie_id, None)
+        if doc is None:
+            return
+        for field, text in doc.items():
+            postings = self.postings[field]
+            for gram in trigrams(text):
+                ids = postings.get(gram)
+                if ids is not None:
+                    ids.discard(movie_id)
+                    if not ids:
+                        del postings[gram]
+
+    def match(self, field, term):
+        """Movie ids whose field contains term (case-insensitive)"""
+        term = term.lower()
+        grams = trigrams(term)
+        if grams:
+            # Intersect smallest postings first; stop as soon as nothing is left
+            candidates = None
+            for gram in sorted(grams, key=lambda g: len(self.postings[field].get(g, ()))):
+                ids = self.postings[field].get(gram)
+                if not ids:
+                    return set()
+                candidates = set(ids) if candidates is None else candidates & ids
+                if not candidates:
+                    return set()
+        else:
+            # Terms shorter than a trigram cannot be narrowed; scan the in-memory text instead
+            candidates = self.docs.keys()
+        return {mid for mid in candidates if term in self.docs[mid][field]}
+
+    def search(self, **terms):
+        """Intersect match() over the non-empty field terms; None if no term was given"""
+        result = None
+        for field, term in terms.items():
+            if not term:
+                continue
+            ids = self.match(field, term)
+            result = ids if result is None else result & ids
+            if not result:
+                return set()
+        return result
+
+
+def search_page(conn, filters, after=None, page_size=PAGE_SIZE, index=None):
+    """Return (rows, next_cursor) for one page of matching movies ordered by (movie_name, movie_id)
+
+    filters may hold title/movie_name/actor/director substrings, an exact genre, year,
+    dur_min and dur_max. Pass next_cursor back as after= for the following page; it is
+    None on the last page.
+    """
+    query, params = SEARCH_PAGE_QUERY, {}
+    substrings = {field: filters[field] for field in LIKE_COLUMNS if filters.get(field)}
+    candidates = index.search(**substrings) if index is not None and substrings else None
+    if candidates is not None and not candidates:
+        return [], None
+    if candidates is not None and len(candidates) <= MAX_INDEXED_CANDIDATES:
+        params["p_ids"] = conn.gettype("SYS.ODCINUMBERLIST").newobject(sorted(candidates))
+        query += " AND m.movie_id IN (SELECT COLUMN_VALUE FROM TABLE(:p_ids))"
+    else:
+        for field, term in substrings.items():
+            params[f"p_{field}"] = f"%{term.lower()}%"
+            query += f" AND LOWER({LIKE_COLUMNS[field]}) LIKE :p_{field}"
+    if filters.get("genre"):
+        params["p_genre"] = filters["genre"].lower()
+        query += " AND LOWER(g.genre_name) = :p_genre"
+    if filters.get("year") is not None:
+        params["p_year"] = filters["year"]
+        query += " AND m.release_year = :p_year"
+    if filters.get("dur_min") is not None:
+        params["p_dur_min"] = filters["dur_min"]
+        query += " AND m.duration >= :p_dur_min"
+    if filters.get("dur_max") is not None:
+        params["p_dur_max"] = filters["dur_max"]
+        query += " AND m.duration <= :p_dur_max"
+    if after is not None:
+        # Seek past the last row of the previous page instead of skipping with OFFSET. Oracle
+        # stores '' as NULL and NULL names sort last, so they need their own branch
+        after_name, params["p_after_id"] = after
+        if after_name is None:
+            query += " AND m.movie_name IS NULL AND m.movie_id > :p_after_id"
+        else:
+            params["p_after_name"] = after_name
+            query += (" AND (m.movie_name > :p_after_name"
+                      " OR (m.movie_name = :p_after_name AND m.movie_id > :p_after_id)"
+                      " OR m.movie_name IS NULL)")
+    # One extra row tells us whether another page exists
+    params["p_limit"] = page_size + 1
+    # Served by MOVIE_NAME_SEEK_IDX on (MOVIE_NAME, MOVIE_ID), whose ascending order is NULLS LAST
+    query += " ORDER BY m.movie_name NULLS LAST, m.movie_id FETCH FIRST :p_limit ROWS ONLY"
+
+    cur = conn.cursor()
+    cur.arraysize = page_size + 1
+    cur.prefetchrows = page_size + 2
+    cur.execute(query, params)
+    rows = cur.fetchall()
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, (rows[-1][2], rows[-1][0])
+    return rows, None
+
+
+def benchmark(conn, terms, repeat=5):
+    """Time LIKE scans against index lookups for each (field, term) pair and print both"""
+    columns = dict(LIKE_COLUMNS, genre="g.genre_name")
+    cur = conn.cursor()
+    started = time.perf_counter()
+    index = TrigramIndex.from_cursor(cur)
+    print(f"Index build: {len(index.docs)} movies in {(time.perf_counter() - started) * 1000:.1f} ms")
+    for field, term in terms:
+        sql = CATALOG_QUERY + f" WHERE LOWER({columns[field]}) LIKE :1"
+        started = time.perf_counter()
+        for _ in range(repeat):
+            cur.execute(sql, [f"%{term.lower()}%"])
+            like_rows = cur.fetchall()
+        like_ms = (time.perf_counter() - started) * 1000 / repeat
+        started = time.perf_counter()
+        for _ in range(repeat):
+            ids = index.match(field, term)
+        index_ms = (time.perf_counter() - started) * 1000 / repeat
+        print(f"{field}={term!r}: LIKE {like_ms:.2f} ms ({len(like_rows)} rows), "
+              f"index {index_ms:.3f} ms ({len(ids)} ids)")
+
+
+if __name__ == "__main__":
+    from db import acquire_connection, release_connection
+    conn = acquire_connection()
+    if conn is None:
+        sys.exit(1)
+    try:
+        pairs = [arg.split("=", 1) for arg in sys.argv[1:]] or [("title", "the"), ("actor", "leo"), ("director", "no")]
+        benchmark(conn, pairs)
+    finally:
+        release_connection(conn)
\ No newline at end of file
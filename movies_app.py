@@ -1,19 +1,63 @@
+import time
 import oracledb
 import getpass
+from contextlib import closing
 from datetime import datetime
+from movie_search import TrigramIndex, CATALOG_QUERY, search_page
+from passwords import hash_password, verify_password
+from instrumentation import instrument_connection
+from catalog_snapshot import catalog_snapshot, describe, SNAPSHOT_ENABLED
+
+# Rebuild the in-process search index after this many seconds (other sessions may edit the catalog)
+SEARCH_INDEX_MAX_AGE = 600
+
+_search_index = None
 
 def get_connection():
-    return oracledb.connect(
+    # Statement timings are only recorded with DB_INSTRUMENT=1; see instrumentation.py
+    return instrument_connection(oracledb.connect(
         user="scott",
         password="tiger",
         dsn="localhost/orclpdb1"
-    )
+    ))
 
-def next_seq(seq_name):
-    with get_connection() as conn:
+# Insert-or-update a user's review of a movie and commit, all in one round trip. Legacy data can
+# hold several reviews per user and movie: the MERGE updates them all and MAX() returns the
+# newest id, since MERGE ... RETURNING needs Oracle 23ai and SELECT INTO would raise TOO_MANY_ROWS
+UPSERT_REVIEW_SQL = """
+BEGIN
+    MERGE INTO review r
+    USING (SELECT :user_id AS user_id, :movie_id AS movie_id FROM dual) s
+    ON (r.user_id = s.user_id AND r.movie_id = s.movie_id)
+    WHEN MATCHED THEN UPDATE
+        SET r.rating = :rating, r.review_text = :text, r.review_date = :review_date
+    WHEN NOT MATCHED THEN
+        INSERT (review_id, user_id, movie_id, rating, review_text, review_date)
+        VALUES (review_seq.NEXTVAL, s.user_id, s.movie_id, :rating, :text, :review_date);
+    SELECT MAX(review_id) INTO :review_id FROM review WHERE user_id = :user_id AND movie_id = :movie_id;
+    COMMIT;
+END;
+"""
+
+def insert_returning_id(conn, sql, params):
+    """Run an INSERT that takes its id from a sequence inline and return the id via RETURNING INTO"""
+    autocommit = conn.autocommit
+    conn.autocommit = True  # commit rides on the same round trip as the insert
+    try:
         cur = conn.cursor()
-        cur.execute(f"SELECT {seq_name}.NEXTVAL FROM dual")
-        return cur.fetchone()[0]
+        new_id = cur.var(int)
+        cur.execute(sql, list(params) + [new_id])
+        return new_id.getvalue()[0]
+    finally:
+        conn.autocommit = autocommit
+
+def upsert_review(conn, user_id, movie_id, rating, text, review_date):
+    """Add or update a review with a single MERGE round trip; returns its review_id"""
+    cur = conn.cursor()
+    review_id = cur.var(int)
+    cur.execute(UPSERT_REVIEW_SQL, user_id=user_id, movie_id=movie_id, rating=rating,
+                text=text, review_date=review_date, review_id=review_id)
+    return review_id.getvalue()
 
 def register_user():
     name = input("Name: ").strip()
@@ -21,14 +65,12 @@ def register_user():
     pwd = getpass.getpass("Password: ").strip()
     join_date = datetime.now().strftime("%Y-%m-%d")
     try:
-        uid = next_seq("users_seq")
         with get_connection() as conn:
-            cur = conn.cursor()
-            cur.execute("""
+            uid = insert_returning_id(conn, """
                 INSERT INTO users (join_date, user_id, name, password, email, admin)
-                VALUES (:1, :2, :3, :4, :5, :6)
-            """, (join_date, uid, name, pwd, email, 0))
-            conn.commit()
+                VALUES (:1, users_seq.NEXTVAL, :2, :3, :4, :5)
+                RETURNING user_id INTO :6
+            """, (join_date, name, hash_password(pwd), email, 0))
         print("Registered. Your user id:", uid)
     except Exception as e:
         print("Error registering:", e)
@@ -38,78 +80,79 @@ def login_user():
     pwd = getpass.getpass("Password: ").strip()
     with get_connection() as conn:
         cur = conn.cursor()
-        cur.execute("SELECT user_id, name, admin FROM users WHERE email=:1 AND password=:2", (email, pwd))
+        # Look up by email only (indexed) and verify the stored hash here
+        cur.execute("SELECT user_id, name, admin, password FROM users WHERE email=:1", (email,))
         r = cur.fetchone()
-        if r:
-            user_id, name, admin = r
+        if r and verify_password(pwd, r[3]):
+            user_id, name, admin, _ = r
             print(f"Welcome {name} ({'Admin' if admin else 'User'})!")
             return int(user_id), int(admin)
         else:
             print("Invalid credentials.")
             return None, 0
 
-def search_movies():
-    print("\nEnter filters — leave blank to skip.")
-    title = input("Title substring: ").strip()
-    movie_name = input("Movie name substring: ").strip()
-    genre = input("Genre: ").strip()
-    actor = input("Actor name substring: ").strip()
-    director = input("Director name substring: ").strip()
-    year = input("Release year (exact): ").strip()
-    dur_min = input("Min duration (minutes): ").strip()
-    dur_max = input("Max duration (minutes): ").strip()
+def get_search_index(conn):
+    global _search_index
+    if _search_index is None or time.monotonic() - _search_index.built_at > SEARCH_INDEX_MAX_AGE:
+        if SNAPSHOT_ENABLED:
+            # Pull only the catalog changes since the last run, then index the local copy
+            print(describe(catalog_snapshot.sync(conn)))
+            with closing(catalog_snapshot.connect()) as local:
+                _search_index = TrigramIndex.from_cursor(local.cursor())
+        else:
+            _search_index = TrigramIndex.from_cursor(conn.cursor())
+    return _search_index
+
+def refresh_search_index(conn, movie_id):
+    """Re-read one movie into the search index after it was added or edited"""
+    if _search_index is None:
+        return
+    cur = conn.cursor()
+    cur.execute(CATALOG_QUERY + " WHERE m.movie_id = :1", (movie_id,))
+    row = cur.fetchone()
+    if row:
+        _search_index.add(*row)
+    else:
+        _search_index.remove(movie_id)
 
-    query = """
-    SELECT m.movie_id, m.title, m.movie_name, m.release_year, m.duration, g.genre_name, d.director_name, a.actor_name,
-           AVG(r.rating) OVER (PARTITION BY m.movie_id) AS avg_rating
-    FROM movie m
-    LEFT JOIN genre g ON m.genre_id = g.genre_id
-    LEFT JOIN director d ON m.director_id = d.director_id
-    LEFT JOIN actor a ON m.actor_id = a.actor_id
-    LEFT JOIN review r ON r.movie_id = m.movie_id
-    WHERE 1=1
-    """
-    params = []
-    if title:
-        params.append(f"%{title.lower()}%"); query += f" AND LOWER(m.title) LIKE :{len(params)}"
-    if movie_name:
-        params.append(f"%{movie_name.lower()}%"); query += f" AND LOWER(m.movie_name) LIKE :{len(params)}"
-    if genre:
-        params.append(genre.lower()); query += f" AND LOWER(g.genre_name)=:{len(params)}"
-    if actor:
-        params.append(f"%{actor.lower()}%"); query += f" AND LOWER(a.actor_name) LIKE :{len(params)}"
-    if director:
-        params.append(f"%{director.lower()}%"); query += f" AND LOWER(d.director_name) LIKE :{len(params)}"
-    if year:
-        try:
-            params.append(int(year)); query += f" AND m.release_year=:{len(params)}"
-        except:
-            print("Ignoring invalid year")
-    if dur_min:
-        try:
-            params.append(int(dur_min)); query += f" AND m.duration >= :{len(params)}"
-        except:
-            print("Ignoring invalid min duration")
-    if dur_max:
-        try:
-            params.append(int(dur_max)); query += f" AND m.duration <= :{len(params)}"
-        except:
-            print("Ignoring invalid max duration")
+def read_int_filter(prompt, label):
+    value = input(prompt).strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        print(f"Ignoring invalid {label}")
+        return None
 
-    query += " GROUP BY m.movie_id, m.title, m.movie_name, m.release_year, m.duration, g.genre_name, d.director_name, a.actor_name ORDER BY m.movie_name"
+def search_movies():
+    print("\nEnter filters — leave blank to skip.")
+    filters = {
+        "title": input("Title substring: ").strip(),
+        "movie_name": input("Movie name substring: ").strip(),
+        "genre": input("Genre: ").strip(),
+        "actor": input("Actor name substring: ").strip(),
+        "director": input("Director name substring: ").strip(),
+        "year": read_int_filter("Release year (exact): ", "year"),
+        "dur_min": read_int_filter("Min duration (minutes): ", "min duration"),
+        "dur_max": read_int_filter("Max duration (minutes): ", "max duration"),
+    }
 
     with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute(query, params)
-        rows = cur.fetchall()
+        index = get_search_index(conn)
+        rows, cursor = search_page(conn, filters, index=index)
         if not rows:
             print("No movies found.")
             return
         print("\nFound movies:")
-        for r in rows:
-            mid, ttl, mname, ry, dur, gname, dname, aname, avg_rating = r
-            avg_str = f"{avg_rating:.2f}" if avg_rating is not None else "N/A"
-            print(f"[{mid}] {mname} (Title: {ttl}) — {ry}, {dur}min, Genre: {gname}, Director: {dname}, Actor: {aname}, AvgRating: {avg_str}")
+        while True:
+            for r in rows:
+                mid, ttl, mname, ry, dur, gname, dname, aname, avg_rating = r
+                avg_str = f"{avg_rating:.2f}" if avg_rating is not None else "N/A"
+                print(f"[{mid}] {mname} (Title: {ttl}) — {ry}, {dur}min, Genre: {gname}, Director: {dname}, Actor: {aname}, AvgRating: {avg_str}")
+            if cursor is None or input("More results? (y/N): ").strip().lower() != "y":
+                break
+            rows, cursor = search_page(conn, filters, after=cursor, index=index)
 
 def add_or_update_review(user_id):
     movie_id = input("Movie ID: ").strip()
@@ -127,23 +170,8 @@ def add_or_update_review(user_id):
     now = datetime.now()
 
     with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT review_id FROM review WHERE user_id=:1 AND movie_id=:2", (user_id, movie_id))
-        r = cur.fetchone()
-        if r:
-            review_id = r[0]
-            cur.execute("""
-                UPDATE review SET rating=:1, review_text=:2, review_date=:3 WHERE review_id=:4
-            """, (rating, text, now, review_id))
-            print("Review updated.")
-        else:
-            rid = next_seq("review_seq")
-            cur.execute("""
-                INSERT INTO review (review_text, rating, review_id, user_id, movie_id, review_date)
-                VALUES (:1, :2, :3, :4, :5, :6)
-            """, (text, rating, rid, user_id, movie_id, now))
-            print("Review added.")
-        conn.commit()
+        review_id = upsert_review(conn, user_id, movie_id, rating, text, now)
+    print("Review saved. Review id:", review_id)
 
 def delete_review(user_id):
     movie_id = input("Movie ID of review to delete: ").strip()
@@ -185,35 +213,29 @@ def view_movie_reviews():
 
 def add_genre():
     name = input("Genre name: ").strip()
-    gid = next_seq("genre_seq")
     with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("INSERT INTO genre (genre_id, genre_name) VALUES (:1, :2)", (gid, name))
-        conn.commit()
+        gid = insert_returning_id(conn, "INSERT INTO genre (genre_id, genre_name) VALUES (genre_seq.NEXTVAL, :1) "
+                                        "RETURNING genre_id INTO :2", (name,))
     print("✅ Genre added. id:", gid)
 
 def add_actor():
     name = input("Actor name: ").strip()
     birth = input("Birth year: ").strip()
     nat = input("Nationality: ").strip()
-    aid = next_seq("actor_seq")
     with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("INSERT INTO actor (actor_id, actor_name, birth_year, nationality) VALUES (:1,:2,:3,:4)",
-                    (aid, name, int(birth) if birth.isdigit() else None, nat))
-        conn.commit()
+        aid = insert_returning_id(conn, "INSERT INTO actor (actor_id, actor_name, birth_year, nationality) "
+                                        "VALUES (actor_seq.NEXTVAL,:1,:2,:3) RETURNING actor_id INTO :4",
+                                  (name, int(birth) if birth.isdigit() else None, nat))
     print("✅ Actor added id:", aid)
 
 def add_director():
     name = input("Director name: ").strip()
     birth = input("Birth year: ").strip()
     nat = input("Nationality: ").strip()
-    did = next_seq("director_seq")
     with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("INSERT INTO director (director_id, director_name, nationality, birth_year) VALUES (:1,:2,:3,:4)",
-                    (did, name, nat, int(birth) if birth.isdigit() else None))
-        conn.commit()
+        did = insert_returning_id(conn, "INSERT INTO director (director_id, director_name, nationality, birth_year) "
+                                        "VALUES (director_seq.NEXTVAL,:1,:2,:3) RETURNING director_id INTO :4",
+                                  (name, nat, int(birth) if birth.isdigit() else None))
     print("✅ Director added id:", did)
 
 def add_movie_admin():
@@ -238,16 +260,15 @@ def add_movie_admin():
         add_actor()
         a_id = input("Enter new actor id you created: ").strip()
 
-    mid = next_seq("movie_seq")
     with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("""
+        mid = insert_returning_id(conn, """
             INSERT INTO movie (title, movie_id, movie_name, release_year, duration, genre_id, director_id, actor_id)
-            VALUES (:1, :2, :3, :4, :5, :6, :7, :8)
-        """, (title, mid, movie_name, int(year) if year.isdigit() else None,
+            VALUES (:1, movie_seq.NEXTVAL, :2, :3, :4, :5, :6, :7)
+            RETURNING movie_id INTO :8
+        """, (title, movie_name, int(year) if year.isdigit() else None,
               int(duration) if duration.isdigit() else None,
               int(g_id), int(d_id), int(a_id)))
-        conn.commit()
+        refresh_search_index(conn, mid)
     print("✅ Movie added id:", mid)
 
 def edit_movie_admin():
@@ -279,6 +300,7 @@ def edit_movie_admin():
               int(duration) if str(duration).isdigit() else None,
               int(gid), int(did), int(aid), movie_id))
         conn.commit()
+        refresh_search_index(conn, movie_id)
     print("✅ Movie updated.")
 
 def delete_movie_admin():
@@ -292,19 +314,26 @@ def delete_movie_admin():
         cur.execute("DELETE FROM review WHERE movie_id=:1", (movie_id,))
         cur.execute("DELETE FROM movie WHERE movie_id=:1", (movie_id,))
         conn.commit()
+    if _search_index is not None:
+        _search_index.remove(movie_id)
     print("✅ Movie and its reviews removed (if existed).")
 
-def list_all(table, cols="*"):
+def list_all(table, cols="*", batch_size=500):
     with get_connection() as conn:
         cur = conn.cursor()
+        # Stream in fetchmany() batches so big tables print in constant memory
+        cur.arraysize = batch_size
+        cur.prefetchrows = batch_size + 1
         cur.execute(f"SELECT {cols} FROM {table} ORDER BY 1")
-        rows = cur.fetchall()
+        rows = cur.fetchmany()
         if not rows:
             print(f"No records in {table}.")
             return
         print(f"\n--- {table.upper()} ---")
-        for r in rows:
-            print(r)
+        while rows:
+            for r in rows:
+                print(r)
+            rows = cur.fetchmany()
 
 def user_menu(user_id):
     while True:
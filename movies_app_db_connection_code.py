@@ -1,74 +1,566 @@
 # db.py
 import os
-import oracledb
-from dotenv import load_dotenv
+import re
+import time
+import atexit
+import threading
+from collections import OrderedDict
+from instrumentation import query_stats, estimate_round_trips, startup_log
 
-# Load environment variables from .env
-load_dotenv()
+# oracledb and python-dotenv are imported by init_driver(), not here, so importing this
+# module stays cheap and the GUI can show its first window before the driver loads
 
-DB_USER = os.getenv("DB_USER")
-DB_PASS = os.getenv("DB_PASS")
-DB_DSN  = os.getenv("DB_DSN")  # Format: host:port/service_name
+def _read_config():
+    """(Re)read settings from the environment; init_driver() calls it again after loading .env"""
+    global DB_USER, DB_PASS, DB_DSN, POOL_MIN, POOL_MAX, POOL_INCREMENT, POOL_PING_INTERVAL
+    global STREAM_ARRAYSIZE, CACHE_MAX_ENTRIES, CACHE_TTL, BULK_CHUNK_SIZE
+    DB_USER = os.getenv("DB_USER")
+    DB_PASS = os.getenv("DB_PASS")
+    DB_DSN  = os.getenv("DB_DSN")  # Format: host:port/service_name
 
-# Optional: Use thin mode (pure Python, no Instant Client needed)
-oracledb.init_oracle_client(lib_dir=None)  # Comment out if you have Instant Client installed
+    # Connection pool sizing
+    POOL_MIN       = int(os.getenv("DB_POOL_MIN", "1"))
+    POOL_MAX       = int(os.getenv("DB_POOL_MAX", "4"))
+    POOL_INCREMENT = int(os.getenv("DB_POOL_INCREMENT", "1"))
+    # Idle seconds after which a connection is pinged when it is acquired (0 = ping every time)
+    POOL_PING_INTERVAL = int(os.getenv("DB_POOL_PING_INTERVAL", "60"))
+
+    # Rows per fetchmany() round trip for stream_cursor
+    STREAM_ARRAYSIZE = int(os.getenv("DB_STREAM_ARRAYSIZE", "1000"))
+
+    # Result cache for fetch_cursor(..., cache=True)
+    CACHE_MAX_ENTRIES = int(os.getenv("DB_CACHE_MAX_ENTRIES", "128"))
+    CACHE_TTL         = float(os.getenv("DB_CACHE_TTL", "300"))  # seconds
+
+    # Rows per executemany() round trip for the bulk helpers
+    BULK_CHUNK_SIZE = int(os.getenv("DB_BULK_CHUNK_SIZE", "500"))
+
+_read_config()
+
+# Tables written by each stored procedure; cached reads of these tables are dropped after a call
+PROCEDURE_TABLES = {
+    "ADD_REVIEW":    ("REVIEW", "MOVIE_RATING_STATS"),
+    "EDIT_REVIEW":   ("REVIEW", "MOVIE_RATING_STATS"),
+    "DELETE_REVIEW": ("REVIEW", "MOVIE_RATING_STATS"),
+    "DELETE_USER":   ("USER_TABLE", "REVIEW", "MOVIE_RATING_STATS"),
+    "MODIFY_USER":   ("USER_TABLE",),
+    "REBUILD_MOVIE_RATING_STATS": ("MOVIE_RATING_STATS",),
+}
+
+# Driver module used for pooled connections; tests can swap in a stand-in via create_pool(driver=...)
+_driver = None
+_driver_ready = False
+_init_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+
+class DatabaseError(Exception):
+    """Base error raised by the streaming helpers"""
+
+class ConnectionFailed(DatabaseError):
+    """No connection could be obtained from the pool"""
+
+class QueryFailed(DatabaseError):
+    """The driver rejected the statement or failed while fetching"""
+
+class CancelHandle:
+    """Lets another thread stop the statement a fetch is running, e.g. a superseded search
+
+    The fetch attaches its connection's cancel (Connection.cancel() for Oracle, interrupt()
+    for SQLite); cancel() calls it, and a fetch that has not started yet never runs.
+    """
+    def __init__(self):
+        self.cancelled = False
+        self._cancel = None
+        self._lock = threading.Lock()
+
+    def attach(self, cancel):
+        """Register how to stop the running statement; False if cancel() already happened"""
+        with self._lock:
+            self._cancel = cancel
+            return not self.cancelled
+
+    def detach(self):
+        with self._lock:
+            self._cancel = None
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self._cancel is not None:
+                try:
+                    self._cancel()
+                except Exception as e:
+                    # The statement may have finished, or the connection gone, in the meantime
+                    print("⚠️ Cancel failed:", e)
+
+class BulkResult:
+    """Outcome of a bulk call: counts, per-row failures and throughput"""
+    def __init__(self, total):
+        self.total = total
+        self.succeeded = 0
+        self.failures = []  # (params, error message)
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def rate(self):
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (f"{self.succeeded} of {self.total} succeeded, {len(self.failures)} failed "
+                f"in {self.elapsed:.2f}s ({self.rate:,.0f} rows/sec)")
+
+_TABLE_RE = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][\w$#]*)", re.IGNORECASE)
+
+def query_tables(query):
+    """Return the upper-cased table names a query reads FROM or JOINs"""
+    return frozenset(name.upper() for name in _TABLE_RE.findall(query))
+
+class QueryCache:
+    """Bounded LRU + TTL cache of SELECT results, tagged by the tables each query reads
+
+    Every invalidate() bumps a generation per table. Readers take generation() before
+    executing and pass it to put(), which drops rows read before a concurrent write.
+    """
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, tables, rows)
+        self._generations = {}  # table -> invalidations so far
+        self._epoch = 0  # invalidations of the whole cache
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(query, params):
+        query = " ".join(query.split())
+        if isinstance(params, dict):
+            return query, tuple(sorted(params.items()))
+        return query, tuple(params or ())
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def generation(self, tables):
+        """Snapshot to pass to put() for a query reading tables"""
+        with self._lock:
+            return self._generation(tables)
+
+    def _generation(self, tables):
+        return self._epoch, tuple(self._generations.get(table, 0) for table in sorted(tables))
+
+    def put(self, key, rows, tables, generation=None):
+        """Store rows unless a tagged table was invalidated since generation was taken"""
+        with self._lock:
+            if generation is not None and generation != self._generation(tables):
+                return False
+            self._entries[key] = (time.monotonic() + self.ttl, tables, rows)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, tables=None):
+        """Drop entries reading any of the given tables (all entries if tables is None)"""
+        with self._lock:
+            if tables is None:
+                self._epoch += 1
+                stale = list(self._entries)
+            else:
+                tables = {t.upper() for t in tables}
+                for table in tables:
+                    self._generations[table] = self._generations.get(table, 0) + 1
+                stale = [k for k, (_, tags, _) in self._entries.items() if tags & tables]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+query_cache = QueryCache()
+
+def init_driver():
+    """Load .env and initialise python-oracledb once; safe to call from any thread"""
+    global _driver, _driver_ready
+    if _driver_ready:
+        return _driver
+    with _init_lock:
+        if _driver_ready:
+            return _driver
+        started = time.perf_counter()
+        from dotenv import load_dotenv
+        # Load environment variables from .env
+        load_dotenv()
+        _read_config()
+        query_cache.max_entries, query_cache.ttl = CACHE_MAX_ENTRIES, CACHE_TTL
+        startup_log.phase("config loaded", started)
+        if _driver is None:
+            started = time.perf_counter()
+            import oracledb
+            _driver = oracledb
+            # Optional: Use thin mode (pure Python, no Instant Client needed)
+            oracledb.init_oracle_client(lib_dir=None)  # Comment out if you have Instant Client installed
+            startup_log.phase("driver initialised", started)
+        _driver_ready = True
+        return _driver
 
 def get_connection():
     """Create and return a new Oracle DB connection"""
+    driver = init_driver()
     try:
-        conn = oracledb.connect(
+        conn = driver.connect(
             user=DB_USER,
             password=DB_PASS,
             dsn=DB_DSN
         )
         return conn
-    except oracledb.Error as e:
+    except driver.Error as e:
         print("❌ Database connection failed:", e)
         return None
 
-def fetch_cursor(query, params=None):
-    """Execute a SELECT query and return results"""
-    conn = get_connection()
+def create_pool(min=None, max=None, increment=None, ping_interval=None, driver=None):
+    """Create (or replace) the shared session pool used by fetch_cursor and call_procedure"""
+    global _driver
+    if driver is not None:
+        _driver = driver
+    init_driver()
+    with _pool_lock:
+        _close_pool()
+        return _create_pool(min, max, increment, ping_interval)
+
+def _create_pool(min=None, max=None, increment=None, ping_interval=None):
+    global _pool
+    started = time.perf_counter()
+    _pool = _driver.create_pool(
+        user=DB_USER,
+        password=DB_PASS,
+        dsn=DB_DSN,
+        min=POOL_MIN if min is None else min,
+        max=POOL_MAX if max is None else max,
+        increment=POOL_INCREMENT if increment is None else increment,
+        ping_interval=POOL_PING_INTERVAL if ping_interval is None else ping_interval
+    )
+    startup_log.phase("pool created", started)
+    return _pool
+
+def get_pool():
+    """Return the shared session pool, creating it on first use"""
+    if _pool is not None:
+        return _pool
+    # Outside the try below: until init_driver() succeeds _driver may still be None
+    try:
+        init_driver()
+    except Exception as e:
+        # oracledb or python-dotenv missing, or the Oracle client failed to initialise
+        print("❌ Database driver could not be loaded:", e)
+        return None
+    try:
+        # Warm-up and the first query can race here; only one of them may build the pool
+        with _pool_lock:
+            return _pool if _pool is not None else _create_pool()
+    except _driver.Error as e:
+        print("❌ Connection pool creation failed:", e)
+        return None
+
+def warm_up():
+    """Initialise the driver, build the pool and open a first session; True if the database answered"""
+    if _pool is not None:
+        return True
+    started = time.perf_counter()
+    conn = acquire_connection()
+    if conn is None:
+        return False
+    release_connection(conn)
+    startup_log.phase("first connection", started)
+    return True
+
+def close_pool():
+    """Close the shared session pool; safe to call more than once"""
+    with _pool_lock:
+        _close_pool()
+
+def _close_pool():
+    global _pool
+    if _pool is not None:
+        try:
+            _pool.close(force=True)
+        except _driver.Error as e:
+            print("❌ Connection pool close failed:", e)
+        _pool = None
+
+atexit.register(close_pool)
+
+def acquire_connection():
+    """Borrow a connection from the pool, or None if the database is unreachable"""
+    pool = get_pool()
+    if pool is None:
+        return None
+    try:
+        return pool.acquire()
+    except _driver.Error as e:
+        print("❌ Database connection failed:", e)
+        return None
+
+def release_connection(conn):
+    """Return a borrowed connection to the pool"""
+    try:
+        conn.close()
+    except _driver.Error:
+        pass
+
+def fetch_cursor(query, params=None, cache=False, max_rows=None, handle=None):
+    """Execute a SELECT query and return results; cache=True serves repeats from query_cache
+
+    max_rows stops after that many rows; handle (a CancelHandle) lets another thread cancel
+    the statement, which then returns the driver's cancel error as a string.
+    """
+    if not cache or max_rows is not None:
+        return _fetch_all(query, params, max_rows, handle)
+    key = QueryCache.make_key(query, params)
+    rows = query_cache.get(key)
+    if rows is None:
+        tables = query_tables(query)
+        generation = query_cache.generation(tables)
+        rows = _fetch_all(query, params)
+        if not isinstance(rows, str):
+            query_cache.put(key, rows, tables, generation)
+    return rows
+
+def _fetch_all(query, params=None, max_rows=None, handle=None):
+    timer = query_stats.start()
+    conn = acquire_connection()
+    if timer:
+        timer.lap("connect")
     if conn is None:
+        query_stats.finish(timer, query, error=True)
         return "Connection failed"
+    if handle is not None and not handle.attach(conn.cancel):
+        release_connection(conn)
+        query_stats.finish(timer, query, error=True)
+        return "Cancelled"
+    rows, round_trips = None, 1
     try:
-        cursor = conn.cursor()
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
-        rows = cursor.fetchall()
+        with conn.cursor() as cursor:
+            if max_rows:
+                cursor.arraysize = cursor.prefetchrows = max_rows
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            if timer:
+                timer.lap("execute")
+            rows = cursor.fetchmany(max_rows) if max_rows else cursor.fetchall()
+            if timer:
+                timer.lap("fetch")
+                round_trips = estimate_round_trips(len(rows), cursor.arraysize, cursor.prefetchrows)
         return rows
-    except oracledb.Error as e:
+    except _driver.Error as e:
         return str(e)
     finally:
-        cursor.close()
-        conn.close()
+        if handle is not None:
+            handle.detach()
+        release_connection(conn)
+        if timer:
+            query_stats.finish(timer, query, len(rows or ()), round_trips, error=rows is None)
+
+def stream_cursor(query, params=None, arraysize=None, prefetchrows=None, batches=False):
+    """Execute a SELECT query and yield rows (or lists of rows if batches=True) via fetchmany"""
+    timer = query_stats.start()
+    conn = acquire_connection()
+    if timer:
+        timer.lap("connect")
+    if conn is None:
+        query_stats.finish(timer, query, error=True)
+        raise ConnectionFailed("Connection failed")
+    count, round_trips, error = 0, 1, False
+    try:
+        with conn.cursor() as cursor:
+            cursor.arraysize = arraysize or STREAM_ARRAYSIZE
+            # One extra prefetched row lets a single-batch result finish without another round trip
+            cursor.prefetchrows = cursor.arraysize + 1 if prefetchrows is None else prefetchrows
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            if timer:
+                timer.lap("execute")
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                if timer:
+                    # Time spent in the consumer between batches is not charged to the query
+                    timer.lap("fetch")
+                    count += len(rows)
+                if batches:
+                    yield rows
+                else:
+                    yield from rows
+                if timer:
+                    timer.resume()
+            if timer:
+                timer.lap("fetch")
+                round_trips = estimate_round_trips(count, cursor.arraysize, cursor.prefetchrows)
+    except _driver.Error as e:
+        error = True
+        raise QueryFailed(str(e)) from e
+    finally:
+        release_connection(conn)
+        if timer:
+            query_stats.finish(timer, query, count, round_trips, error)
 
 def call_procedure(proc_name, params=None):
     """Call a stored procedure with parameters"""
-    conn = get_connection()
+    timer = query_stats.start()
+    conn = acquire_connection()
+    if timer:
+        timer.lap("connect")
     if conn is None:
+        query_stats.finish(timer, f"CALL {proc_name}", error=True)
         return False, "Connection failed"
+    ok = False
     try:
-        cursor = conn.cursor()
-        if params:
-            cursor.callproc(proc_name, params)
-        else:
-            cursor.callproc(proc_name)
+        with conn.cursor() as cursor:
+            if params:
+                cursor.callproc(proc_name, params)
+            else:
+                cursor.callproc(proc_name)
         conn.commit()
+        ok = True
+        invalidate_for_procedure(proc_name)
         return True, "Success"
-    except oracledb.Error as e:
+    except _driver.Error as e:
         return False, str(e)
     finally:
-        cursor.close()
-        conn.close()
+        release_connection(conn)
+        if timer:
+            # The call and its commit are two round trips
+            timer.lap("execute")
+            query_stats.finish(timer, f"CALL {proc_name}", round_trips=2, error=not ok)
+
+def call_procedure_many(proc_name, param_rows, chunk_size=None, progress=None):
+    """Call a stored procedure once per parameter row, array-bound in chunks; returns a BulkResult"""
+    result = BulkResult(len(param_rows))
+    if not param_rows:
+        return result
+    conn = acquire_connection()
+    if conn is None:
+        raise ConnectionFailed("Connection failed")
+    binds = ", ".join(f":{i}" for i in range(1, len(param_rows[0]) + 1))
+    block = f"BEGIN {proc_name}({binds}); END;"
+    chunk_size = chunk_size or BULK_CHUNK_SIZE
+    timer, round_trips = query_stats.start(), 0
+    try:
+        with conn.cursor() as cursor:
+            for start in range(0, len(param_rows), chunk_size):
+                chunk = param_rows[start:start + chunk_size]
+                try:
+                    round_trips += 2
+                    cursor.executemany(block, chunk)
+                    conn.commit()
+                    result.succeeded += len(chunk)
+                except _driver.Error:
+                    # PL/SQL executemany stops at the first bad row; redo this chunk singly to isolate failures
+                    conn.rollback()
+                    for params in chunk:
+                        round_trips += 2
+                        try:
+                            cursor.execute(block, params)
+                            conn.commit()
+                            result.succeeded += 1
+                        except _driver.Error as e:
+                            conn.rollback()
+                            result.failures.append((params, str(e)))
+                if progress:
+                    progress(start + len(chunk), len(param_rows))
+    finally:
+        release_connection(conn)
+        invalidate_for_procedure(proc_name)
+        result.elapsed = time.perf_counter() - result.started
+        if timer:
+            timer.lap("execute")
+            query_stats.finish(timer, block, result.succeeded, round_trips, error=bool(result.failures))
+    return result
+
+def execute_many(statement, param_rows, tables, chunk_size=None, progress=None, require_rows=False):
+    """Run a DML statement for every parameter row with executemany(batcherrors=True); returns a BulkResult
+
+    With require_rows=True, parameter rows whose statement matched no row count as failures.
+    """
+    result = BulkResult(len(param_rows))
+    if not param_rows:
+        return result
+    conn = acquire_connection()
+    if conn is None:
+        raise ConnectionFailed("Connection failed")
+    chunk_size = chunk_size or BULK_CHUNK_SIZE
+    timer, round_trips = query_stats.start(), 0
+    try:
+        with conn.cursor() as cursor:
+            for start in range(0, len(param_rows), chunk_size):
+                chunk = param_rows[start:start + chunk_size]
+                round_trips += 2
+                cursor.executemany(statement, chunk, batcherrors=True, arraydmlrowcounts=require_rows)
+                errors = cursor.getbatcherrors()
+                failed = {error.offset for error in errors}
+                for error in errors:
+                    result.failures.append((chunk[error.offset], error.message))
+                if require_rows:
+                    for offset, count in enumerate(cursor.getarraydmlrowcounts()):
+                        if not count and offset not in failed:
+                            failed.add(offset)
+                            result.failures.append((chunk[offset], "no matching row"))
+                conn.commit()
+                result.succeeded += len(chunk) - len(failed)
+                if progress:
+                    progress(start + len(chunk), len(param_rows))
+    except _driver.Error as e:
+        raise QueryFailed(str(e)) from e
+    finally:
+        release_connection(conn)
+        query_cache.invalidate(tables)
+        result.elapsed = time.perf_counter() - result.started
+        if timer:
+            timer.lap("execute")
+            query_stats.finish(timer, statement, result.succeeded, round_trips, error=bool(result.failures))
+    return result
+
+def invalidate_for_procedure(proc_name):
+    """Drop cached results made stale by a committed stored procedure call"""
+    # Unknown procedures may write anything, so they flush the whole cache
+    query_cache.invalidate(PROCEDURE_TABLES.get(proc_name.upper()))
 
 if __name__ == "__main__":
     # Quick test
-    conn = get_connection()
+    conn = acquire_connection()
     if conn:
         print("✅ Connected successfully to Oracle")
-        conn.close()
+        release_connection(conn)
     else:
-        print("❌ Connection failed")
\ No newline at end of file
+        print("❌ Connection failed")
+    close_pool()
\ No newline at end of file
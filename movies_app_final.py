@@ -1,23 +1,257 @@
 # main.py
+import os
 import sys
+import time
+import threading
+import statistics
+from collections import deque
+from instrumentation import startup_log
+from datetime import datetime
+from functools import partial
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout,
-    QTableWidget, QTableWidgetItem, QTabWidget, QTextEdit, QFormLayout,
-    QMessageBox, QHBoxLayout, QHeaderView, QSpacerItem, QSizePolicy
+    QTableView, QTabWidget, QTextEdit, QFormLayout,
+    QMessageBox, QHBoxLayout, QHeaderView, QSpacerItem, QSizePolicy,
+    QDoubleSpinBox, QSpinBox, QGroupBox, QProgressBar, QAbstractItemView, QCheckBox, QFileDialog, QProgressDialog
 )
 from PyQt5.QtGui import QFont
-from PyQt5.QtCore import Qt
-from db import fetch_cursor, call_procedure
+from PyQt5.QtCore import Qt, QTimer
+# db defers python-dotenv and oracledb to init_driver(), which warm_up() runs in the background
+from db import (
+    fetch_cursor, stream_cursor, call_procedure, call_procedure_many, execute_many,
+    query_cache, query_tables, query_stats, warm_up, CancelHandle, DatabaseError
+)
+from workers import QueryExecutor
+from catalog_snapshot import fetch_catalog, search_catalog, sync_from_pool
+from table_models import KeysetTableModel, ColumnarTableModel
+from passwords import verify_password, needs_rehash, hash_password
+from panel_queries import (
+    LOGIN_QUERY, LOGIN_CREDENTIALS_QUERY, REHASH_PASSWORD_SQL, MY_REVIEWS_QUERY, ALL_MOVIES_QUERY, TOP_MOVIES_QUERY,
+    ADMIN_USERS_QUERY, ADMIN_MOVIES_QUERY, ADMIN_REVIEWS_QUERY, MOVIE_RATINGS_QUERY
+)
+
+startup_log.phase("modules imported")
+
+LOADING_SUFFIX = " (loading...)"
+
+# Admin tabs over the rarely changing catalog tables; loads read the local catalog snapshot
+# (the query cache before its first sync) and Refresh pulls the latest changes first
+CACHED_ADMIN_TABS = ("Movies",)
+
+# Shared, user-independent data LoginPage fetches while it is open and hands to the panel
+PREFETCH_QUERIES = (TOP_MOVIES_QUERY, MOVIE_RATINGS_QUERY)
+# Prefetched from the local catalog snapshot once its startup sync has finished
+CATALOG_PREFETCH_QUERIES = (ALL_MOVIES_QUERY,)
+
+# All Movies search box: pause in typing before a query runs, and the most matches shown
+SEARCH_DEBOUNCE_MS = 150
+MAX_SEARCH_ROWS = 500
+
+# Rows shown in the "Because You Rated" tab
+MAX_RECOMMENDATIONS = 50
+
+# Columns of the admin Diagnostics tab, as (header, query_stats report key)
+DIAGNOSTIC_COLUMNS = [
+    ("Statement", "statement"), ("Calls", "calls"), ("Errors", "errors"), ("Rows", "rows"),
+    ("Round Trips", "round_trips"), ("Connect ms", "connect_ms"), ("Execute ms", "execute_ms"),
+    ("Fetch ms", "fetch_ms"), ("p50 ms", "p50_ms"), ("p95 ms", "p95_ms"), ("p99 ms", "p99_ms"),
+    ("Max ms", "max_ms"),
+]
+
+# Upper bound on ids accepted by one bulk moderation request
+MAX_BULK_IDS = 1000000
+MAX_LISTED_FAILURES = 10
+
+# Admin tabs fed by a single read of the per-movie averages; Top Rated is filtered client-side
+RATING_TABS = ("Average Ratings", "Top Rated Movies")
+# Cached login profiles are dropped whenever these tables are written
+PROFILE_TABLES = query_tables(LOGIN_QUERY)
+
+# Admin tabs with an Export button; each is a dataset in export.EXPORT_DATASETS
+EXPORT_TABS = ("Users", "Movies", "Reviews", "Average Ratings")
+
+
+def make_table(headers, tooltip_columns=()):
+    """QTableView over a ColumnarTableModel; cells are formatted only when painted"""
+    table = QTableView()
+    table.setModel(ColumnarTableModel(headers, tooltip_columns, parent=table))
+    return table
+
+
+def populate_table(table, rows):
+    """Replace a table's contents with query rows"""
+    table.model().set_rows(rows)
+
+
+def append_rows(table, rows):
+    """Append a batch of query rows to a table"""
+    table.model().append_rows(rows)
+
+
+def rounded_ratings(rows):
+    """MOVIE_RATINGS_QUERY rows with the average rounded to 2 places for display"""
+    return [(title, movie_id, None if average is None else round(average, 2)) for title, movie_id, average in rows]
+
+
+def fetch_recommendations(user_id, limit):
+    """recommendations.recommendations_for, imported on first use so startup skips numpy and scipy"""
+    from recommendations import recommendations_for
+    return recommendations_for(user_id, limit)
+
+
+def fetch_analytics(refresh=False):
+    """analytics.analytics_reports, imported on first use for the same reason"""
+    from analytics import analytics_reports
+    return analytics_reports(refresh)
+
+
+def start_export(panel, dataset, path, params=None):
+    """Stream export.export_dataset to path on panel's executor behind a cancellable progress dialog"""
+    from export import export_dataset
+    stop = threading.Event()
+    panel.export_stops.add(stop)
+    name = os.path.basename(path)
+    dialog = QProgressDialog(f"Exporting {dataset} to {name}...", "Cancel", 0, 0, panel)
+    dialog.setWindowTitle("Export")
+    dialog.setMinimumDuration(0)
+    dialog.setAutoReset(False)
+    dialog.canceled.connect(stop.set)
+
+    def on_progress(done, total):
+        if total:
+            dialog.setMaximum(total)
+            dialog.setValue(min(done, total))
+        of_total = f" of {total:,}" if total else ""
+        dialog.setLabelText(f"Exporting {dataset} to {name}: {done:,}{of_total} rows written")
+
+    def on_result(result):
+        if result.cancelled:
+            QMessageBox.information(panel, "Export", f"Export cancelled after {result.rows} rows; {name} was removed")
+        else:
+            QMessageBox.information(panel, "Export", f"{dataset} written to {path}\n{result.summary()}")
+
+    def on_done():
+        panel.export_stops.discard(stop)
+        dialog.close()
+        dialog.deleteLater()
+
+    panel.executor.submit(
+        export_dataset, dataset, path, params, count=True, stop=stop,
+        on_progress=on_progress, on_result=on_result,
+        on_error=lambda message: QMessageBox.warning(panel, "Error", f"Export failed: {message}"),
+        on_done=on_done
+    )
+
+
+def export_file_dialog(panel, dataset, default_name):
+    """Ask where to export dataset; the chosen extension picks the format"""
+    from export import FILE_FILTER
+    path, _ = QFileDialog.getSaveFileName(panel, f"Export {dataset}", default_name, FILE_FILTER)
+    return path
+
+
+def parse_id_list(text):
+    """Parse '1-100, 205, 300-310' into a sorted list of unique ids; raises ValueError"""
+    ids = set()
+    for part in text.replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        low, sep, high = part.partition("-")
+        if not low.strip().isdigit() or (sep and not high.strip().isdigit()):
+            raise ValueError(f"'{part}' is not an id or a range like 10-20")
+        low = int(low)
+        high = int(high) if sep else low
+        if high < low:
+            raise ValueError(f"bad range {part}")
+        # Checked before expanding, so a huge range never gets built
+        if len(ids) + high - low + 1 > MAX_BULK_IDS:
+            raise ValueError(f"more than {MAX_BULK_IDS} ids")
+        ids.update(range(low, high + 1))
+    return sorted(ids)
+
+
+def find_review_ids(query, params):
+    """Resolve a review filter to the matching REVIEW_IDs; runs on a worker thread"""
+    return [row[0] for batch in stream_cursor(query, params, batches=True) for row in batch]
+
+
+def set_tab_loading(tabs, tab, loading):
+    """Show or clear the loading marker in a tab's title"""
+    idx = tabs.indexOf(tab)
+    if idx < 0:
+        return
+    title = tabs.tabText(idx).replace(LOADING_SUFFIX, "")
+    tabs.setTabText(idx, title + LOADING_SUFFIX if loading else title)
+
+
+def authenticate(user_id, password):
+    """Return (name, is_admin) for valid credentials, None otherwise; runs on a worker thread
+
+    Resolved profiles are kept in query_cache, tagged USER_TABLE, so MODIFY_USER, DELETE_USER
+    and bulk admin changes drop them. Only (name, is_admin) is cached, and only after a
+    successful verify; the credentials themselves are read fresh on every login.
+    """
+    key = ("PROFILE", user_id)
+    generation = query_cache.generation(PROFILE_TABLES)
+    profile = query_cache.get(key)
+    result = fetch_cursor(LOGIN_QUERY if profile is None else LOGIN_CREDENTIALS_QUERY, [user_id])
+    if isinstance(result, str):
+        raise RuntimeError(result)
+    if not result:
+        return None
+    *fields, password_hash, plaintext = result[0]
+    stored = password_hash or plaintext
+    if not verify_password(password, stored):
+        return None
+    if profile is None:
+        profile = tuple(fields)
+        query_cache.put(key, profile, PROFILE_TABLES, generation)
+    if needs_rehash(stored):
+        # Upgrades plaintext rows and hashes made before PASSWORD_HASH_ITERATIONS was raised.
+        # The profile is unchanged, so no cached result is invalidated
+        try:
+            execute_many(REHASH_PASSWORD_SQL, [(hash_password(password), user_id)], tables=())
+        except DatabaseError as e:
+            print(f"⚠️ Could not upgrade the password hash of user {user_id}: {e}")
+    return profile
 
 
 # ---------------- LOGIN PAGE ----------------
 class LoginPage(QWidget):
     def __init__(self):
         super().__init__()
+        self.executor = QueryExecutor(self)
         self.setWindowTitle("MovieApp Login")
         self.setGeometry(400, 200, 350, 250)
+        self.login_started = None
+        self.prefetched = {}  # query -> rows
         self.initUI()
         self.apply_styles()
+        # Connect while the user types; runs once the window is up, not before it
+        QTimer.singleShot(0, self.start_warm_up)
+
+    def start_warm_up(self):
+        self.executor.submit(
+            warm_up, key="warm_up",
+            on_result=lambda ok: None if ok else print("❌ Database warm-up failed; login will retry"),
+            on_error=lambda message: print("❌ Database warm-up failed:", message)
+        )
+        # Only catalog rows changed since the last session are downloaded
+        self.executor.submit(
+            sync_from_pool, key="catalog_sync",
+            on_done=lambda: self.prefetch(CATALOG_PREFETCH_QUERIES, fetch_catalog)
+        )
+        self.prefetch(PREFETCH_QUERIES, partial(fetch_cursor, cache=True))
+
+    def prefetch(self, queries, fetch):
+        # Queued behind the warm-up; the panels query again for anything not back by login
+        for query in queries:
+            self.executor.submit(
+                fetch, query, key=("prefetch", query),
+                on_result=lambda rows, query=query: self.prefetched.__setitem__(query, rows),
+                on_error=lambda message: print("⚠️ Prefetch failed; the panel will load it itself:", message)
+            )
 
     def initUI(self):
         layout = QFormLayout()
@@ -71,20 +305,29 @@ class LoginPage(QWidget):
             self.show_error("User ID must be a number!")
             return
 
-        query = "SELECT NAME, ADMIN FROM USER_TABLE WHERE USER_ID = :id AND TRIM(PASSWORD) = :pwd"
-        result = fetch_cursor(query, [int(user_id), password])
-
-        if isinstance(result, str) or len(result) == 0:
+        # Hash verification is deliberately slow, so keep it off the GUI thread
+        self.login_btn.setEnabled(False)
+        self.login_started = time.perf_counter()
+        self.executor.submit(
+            authenticate, int(user_id), password, key="login",
+            on_result=lambda profile: self.open_panel(int(user_id), profile),
+            on_error=lambda message: self.show_error(f"Login failed: {message}"),
+            on_done=lambda: self.login_btn.setEnabled(True)
+        )
+
+    def open_panel(self, user_id, profile):
+        if profile is None:
             self.show_error("Invalid credentials!")
             return
 
-        name, is_admin = result[0]
+        name, is_admin = profile
         if is_admin.upper() == 'Y':
-            self.admin_panel = AdminPanel(name)
+            self.admin_panel = AdminPanel(name, self.prefetched)
             self.admin_panel.showMaximized()
         else:
-            self.user_panel = UserPanel(int(user_id), name)
+            self.user_panel = UserPanel(user_id, name, self.prefetched)
             self.user_panel.showMaximized()
+        startup_log.phase("panel shown", self.login_started)
         self.close()
 
     def show_error(self, message):
@@ -93,11 +336,24 @@ class LoginPage(QWidget):
 
 # ---------------- USER PANEL ----------------
 class UserPanel(QWidget):
-    def __init__(self, user_id, username):
+    def __init__(self, user_id, username, prefetched=None):
         super().__init__()
         self.user_id = user_id
         self.username = username
+        self.prefetched = dict(prefetched or {})
+        self.executor = QueryExecutor(self)
         self.setWindowTitle(f"User Panel - {username}")
+        # Search-as-you-type: a query runs once typing pauses, and the next keystroke cancels it
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.run_movie_search)
+        self.search_handle = None
+        self.search_typed_at = None
+        self.search_latencies = deque(maxlen=100)  # keystroke-to-render, ms
+        self.export_stops = set()  # one threading.Event per running export
+        # Recommendations need numpy/scipy and a pass over REVIEW, so they load on first view
+        self.recommendations_loaded = False
         self.initUI()
         self.apply_styles()
 
@@ -126,9 +382,14 @@ class UserPanel(QWidget):
         # My Reviews tab
         self.reviews_tab = QWidget()
         reviews_layout = QVBoxLayout()
-        self.review_table = QTableWidget()
-        self.review_table.setColumnCount(4)
-        self.review_table.setHorizontalHeaderLabels(["Review ID", "Movie ID", "Rating", "Text"])
+        self.review_model = KeysetTableModel(
+            self.executor, MY_REVIEWS_QUERY,
+            ["Review ID", "Movie ID", "Rating", "Text"],
+            params={"id": self.user_id}, parent=self
+        )
+        self.review_model.loadingChanged.connect(lambda loading: set_tab_loading(self.tabs, self.reviews_tab, loading))
+        self.review_table = QTableView()
+        self.review_table.setModel(self.review_model)
         self.review_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.review_table.setAlternatingRowColors(True)
         self.review_table.setStyleSheet("alternate-background-color: #e6f2ff; background-color: #ffffff;")
@@ -169,9 +430,19 @@ class UserPanel(QWidget):
         # All Movies tab
         self.all_movies_tab = QWidget()
         all_layout = QVBoxLayout()
-        self.all_movies_table = QTableWidget()
-        self.all_movies_table.setColumnCount(4)
-        self.all_movies_table.setHorizontalHeaderLabels(["Movie ID", "Title", "Director ID", "Genre ID"])
+        search_layout = QHBoxLayout()
+        self.movie_search_input = QLineEdit()
+        self.movie_search_input.setPlaceholderText("Search by title, director, genre or actor")
+        self.movie_search_input.setClearButtonEnabled(True)
+        self.movie_search_input.textChanged.connect(self.on_movie_search_typed)
+        self.movie_search_status = QLabel("")
+        search_layout.addWidget(self.movie_search_input)
+        search_layout.addWidget(self.movie_search_status)
+        self.export_search_btn = QPushButton("Export...")
+        self.export_search_btn.clicked.connect(self.export_movie_search)
+        search_layout.addWidget(self.export_search_btn)
+        all_layout.addLayout(search_layout)
+        self.all_movies_table = make_table(["Movie ID", "Title", "Director", "Genre", "Actor"])
         self.all_movies_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         all_layout.addWidget(self.all_movies_table)
         self.all_movies_tab.setLayout(all_layout)
@@ -180,14 +451,24 @@ class UserPanel(QWidget):
         # Top Rated Movies tab
         self.top_movies_tab = QWidget()
         top_layout = QVBoxLayout()
-        self.top_movies_table = QTableWidget()
-        self.top_movies_table.setColumnCount(2)
-        self.top_movies_table.setHorizontalHeaderLabels(["Title", "Avg Rating"])
+        self.top_movies_table = make_table(["Title", "Avg Rating"])
         self.top_movies_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         top_layout.addWidget(self.top_movies_table)
         self.top_movies_tab.setLayout(top_layout)
         self.tabs.addTab(self.top_movies_tab, "Top Rated Movies")
 
+        # Because You Rated tab
+        self.recommendations_tab = QWidget()
+        recommendations_layout = QVBoxLayout()
+        self.recommendations_status = QLabel("")
+        recommendations_layout.addWidget(self.recommendations_status)
+        self.recommendations_table = make_table(["Because You Rated", "Recommended", "Similarity"])
+        self.recommendations_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        recommendations_layout.addWidget(self.recommendations_table)
+        self.recommendations_tab.setLayout(recommendations_layout)
+        self.tabs.addTab(self.recommendations_tab, "Because You Rated")
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+
         layout.addWidget(self.tabs)
         self.setLayout(layout)
 
@@ -209,15 +490,21 @@ class UserPanel(QWidget):
         """)
 
     # -------------------- USER FUNCTIONS --------------------
-    def load_reviews(self):
-        query = "SELECT REVIEW_ID, MOVIE_ID, RATING, REVIEW_TEXT FROM REVIEW WHERE USER_ID = :id"
-        result = fetch_cursor(query, [self.user_id])
-        if isinstance(result, str):
+    def load_into_table(self, key, tab, table, query, params=None, cache=False, fetch=None):
+        rows = None if params else self.prefetched.pop(query, None)
+        if rows is not None:
+            # Handed over by LoginPage; later reloads go to the database
+            populate_table(table, rows)
             return
-        self.review_table.setRowCount(len(result))
-        for r_idx, row in enumerate(result):
-            for c_idx, val in enumerate(row):
-                self.review_table.setItem(r_idx, c_idx, QTableWidgetItem(str(val)))
+        set_tab_loading(self.tabs, tab, True)
+        self.executor.submit(
+            fetch or partial(fetch_cursor, cache=cache), query, params, key=key,
+            on_result=lambda rows: populate_table(table, rows),
+            on_done=lambda: set_tab_loading(self.tabs, tab, False)
+        )
+
+    def load_reviews(self):
+        self.review_model.reload()
 
     def add_review(self):
         movie_id = self.movie_id_input_add.text().strip()
@@ -248,6 +535,7 @@ class UserPanel(QWidget):
             self.rating_input_add.clear()
             self.review_text_input_add.clear()
             self.load_reviews()
+            self.record_review(int(movie_id), rating_val)
         else:
             QMessageBox.warning(self, "Error", f"Failed: {msg}")
 
@@ -272,6 +560,7 @@ class UserPanel(QWidget):
         if success:
             QMessageBox.information(self, "Success", "Review updated successfully!")
             self.load_reviews()
+            self.record_review(int(movie_id), rating_val)
             self.movie_id_input_edit.clear()
             self.rating_input_edit.clear()
             self.review_text_input_edit.clear()
@@ -279,30 +568,101 @@ class UserPanel(QWidget):
             QMessageBox.warning(self, "Error", f"Failed: {msg}")
 
     def load_all_movies(self):
-        query = "SELECT MOVIE_ID, TITLE, DIRECTOR_ID, GENRE_ID FROM MOVIE"
-        result = fetch_cursor(query)
-        if isinstance(result, str):
+        # Served from the local catalog snapshot
+        self.load_into_table("all_movies", self.all_movies_tab, self.all_movies_table, ALL_MOVIES_QUERY,
+                             fetch=fetch_catalog)
+
+    def on_movie_search_typed(self, _text):
+        self.search_typed_at = time.perf_counter()
+        self.cancel_movie_search()
+        self.search_timer.start()
+
+    def cancel_movie_search(self):
+        if self.search_handle is not None:
+            # Drop the task too, or its interrupt error would reach on_error as "Search failed"
+            self.executor.cancel("all_movies")
+            self.search_handle.cancel()
+            self.search_handle = None
+
+    def run_movie_search(self):
+        text = self.movie_search_input.text().strip()
+        if not text:
+            self.movie_search_status.clear()
+            self.load_all_movies()
             return
-        self.all_movies_table.setRowCount(len(result))
-        for r_idx, row in enumerate(result):
-            for c_idx, val in enumerate(row):
-                self.all_movies_table.setItem(r_idx, c_idx, QTableWidgetItem(str(val)))
+        typed_at = self.search_typed_at
+        self.search_handle = CancelHandle()
+        # Same key as load_all_movies, so only the newest list or search result is rendered
+        self.executor.submit(
+            search_catalog, text, max_rows=MAX_SEARCH_ROWS, handle=self.search_handle, key="all_movies",
+            on_result=lambda rows: self.show_movie_search(rows, typed_at),
+            on_error=lambda message: self.movie_search_status.setText(f"Search failed: {message}")
+        )
+
+    def show_movie_search(self, rows, typed_at):
+        if isinstance(rows, str):
+            self.movie_search_status.setText(f"Search failed: {rows}")
+            return
+        populate_table(self.all_movies_table, rows)
+        # Paint now so the measured latency includes rendering
+        self.all_movies_table.viewport().repaint()
+        latency = (time.perf_counter() - typed_at) * 1000
+        self.search_latencies.append(latency)
+        more = "+" if len(rows) == MAX_SEARCH_ROWS else ""
+        self.movie_search_status.setText(
+            f"{len(rows)}{more} matches - {latency:.0f} ms from keystroke "
+            f"(median {statistics.median(self.search_latencies):.0f} ms)"
+        )
+
+    def export_movie_search(self):
+        # Exports every match, not just the MAX_SEARCH_ROWS shown
+        from export import search_params
+        path = export_file_dialog(self, "Movie Search", "movies.csv")
+        if path:
+            start_export(self, "Movie Search", path, search_params(self.movie_search_input.text()))
 
     def load_top_movies(self):
-        query = """
-            SELECT m.TITLE, ROUND(AVG(r.RATING), 2)
-            FROM MOVIE m
-            JOIN REVIEW r ON m.MOVIE_ID = r.MOVIE_ID
-            GROUP BY m.TITLE
-            HAVING AVG(r.RATING) >= 4.5
-        """
-        result = fetch_cursor(query)
-        if isinstance(result, str):
+        self.load_into_table("top_movies", self.top_movies_tab, self.top_movies_table, TOP_MOVIES_QUERY, cache=True)
+
+    def on_tab_changed(self, index):
+        if self.tabs.widget(index) is self.recommendations_tab and not self.recommendations_loaded:
+            self.load_recommendations()
+
+    def load_recommendations(self):
+        self.recommendations_loaded = True
+        set_tab_loading(self.tabs, self.recommendations_tab, True)
+        if not self.recommendations_table.model().rowCount():
+            self.recommendations_status.setText("Building recommendations from all reviews...")
+        self.executor.submit(
+            fetch_recommendations, self.user_id, MAX_RECOMMENDATIONS, key="recommendations",
+            on_result=self.show_recommendations,
+            on_error=lambda message: self.recommendations_status.setText(f"Recommendations failed: {message}"),
+            on_done=lambda: set_tab_loading(self.tabs, self.recommendations_tab, False)
+        )
+
+    def show_recommendations(self, result):
+        rows, lookup_ms = result
+        populate_table(self.recommendations_table, rows)
+        if rows:
+            self.recommendations_status.setText(f"{len(rows)} recommendations - looked up in {lookup_ms:.2f} ms")
+        else:
+            self.recommendations_status.setText("Rate a few movies to get recommendations")
+
+    def record_review(self, movie_id, rating):
+        """Fold a saved review into the recommendations once they have been built"""
+        if not self.recommendations_loaded:
             return
-        self.top_movies_table.setRowCount(len(result))
-        for r_idx, row in enumerate(result):
-            for c_idx, val in enumerate(row):
-                self.top_movies_table.setItem(r_idx, c_idx, QTableWidgetItem(str(val)))
+        from recommendations import record_review
+        # No key: every update must run, and the tab refreshes after each one
+        self.executor.submit(record_review, self.user_id, movie_id, rating, on_done=self.load_recommendations)
+
+    def closeEvent(self, event):
+        self.search_timer.stop()
+        self.cancel_movie_search()
+        for stop in self.export_stops:
+            stop.set()
+        self.executor.cancel_all()
+        super().closeEvent(event)
 
     def logout(self):
         self.close()
@@ -312,9 +672,16 @@ class UserPanel(QWidget):
 
 # ------------------- ADMIN PANEL -------------------
 class AdminPanel(QWidget):
-    def __init__(self, username):
+    def __init__(self, username, prefetched=None):
         super().__init__()
         self.username = username
+        self.prefetched = dict(prefetched or {})
+        self.executor = QueryExecutor(self)
+        self.tab_queries = {}
+        self.tab_models = {}
+        self.tab_loaded_at = {}
+        self.rating_rows = []
+        self.export_stops = set()  # one threading.Event per running export
         self.setWindowTitle(f"Admin Panel - {username}")
         self.initUI()
         self.apply_styles()
@@ -339,7 +706,7 @@ class AdminPanel(QWidget):
         self.tabs = QTabWidget()
         tab_names = [
             "Users", "Movies", "Reviews", "Average Ratings",
-            "Top Rated Movies", "Delete/Modify User", "Delete Review"
+            "Top Rated Movies", "Analytics", "Delete/Modify User", "Delete Review", "Diagnostics"
         ]
         for name in tab_names:
             self.tabs.addTab(self.create_tab(name), name)
@@ -347,6 +714,10 @@ class AdminPanel(QWidget):
         layout.addWidget(self.tabs)
         self.setLayout(layout)
 
+        # Query tabs load the first time they are shown, not at login
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+        self.on_tab_changed(self.tabs.currentIndex())
+
     def create_tab(self, name):
         tab = QWidget()
         layout = QVBoxLayout()
@@ -365,7 +736,31 @@ class AdminPanel(QWidget):
             form_layout.addRow("New Name:", self.user_name_input)
             form_layout.addRow("Admin (Y/N):", self.user_admin_input)
             form_layout.addRow(delete_btn, modify_btn)
-            tab.setLayout(form_layout)
+            layout.addLayout(form_layout)
+
+            bulk_box = QGroupBox("Bulk moderation")
+            bulk_layout = QFormLayout()
+            self.bulk_user_ids_input = QLineEdit()
+            self.bulk_user_ids_input.setPlaceholderText("e.g. 12, 40-95, 130")
+            self.bulk_admin_input = QLineEdit()
+            use_selected_btn = QPushButton("Use Rows Selected in Users Tab")
+            use_selected_btn.clicked.connect(self.use_selected_users)
+            bulk_delete_btn = QPushButton("Delete Users")
+            bulk_admin_btn = QPushButton("Set Admin Flag")
+            bulk_delete_btn.clicked.connect(self.bulk_delete_users)
+            bulk_admin_btn.clicked.connect(self.bulk_set_admin)
+            self.user_bulk_progress = QProgressBar()
+            self.user_bulk_result = QLabel("")
+            bulk_layout.addRow("User IDs / ranges:", self.bulk_user_ids_input)
+            bulk_layout.addRow("", use_selected_btn)
+            bulk_layout.addRow("Admin (Y/N):", self.bulk_admin_input)
+            bulk_layout.addRow(bulk_delete_btn, bulk_admin_btn)
+            bulk_layout.addRow(self.user_bulk_progress)
+            bulk_layout.addRow(self.user_bulk_result)
+            bulk_box.setLayout(bulk_layout)
+            layout.addWidget(bulk_box)
+            layout.addStretch()
+            tab.setLayout(layout)
             return tab
 
         if name == "Delete Review":
@@ -375,57 +770,330 @@ class AdminPanel(QWidget):
             delete_review_btn.clicked.connect(self.delete_review)
             form_layout.addRow("Review ID:", self.review_id_input)
             form_layout.addWidget(delete_review_btn)
-            tab.setLayout(form_layout)
+            layout.addLayout(form_layout)
+
+            bulk_box = QGroupBox("Bulk moderation")
+            bulk_layout = QFormLayout()
+            self.bulk_review_ids_input = QLineEdit()
+            self.bulk_review_ids_input.setPlaceholderText("e.g. 1001-2500, 2710")
+            use_selected_btn = QPushButton("Use Rows Selected in Reviews Tab")
+            use_selected_btn.clicked.connect(self.use_selected_reviews)
+            bulk_delete_btn = QPushButton("Delete Listed Reviews")
+            bulk_delete_btn.clicked.connect(self.bulk_delete_reviews)
+            bulk_layout.addRow("Review IDs / ranges:", self.bulk_review_ids_input)
+            bulk_layout.addRow(use_selected_btn, bulk_delete_btn)
+
+            self.filter_user_input = QLineEdit()
+            self.filter_from_input = QLineEdit()
+            self.filter_to_input = QLineEdit()
+            self.filter_from_input.setPlaceholderText("YYYY-MM-DD")
+            self.filter_to_input.setPlaceholderText("YYYY-MM-DD")
+            self.filter_min_rating_input = QLineEdit()
+            self.filter_max_rating_input = QLineEdit()
+            filter_delete_btn = QPushButton("Delete Reviews Matching Filter")
+            filter_delete_btn.clicked.connect(self.bulk_delete_filtered_reviews)
+            bulk_layout.addRow("Filter - User ID:", self.filter_user_input)
+            bulk_layout.addRow("Filter - From date:", self.filter_from_input)
+            bulk_layout.addRow("Filter - To date:", self.filter_to_input)
+            bulk_layout.addRow("Filter - Min rating:", self.filter_min_rating_input)
+            bulk_layout.addRow("Filter - Max rating:", self.filter_max_rating_input)
+            bulk_layout.addRow(filter_delete_btn)
+
+            self.review_bulk_progress = QProgressBar()
+            self.review_bulk_result = QLabel("")
+            bulk_layout.addRow(self.review_bulk_progress)
+            bulk_layout.addRow(self.review_bulk_result)
+            bulk_box.setLayout(bulk_layout)
+            layout.addWidget(bulk_box)
+            layout.addStretch()
+            tab.setLayout(layout)
+            return tab
+
+        if name == "Diagnostics":
+            controls = QHBoxLayout()
+            self.instrument_checkbox = QCheckBox("Record statement timings")
+            self.instrument_checkbox.setChecked(query_stats.enabled)
+            self.instrument_checkbox.toggled.connect(self.set_instrumentation)
+            refresh_btn = QPushButton("Refresh")
+            reset_btn = QPushButton("Reset")
+            export_btn = QPushButton("Export JSON")
+            refresh_btn.clicked.connect(self.refresh_diagnostics)
+            reset_btn.clicked.connect(self.reset_diagnostics)
+            export_btn.clicked.connect(self.export_diagnostics)
+            controls.addWidget(self.instrument_checkbox)
+            controls.addItem(QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum))
+            for btn in (refresh_btn, reset_btn, export_btn):
+                controls.addWidget(btn)
+            layout.addLayout(controls)
+            self.cache_stats_label = QLabel("")
+            layout.addWidget(self.cache_stats_label)
+            self.diagnostics_table = make_table([header for header, _ in DIAGNOSTIC_COLUMNS], tooltip_columns=(0,))
+            self.diagnostics_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+            self.diagnostics_table.setSortingEnabled(True)
+            layout.addWidget(self.diagnostics_table)
+            self.diagnostics_tab = tab
+            tab.setLayout(layout)
+            return tab
+
+        if name == "Analytics":
+            controls = QHBoxLayout()
+            self.analytics_status = QLabel("Not loaded yet")
+            refresh_btn = QPushButton("Refresh")
+            refresh_btn.clicked.connect(lambda: self.load_analytics(refresh=True))
+            controls.addWidget(self.analytics_status)
+            controls.addItem(QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum))
+            controls.addWidget(refresh_btn)
+            layout.addLayout(controls)
+            # One sub-tab per report, added when the first results arrive with their headers
+            self.analytics_reports = QTabWidget()
+            self.analytics_tables = {}
+            layout.addWidget(self.analytics_reports)
+            self.analytics_tab = tab
+            tab.setLayout(layout)
             return tab
 
         # Table-based tabs
-        table = QTableWidget()
-        table.setAlternatingRowColors(True)
-        table.setStyleSheet("alternate-background-color: #fff0e6; background-color: #ffffff;")
-        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        layout.addWidget(table)
+        status_layout = QHBoxLayout()
+        status_label = QLabel("Not loaded yet")
+        refresh_btn = QPushButton("Refresh")
+        refresh_btn.clicked.connect(lambda: self.load_tab(name, refresh=True))
+        status_layout.addWidget(status_label)
+        status_layout.addItem(QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum))
+        status_layout.addWidget(refresh_btn)
+        if name in EXPORT_TABS:
+            export_btn = QPushButton("Export...")
+            export_btn.clicked.connect(lambda: self.export_tab(name))
+            status_layout.addWidget(export_btn)
+        layout.addLayout(status_layout)
+
+        if name == "Top Rated Movies":
+            filter_layout = QHBoxLayout()
+            self.top_threshold_input = QDoubleSpinBox()
+            self.top_threshold_input.setRange(0, 5)
+            self.top_threshold_input.setSingleStep(0.1)
+            self.top_threshold_input.setValue(4.5)
+            self.top_n_input = QSpinBox()
+            self.top_n_input.setRange(0, 1000000)
+            self.top_n_input.setSpecialValueText("All")
+            self.top_threshold_input.valueChanged.connect(self.apply_top_rated_filter)
+            self.top_n_input.valueChanged.connect(self.apply_top_rated_filter)
+            filter_layout.addWidget(QLabel("Min average:"))
+            filter_layout.addWidget(self.top_threshold_input)
+            filter_layout.addWidget(QLabel("Show top:"))
+            filter_layout.addWidget(self.top_n_input)
+            filter_layout.addItem(QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum))
+            layout.addLayout(filter_layout)
 
         query, headers = None, []
         if name == "Users":
-            query = "SELECT USER_ID, NAME, ADMIN FROM USER_TABLE"
+            query = ADMIN_USERS_QUERY
             headers = ["User ID", "Name", "Admin"]
         elif name == "Movies":
-            query = "SELECT MOVIE_ID, TITLE, RELEASE_YEAR, DURATION FROM MOVIE"
+            query = ADMIN_MOVIES_QUERY
             headers = ["Movie ID", "Title", "Release Year", "Duration"]
-        elif name == "Reviews":
-            query = "SELECT REVIEW_ID, MOVIE_ID, USER_ID, RATING, REVIEW_TEXT FROM REVIEW"
-            headers = ["Review ID", "Movie ID", "User ID", "Rating", "Text"]
-        elif name == "Average Ratings":
-            query = """
-                SELECT m.TITLE, r.MOVIE_ID, ROUND(AVG(r.RATING), 2)
-                FROM REVIEW r
-                JOIN MOVIE m ON r.MOVIE_ID = m.MOVIE_ID
-                GROUP BY m.TITLE, r.MOVIE_ID
-            """
-            headers = ["Title", "Movie ID", "Average Rating"]
-        elif name == "Top Rated Movies":
-            query = """
-                SELECT m.TITLE, r.MOVIE_ID, ROUND(AVG(r.RATING), 2)
-                FROM REVIEW r
-                JOIN MOVIE m ON r.MOVIE_ID = m.MOVIE_ID
-                GROUP BY m.TITLE, r.MOVIE_ID
-                HAVING AVG(r.RATING) >= 4.5
-            """
+        elif name in RATING_TABS:
+            query = MOVIE_RATINGS_QUERY
             headers = ["Title", "Movie ID", "Average Rating"]
 
+        if name == "Reviews":
+            # Paged by REVIEW_ID as the admin scrolls instead of loading the whole table
+            model = KeysetTableModel(
+                self.executor, ADMIN_REVIEWS_QUERY,
+                ["Review ID", "Movie ID", "User ID", "Rating", "Text"],
+                parent=self
+            )
+            table = QTableView()
+            table.setModel(model)
+            model.loadingChanged.connect(lambda loading: set_tab_loading(self.tabs, tab, loading))
+            model.pageLoaded.connect(lambda count: self.tab_page_loaded(name, count))
+            model.loadFailed.connect(lambda message: status_label.setText(f"Load failed: {message}"))
+            self.tab_models[name] = (tab, model, status_label)
+            self.reviews_view = table
+        else:
+            table = make_table(headers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.setAlternatingRowColors(True)
+        table.setStyleSheet("alternate-background-color: #fff0e6; background-color: #ffffff;")
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(table)
+
         if query:
-            result = fetch_cursor(query)
-            if not isinstance(result, str):
-                table.setColumnCount(len(result[0]) if result else len(headers))
-                table.setHorizontalHeaderLabels(headers)
-                table.setRowCount(len(result))
-                for r_idx, row in enumerate(result):
-                    for c_idx, val in enumerate(row):
-                        table.setItem(r_idx, c_idx, QTableWidgetItem(str(val)))
+            self.tab_queries[name] = (tab, table, query, status_label)
 
         tab.setLayout(layout)
         return tab
 
+    def on_tab_changed(self, index):
+        widget = self.tabs.widget(index)
+        if widget is self.diagnostics_tab:
+            self.refresh_diagnostics()
+            return
+        if widget is self.analytics_tab:
+            if "Analytics" not in self.tab_loaded_at:
+                self.load_analytics()
+            return
+        for name, entry in list(self.tab_queries.items()) + list(self.tab_models.items()):
+            if entry[0] is widget and name not in self.tab_loaded_at:
+                self.load_tab(name)
+                return
+
+    def load_tab(self, name, refresh=False):
+        # Mark as requested so switching back to the tab does not queue it again
+        self.tab_loaded_at.setdefault(name, None)
+        if name in self.tab_models:
+            self.tab_loaded_at[name] = None
+            self.tab_models[name][1].reload()
+            return
+
+        if name in RATING_TABS:
+            self.load_ratings(refresh)
+            return
+
+        tab, table, query, status_label = self.tab_queries[name]
+        set_tab_loading(self.tabs, tab, True)
+        table.model().clear()
+        started_at = datetime.now()
+
+        # Rows arrive in fetchmany() batches, so the table fills while the query is still streaming
+        def on_batch(rows):
+            append_rows(table, rows)
+            status_label.setText(f"{table.model().rowCount()} rows so far...")
+
+        def on_result(_):
+            self.tab_loaded_at[name] = started_at
+            status_label.setText(f"{table.model().rowCount()} rows - last loaded {started_at:%H:%M:%S}")
+
+        def on_error(message):
+            status_label.setText(f"Load failed: {message}")
+            if self.tab_loaded_at.get(name) is None:
+                self.tab_loaded_at.pop(name, None)
+
+        if name in CACHED_ADMIN_TABS:
+            if refresh:
+                query_cache.invalidate(query_tables(query))
+
+            def on_rows(rows):
+                populate_table(table, rows)
+                on_result(rows)
+
+            self.executor.submit(
+                fetch_catalog, query, refresh=refresh, key=name,
+                on_result=on_rows, on_error=on_error,
+                on_done=lambda: set_tab_loading(self.tabs, tab, False)
+            )
+            return
+
+        self.executor.stream(
+            stream_cursor, query, batches=True, key=name,
+            on_batch=on_batch, on_result=on_result, on_error=on_error,
+            on_done=lambda: set_tab_loading(self.tabs, tab, False)
+        )
+
+    def load_ratings(self, refresh=False):
+        """Read the per-movie averages once and fill both rating tabs from the result"""
+        _, avg_table, query, avg_status = self.tab_queries["Average Ratings"]
+        for name in RATING_TABS:
+            self.tab_loaded_at.setdefault(name, None)
+            set_tab_loading(self.tabs, self.tab_queries[name][0], True)
+        if refresh:
+            query_cache.invalidate(query_tables(query))
+
+        def on_rows(rows):
+            loaded_at = datetime.now()
+            self.rating_rows = rows
+            for name in RATING_TABS:
+                self.tab_loaded_at[name] = loaded_at
+            populate_table(avg_table, rounded_ratings(rows))
+            avg_status.setText(f"{len(rows)} rows - last loaded {loaded_at:%H:%M:%S}")
+            self.apply_top_rated_filter()
+
+        def on_error(message):
+            for name in RATING_TABS:
+                self.tab_queries[name][3].setText(f"Load failed: {message}")
+                if self.tab_loaded_at.get(name) is None:
+                    self.tab_loaded_at.pop(name, None)
+
+        def on_done():
+            for name in RATING_TABS:
+                set_tab_loading(self.tabs, self.tab_queries[name][0], False)
+
+        rows = None if refresh else self.prefetched.pop(query, None)
+        if rows is not None:
+            on_rows(rows)
+            on_done()
+            return
+        self.executor.submit(
+            fetch_cursor, query, cache=True, key="ratings",
+            on_result=on_rows, on_error=on_error, on_done=on_done
+        )
+
+    def apply_top_rated_filter(self):
+        """Re-filter the loaded averages by the threshold and top-N controls without querying"""
+        _, table, _, status_label = self.tab_queries["Top Rated Movies"]
+        loaded_at = self.tab_loaded_at.get("Top Rated Movies")
+        if loaded_at is None:
+            return
+        threshold = self.top_threshold_input.value()
+        rows = sorted(
+            (row for row in self.rating_rows if row[2] is not None and row[2] >= threshold),
+            key=lambda row: row[2], reverse=True
+        )
+        if self.top_n_input.value():
+            rows = rows[:self.top_n_input.value()]
+        populate_table(table, rounded_ratings(rows))
+        status_label.setText(f"{len(rows)} of {len(self.rating_rows)} movies - last loaded {loaded_at:%H:%M:%S}")
+
+    def tab_page_loaded(self, name, count):
+        _, model, status_label = self.tab_models[name]
+        if self.tab_loaded_at.get(name) is None:
+            self.tab_loaded_at[name] = datetime.now()
+        more = f" (first {model.max_rows}; export for the rest)" if model.truncated else \
+            "" if model.exhausted else " (scroll for more)"
+        status_label.setText(f"{count} rows{more} - last loaded {self.tab_loaded_at[name]:%H:%M:%S}")
+
+    def load_analytics(self, refresh=False):
+        """Compute every analytics report in the background; refresh re-reads the reviews first"""
+        self.tab_loaded_at.setdefault("Analytics", None)
+        set_tab_loading(self.tabs, self.analytics_tab, True)
+        first = self.tab_loaded_at["Analytics"] is None
+        self.analytics_status.setText("Reading reviews..." if refresh or first else "Computing reports...")
+
+        def on_error(message):
+            self.analytics_status.setText(f"Analytics failed: {message}")
+            if self.tab_loaded_at.get("Analytics") is None:
+                self.tab_loaded_at.pop("Analytics", None)
+
+        self.executor.submit(
+            fetch_analytics, refresh, key="Analytics",
+            on_result=self.show_analytics, on_error=on_error,
+            on_done=lambda: set_tab_loading(self.tabs, self.analytics_tab, False)
+        )
+
+    def show_analytics(self, result):
+        reports, timings, count, load_seconds = result
+        for name, headers, rows in reports:
+            table = self.analytics_tables.get(name)
+            if table is None:
+                table = make_table(headers)
+                table.setAlternatingRowColors(True)
+                table.setStyleSheet("alternate-background-color: #fff0e6; background-color: #ffffff;")
+                table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+                self.analytics_reports.addTab(table, name)
+                self.analytics_tables[name] = table
+            populate_table(table, rows)
+        loaded_at = datetime.now()
+        self.tab_loaded_at["Analytics"] = loaded_at
+        read = f", reviews read in {load_seconds:.1f}s" if load_seconds else ""
+        self.analytics_status.setText(
+            f"{count} reviews - {len(reports)} reports in {timings['total']:.0f} ms{read} - last loaded {loaded_at:%H:%M:%S}"
+        )
+
+    def export_tab(self, name):
+        """Stream the whole dataset behind a tab to a file, whatever has been loaded into it"""
+        path = export_file_dialog(self, name, name.lower().replace(" ", "_") + ".csv")
+        if path:
+            start_export(self, name, path)
+
     # Admin actions
     def delete_user(self):
         user_id = self.user_id_input.text()
@@ -471,6 +1139,158 @@ class AdminPanel(QWidget):
         else:
             QMessageBox.warning(self, "Error", f"Failed: {msg}")
 
+    # Diagnostics
+    def set_instrumentation(self, enabled):
+        query_stats.enabled = enabled
+        self.refresh_diagnostics()
+
+    def refresh_diagnostics(self):
+        cache = query_cache.stats()
+        self.cache_stats_label.setText(
+            f"Query cache: {cache['entries']} entries, {cache['hits']} hits, {cache['misses']} misses, "
+            f"{cache['evictions']} evictions, {cache['invalidations']} invalidations"
+        )
+        reports = query_stats.snapshot()
+        table = self.diagnostics_table
+        # The model keeps the raw numbers, so column sorting stays numeric
+        populate_table(table, [[report[field] for _, field in DIAGNOSTIC_COLUMNS] for report in reports])
+        header = table.horizontalHeader()
+        table.sortByColumn(header.sortIndicatorSection(), header.sortIndicatorOrder())
+
+    def reset_diagnostics(self):
+        query_stats.reset()
+        self.refresh_diagnostics()
+
+    def export_diagnostics(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Diagnostics", "query_stats.json", "JSON (*.json)")
+        if not path:
+            return
+        try:
+            query_stats.export_json(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Export failed: {e}")
+            return
+        QMessageBox.information(self, "Success", f"Diagnostics written to {path}")
+
+    # Bulk moderation
+    def use_selected_users(self):
+        table = self.tab_queries["Users"][1]
+        rows = sorted({index.row() for index in table.selectionModel().selectedRows()})
+        self.bulk_user_ids_input.setText(", ".join(str(table.model().row_key(row)) for row in rows))
+
+    def use_selected_reviews(self):
+        model = self.tab_models["Reviews"][1]
+        rows = sorted({index.row() for index in self.reviews_view.selectionModel().selectedRows()})
+        self.bulk_review_ids_input.setText(", ".join(str(model.row_key(row)) for row in rows))
+
+    def read_bulk_ids(self, line_edit):
+        try:
+            ids = parse_id_list(line_edit.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", f"Invalid ID list: {e}")
+            return None
+        if not ids:
+            QMessageBox.warning(self, "Error", "Enter IDs or ranges, or use the selected rows!")
+            return None
+        return ids
+
+    def bulk_delete_users(self):
+        ids = self.read_bulk_ids(self.bulk_user_ids_input)
+        if ids:
+            self.run_bulk("Delete users", partial(call_procedure_many, "DELETE_USER"), [[i] for i in ids],
+                          self.user_bulk_progress, self.user_bulk_result, ("Users", "Reviews") + RATING_TABS)
+
+    def bulk_set_admin(self):
+        ids = self.read_bulk_ids(self.bulk_user_ids_input)
+        admin = self.bulk_admin_input.text().strip().upper()
+        if ids is None:
+            return
+        if admin not in ['Y', 'N']:
+            QMessageBox.warning(self, "Error", "Admin must be Y or N!")
+            return
+        # Only the flag changes, so plain array DML replaces one MODIFY_USER call per user
+        func = partial(execute_many, "UPDATE USER_TABLE SET ADMIN = :1 WHERE USER_ID = :2", tables=("USER_TABLE",),
+                       require_rows=True)
+        self.run_bulk(f"Set admin={admin}", func, [[admin, i] for i in ids],
+                      self.user_bulk_progress, self.user_bulk_result, ("Users",))
+
+    def bulk_delete_reviews(self):
+        ids = self.read_bulk_ids(self.bulk_review_ids_input)
+        if ids:
+            self.delete_reviews_bulk(ids)
+
+    def bulk_delete_filtered_reviews(self):
+        query, params = "SELECT REVIEW_ID FROM REVIEW WHERE 1=1", {}
+        try:
+            if self.filter_user_input.text().strip():
+                params["user_id"] = int(self.filter_user_input.text())
+                query += " AND USER_ID = :user_id"
+            if self.filter_from_input.text().strip():
+                params["from_date"] = datetime.strptime(self.filter_from_input.text().strip(), "%Y-%m-%d")
+                query += " AND REVIEW_DATE >= :from_date"
+            if self.filter_to_input.text().strip():
+                params["to_date"] = datetime.strptime(self.filter_to_input.text().strip(), "%Y-%m-%d")
+                query += " AND REVIEW_DATE < :to_date + 1"
+            if self.filter_min_rating_input.text().strip():
+                params["min_rating"] = float(self.filter_min_rating_input.text())
+                query += " AND RATING >= :min_rating"
+            if self.filter_max_rating_input.text().strip():
+                params["max_rating"] = float(self.filter_max_rating_input.text())
+                query += " AND RATING <= :max_rating"
+        except ValueError:
+            QMessageBox.warning(self, "Error", "User ID and ratings must be numbers, dates YYYY-MM-DD!")
+            return
+        if not params:
+            QMessageBox.warning(self, "Error", "Enter at least one filter!")
+            return
+        # Same cap as typed id lists; one extra row tells us the filter matched more than that
+        params["max_ids"] = MAX_BULK_IDS + 1
+        self.review_bulk_result.setText("Finding matching reviews...")
+        self.executor.submit(
+            find_review_ids, query + " ORDER BY REVIEW_ID FETCH FIRST :max_ids ROWS ONLY", params, key="review_filter",
+            on_result=self.delete_reviews_bulk,
+            on_error=lambda message: self.review_bulk_result.setText(f"Failed: {message}")
+        )
+
+    def delete_reviews_bulk(self, ids):
+        if not ids:
+            self.review_bulk_result.setText("No matching reviews.")
+            return
+        if len(ids) > MAX_BULK_IDS:
+            self.review_bulk_result.setText(f"More than {MAX_BULK_IDS} reviews match; narrow the filter.")
+            return
+        self.run_bulk("Delete reviews", partial(call_procedure_many, "DELETE_REVIEW"), [[i] for i in ids],
+                      self.review_bulk_progress, self.review_bulk_result, ("Reviews",) + RATING_TABS)
+
+    def run_bulk(self, label, func, rows, progress_bar, result_label, stale_tabs):
+        """Confirm, then run a bulk call on a worker with progress and a failure report"""
+        answer = QMessageBox.question(self, "Confirm", f"{label}: apply to {len(rows)} row(s)?",
+                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if answer != QMessageBox.Yes:
+            result_label.setText("")
+            return
+        progress_bar.setRange(0, len(rows))
+        progress_bar.setValue(0)
+        result_label.setText(f"{label}: running...")
+
+        def on_result(result):
+            result_label.setText(f"{label}: {result.summary()}")
+            if result.failures:
+                lines = [f"{params}: {message}" for params, message in result.failures[:MAX_LISTED_FAILURES]]
+                if len(result.failures) > MAX_LISTED_FAILURES:
+                    lines.append(f"... {len(result.failures) - MAX_LISTED_FAILURES} more")
+                QMessageBox.warning(self, "Some rows failed", "\n".join(lines))
+            for name in stale_tabs:
+                if self.tab_loaded_at.get(name):
+                    self.load_tab(name, refresh=True)
+
+        self.executor.submit(
+            func, rows, key=label,
+            on_progress=lambda done, total: progress_bar.setValue(done),
+            on_result=on_result,
+            on_error=lambda message: result_label.setText(f"{label}: failed: {message}")
+        )
+
     def apply_styles(self):
         self.setStyleSheet("""
             QWidget { background-color: #f2f2f2; }
@@ -492,6 +1312,12 @@ class AdminPanel(QWidget):
             QPushButton:hover { background-color: #c0392b; }
         """)
 
+    def closeEvent(self, event):
+        for stop in self.export_stops:
+            stop.set()
+        self.executor.cancel_all()
+        super().closeEvent(event)
+
     def logout(self):
         self.close()
         self.login = LoginPage()
@@ -503,4 +1329,5 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     login = LoginPage()
     login.showMaximized()
+    startup_log.phase("login window shown")
     sys.exit(app.exec_())
\ No newline at end of file
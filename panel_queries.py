@@ -0,0 +1,79 @@
+# panel_queries.py
+# SQL run by the GUI panels, kept apart from the Qt code so benchmarks can run it headless
+
+# Primary-key probe only; the password is checked in Python against the salted hash
+LOGIN_QUERY = "SELECT NAME, ADMIN, PASSWORD_HASH, PASSWORD FROM USER_TABLE WHERE USER_ID = :id"
+# The same probe once the user's profile is cached; credentials are always read fresh
+LOGIN_CREDENTIALS_QUERY = "SELECT PASSWORD_HASH, PASSWORD FROM USER_TABLE WHERE USER_ID = :id"
+# Stores a fresh hash when a login finds an outdated one (plaintext or fewer iterations)
+REHASH_PASSWORD_SQL = "UPDATE USER_TABLE SET PASSWORD_HASH = :1 WHERE USER_ID = :2"
+
+# ---- USER PANEL ----
+# Keyset-paged by KeysetTableModel, which binds :last_key and :page_size
+MY_REVIEWS_QUERY = """
+    SELECT REVIEW_ID, MOVIE_ID, RATING, REVIEW_TEXT FROM REVIEW
+    WHERE USER_ID = :id AND REVIEW_ID > :last_key
+    ORDER BY REVIEW_ID
+    FETCH FIRST :page_size ROWS ONLY
+"""
+
+# Catalog tables only, so both are answered from the local catalog snapshot
+ALL_MOVIES_QUERY = """
+    SELECT m.MOVIE_ID, m.TITLE, d.DIRECTOR_NAME, g.GENRE_NAME, a.ACTOR_NAME
+    FROM MOVIE m
+    LEFT JOIN DIRECTOR d ON d.DIRECTOR_ID = m.DIRECTOR_ID
+    LEFT JOIN GENRE g ON g.GENRE_ID = m.GENRE_ID
+    LEFT JOIN ACTOR a ON a.ACTOR_ID = m.ACTOR_ID
+"""
+
+# Search-as-you-type over All Movies (see catalog_snapshot.search_catalog for the indexed path);
+# bind :pattern with movie_search_pattern(). Key order lets a short, common term stop early.
+MOVIE_SEARCH_QUERY = ALL_MOVIES_QUERY + """
+    WHERE LOWER(m.TITLE) LIKE :pattern ESCAPE '\\'
+       OR LOWER(d.DIRECTOR_NAME) LIKE :pattern ESCAPE '\\'
+       OR LOWER(g.GENRE_NAME) LIKE :pattern ESCAPE '\\'
+       OR LOWER(a.ACTOR_NAME) LIKE :pattern ESCAPE '\\'
+    ORDER BY m.MOVIE_ID
+"""
+
+
+def movie_search_pattern(text):
+    """LIKE pattern matching text anywhere, with the user's % and _ taken literally"""
+    escaped = text.strip().lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+# Averages come from the trigger-maintained MOVIE_RATING_STATS, not a scan of REVIEW
+TOP_MOVIES_QUERY = """
+    SELECT m.TITLE, ROUND(s.RATING_SUM / s.RATING_COUNT, 2)
+    FROM MOVIE_RATING_STATS s
+    JOIN MOVIE m ON m.MOVIE_ID = s.MOVIE_ID
+    WHERE s.RATING_COUNT > 0 AND s.RATING_SUM >= 4.5 * s.RATING_COUNT
+"""
+
+# ---- ADMIN PANEL ----
+ADMIN_USERS_QUERY = "SELECT USER_ID, NAME, ADMIN FROM USER_TABLE"
+
+ADMIN_MOVIES_QUERY = "SELECT MOVIE_ID, TITLE, RELEASE_YEAR, DURATION FROM MOVIE"
+
+ADMIN_REVIEWS_QUERY = """
+    SELECT REVIEW_ID, MOVIE_ID, USER_ID, RATING, REVIEW_TEXT FROM REVIEW
+    WHERE REVIEW_ID > :last_key
+    ORDER BY REVIEW_ID
+    FETCH FIRST :page_size ROWS ONLY
+"""
+
+# The whole table in key order, streamed by export.py instead of paged
+ADMIN_REVIEWS_EXPORT_QUERY = """
+    SELECT REVIEW_ID, MOVIE_ID, USER_ID, RATING, REVIEW_TEXT FROM REVIEW
+    ORDER BY REVIEW_ID
+"""
+
+# Feeds both the Average Ratings and Top Rated Movies tabs. The average is left unrounded so
+# the threshold filter compares exact values; the tabs round it for display
+MOVIE_RATINGS_QUERY = """
+    SELECT m.TITLE, s.MOVIE_ID, s.RATING_SUM / s.RATING_COUNT
+    FROM MOVIE_RATING_STATS s
+    JOIN MOVIE m ON s.MOVIE_ID = m.MOVIE_ID
+    WHERE s.RATING_COUNT > 0
+"""
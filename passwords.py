@@ -0,0 +1,86 @@
+# passwords.py
+import os
+import sys
+import hmac
+import base64
+import binascii
+import hashlib
+
+ALGORITHM = "pbkdf2_sha256"
+# Cost factor: PBKDF2 iterations for new hashes (raise over time; old hashes keep their own count)
+HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", "200000"))
+SALT_BYTES = 16
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode("ascii")
+
+
+def hash_password(password, iterations=None):
+    """Return a salted 'pbkdf2_sha256$iterations$salt$hash' string for storage"""
+    iterations = iterations or HASH_ITERATIONS
+    salt = os.urandom(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"{ALGORITHM}${iterations}${_b64(salt)}${_b64(digest)}"
+
+
+def is_hashed(stored):
+    return bool(stored) and stored.startswith(ALGORITHM + "$")
+
+
+def verify_password(password, stored):
+    """Check a password against a stored hash (or a legacy plaintext value, compared trimmed)"""
+    if not stored:
+        return False
+    if not is_hashed(stored):
+        return hmac.compare_digest(stored.strip().encode("utf-8"), password.encode("utf-8"))
+    # A corrupt stored hash fails the login rather than raising on the login worker
+    try:
+        _, iterations, salt, expected = stored.split("$")
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), base64.b64decode(salt), int(iterations))
+        return hmac.compare_digest(digest, base64.b64decode(expected))
+    except (ValueError, binascii.Error):
+        return False
+
+
+def needs_rehash(stored):
+    """True for plaintext values and hashes made with fewer iterations than HASH_ITERATIONS"""
+    if not is_hashed(stored):
+        return True
+    try:
+        return int(stored.split("$")[1]) < HASH_ITERATIONS
+    except ValueError:
+        return True
+
+
+def migrate_user_table(batch_size=500):
+    """Fill USER_TABLE.PASSWORD_HASH for every row that still only has a plaintext PASSWORD
+
+    Each batch is committed on its own, so an interrupted run keeps its progress; running
+    it again picks up the rows that still have no PASSWORD_HASH.
+    """
+    from db import stream_cursor, acquire_connection, release_connection
+    rows = stream_cursor(
+        "SELECT USER_ID, PASSWORD FROM USER_TABLE WHERE PASSWORD_HASH IS NULL", batches=True, arraysize=batch_size
+    )
+    conn = acquire_connection()
+    if conn is None:
+        return 0
+    migrated = 0
+    try:
+        with conn.cursor() as cursor:
+            for batch in rows:
+                updates = [(hash_password((password or "").strip()), user_id) for user_id, password in batch]
+                cursor.executemany("UPDATE USER_TABLE SET PASSWORD_HASH = :1 WHERE USER_ID = :2", updates)
+                conn.commit()
+                migrated += len(updates)
+    finally:
+        release_connection(conn)
+    return migrated
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["migrate"]:
+        print("Usage: python passwords.py migrate")
+        sys.exit(2)
+    print(f"✅ Hashed passwords for {migrate_user_table()} user(s)")
\ No newline at end of file
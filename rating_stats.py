@@ -0,0 +1,58 @@
+# rating_stats.py
+import sys
+from db import fetch_cursor, call_procedure
+
+# Rows where MOVIE_RATING_STATS disagrees with a fresh aggregate over REVIEW
+DRIFT_QUERY = """
+    SELECT NVL(s.MOVIE_ID, a.MOVIE_ID),
+           NVL(s.RATING_COUNT, 0), NVL(a.RATING_COUNT, 0),
+           NVL(s.RATING_SUM, 0), NVL(a.RATING_SUM, 0)
+    FROM MOVIE_RATING_STATS s
+    FULL OUTER JOIN (
+        SELECT MOVIE_ID, COUNT(RATING) AS RATING_COUNT, SUM(RATING) AS RATING_SUM,
+               SUM(RATING * RATING) AS RATING_SUMSQ
+        FROM REVIEW
+        WHERE RATING IS NOT NULL
+        GROUP BY MOVIE_ID
+    ) a ON s.MOVIE_ID = a.MOVIE_ID
+    WHERE NVL(s.RATING_COUNT, 0) <> NVL(a.RATING_COUNT, 0)
+       OR NVL(s.RATING_SUM, 0) <> NVL(a.RATING_SUM, 0)
+       OR NVL(s.RATING_SUMSQ, 0) <> NVL(a.RATING_SUMSQ, 0)
+    ORDER BY 1
+"""
+
+
+def verify():
+    """Return (movie_id, stored_count, actual_count, stored_sum, actual_sum) for every drifted movie"""
+    result = fetch_cursor(DRIFT_QUERY)
+    if isinstance(result, str):
+        raise RuntimeError(result)
+    return result
+
+
+def rebuild():
+    """Recompute MOVIE_RATING_STATS from REVIEW"""
+    return call_procedure("REBUILD_MOVIE_RATING_STATS")
+
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else "verify"
+    if command == "verify":
+        drift = verify()
+        if not drift:
+            print("✅ MOVIE_RATING_STATS matches REVIEW")
+            return 0
+        print(f"❌ {len(drift)} movie(s) out of sync:")
+        for movie_id, stored_count, count, stored_sum, total in drift:
+            print(f"  movie {movie_id}: count {stored_count} vs {count}, sum {stored_sum} vs {total}")
+        return 1
+    if command == "rebuild":
+        success, msg = rebuild()
+        print("✅ MOVIE_RATING_STATS rebuilt" if success else f"❌ Rebuild failed: {msg}")
+        return 0 if success else 1
+    print("Usage: python rating_stats.py [verify|rebuild]")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
\ No newline at end of file
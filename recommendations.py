@@ -0,0 +1,330 @@
+# recommendations.py
+"""Item-item "Because you rated X" recommendations over the REVIEW matrix
+
+REVIEW(USER_ID, MOVIE_ID, RATING) is loaded into a sparse users x movies matrix and the
+cosine similarity between every pair of movie columns is computed in dense batches of
+BATCH_CELLS, keeping the TOP_K most similar movies per movie. Looking up recommendations
+for a user only reads those neighbour tables, so it takes microseconds. When a review is
+added or edited, update() recomputes the one changed similarity row and patches it into
+the other movies' neighbour lists instead of rebuilding everything.
+
+    python recommendations.py --movies 20000 --users 100000 --reviews 2000000
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+import warnings
+import numpy as np
+from scipy import sparse
+
+RATINGS_QUERY = "SELECT USER_ID, MOVIE_ID, RATING, REVIEW_ID FROM REVIEW WHERE RATING IS NOT NULL"
+TITLES_QUERY = "SELECT MOVIE_ID, TITLE FROM MOVIE"
+
+TOP_K = int(os.getenv("RECOMMEND_TOP_K", "20"))
+# Dense similarity cells computed per batch in build() (float32, so 4 bytes each)
+BATCH_CELLS = 4000000
+# How many of the user's highest-rated movies seed "Because you rated X"
+SEED_MOVIES = 5
+LOAD_ARRAYSIZE = 10000
+
+
+def _index(ids, new_ids):
+    """Positions of new_ids in the sorted unique array ids"""
+    return np.searchsorted(ids, new_ids).astype(np.int32)
+
+
+class Recommender:
+    """Top-K item-item cosine neighbours plus the ratings needed to look them up"""
+
+    def __init__(self, top_k=TOP_K):
+        self.top_k = top_k
+        self.user_ids = np.empty(0, dtype=np.int64)
+        self.movie_ids = np.empty(0, dtype=np.int64)
+        self.by_user = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.by_movie = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.norms = np.empty(0, dtype=np.float32)
+        self.neighbors = np.empty((0, top_k), dtype=np.int32)
+        self.scores = np.empty((0, top_k), dtype=np.float32)
+        self.titles = {}
+        self.built = False
+        self.lock = threading.Lock()
+
+    # ---- LOADING ----
+    def load(self, rows):
+        """Build the rating matrices from (user_id, movie_id, rating[, review_id]) rows or batches of them
+
+        A user who reviewed a movie more than once is represented by their latest review (the
+        highest review_id, else the last row), the same rule update() applies.
+        """
+        chunks = [np.asarray(batch, dtype=np.float64) for batch in _batched(rows)]
+        data = np.concatenate(chunks) if chunks else np.empty((0, 3))
+        users, movies = data[:, 0].astype(np.int64), data[:, 1].astype(np.int64)
+        sequence = data[:, 3] if data.shape[1] > 3 else np.arange(len(data))
+        order = np.lexsort((sequence, movies, users))
+        users, movies, ratings = users[order], movies[order], data[order, 2]
+        latest = np.ones(len(order), dtype=bool)
+        latest[:-1] = (users[1:] != users[:-1]) | (movies[1:] != movies[:-1])
+        users, movies, ratings = users[latest], movies[latest], ratings[latest]
+        self.user_ids, self.movie_ids = np.unique(users), np.unique(movies)
+        shape = (len(self.user_ids), len(self.movie_ids))
+        coords = (_index(self.user_ids, users), _index(self.movie_ids, movies))
+        self.by_user = sparse.csr_matrix((ratings.astype(np.float32), coords), shape=shape)
+        self.by_movie = self.by_user.T.tocsr()
+        self.norms = np.sqrt(np.asarray(self.by_movie.multiply(self.by_movie).sum(axis=1)).ravel()).astype(np.float32)
+        return len(data)
+
+    def load_titles(self, rows):
+        self.titles = {int(movie_id): title for movie_id, title in rows}
+
+    # ---- BUILDING ----
+    def build(self):
+        """Compute every movie's TOP_K neighbours, BATCH_CELLS similarity cells at a time"""
+        count = len(self.movie_ids)
+        k = self.top_k
+        self.neighbors = np.full((count, k), -1, dtype=np.int32)
+        self.scores = np.zeros((count, k), dtype=np.float32)
+        if count:
+            inverse = np.divide(1, self.norms, out=np.zeros_like(self.norms), where=self.norms > 0)
+            unit = sparse.diags(inverse) @ self.by_movie
+            unit_t = unit.T.tocsc()
+            step = max(1, BATCH_CELLS // count)
+            for start in range(0, count, step):
+                stop = min(start + step, count)
+                sims = (unit[start:stop] @ unit_t).toarray()
+                sims[np.arange(stop - start), np.arange(start, stop)] = 0
+                self.neighbors[start:stop], self.scores[start:stop] = self._top_k(sims)
+        self.built = True
+
+    def _top_k(self, sims):
+        """(neighbours, scores) of the k largest positive similarities in each row, best first"""
+        k = min(self.top_k, sims.shape[1])
+        if k < sims.shape[1]:
+            top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(k), (len(sims), k))
+        values = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-values, axis=1, kind="stable")
+        top, values = np.take_along_axis(top, order, axis=1), np.take_along_axis(values, order, axis=1)
+        neighbors = np.full((len(sims), self.top_k), -1, dtype=np.int32)
+        scores = np.zeros((len(sims), self.top_k), dtype=np.float32)
+        neighbors[:, :k] = np.where(values > 0, top, -1)
+        scores[:, :k] = np.where(values > 0, values, 0)
+        return neighbors, scores
+
+    # ---- INCREMENTAL UPDATES ----
+    def update(self, user_id, movie_id, rating):
+        """Apply one added or edited review without rebuilding; its rating replaces the user's previous one
+
+        The changed movie's similarity row is recomputed exactly; other movies only swap it
+        into or out of their lists, so a neighbour that falls behind one they had dropped
+        keeps its place until the next build().
+        """
+        with self.lock:
+            u, m = self._ensure(user_id, movie_id)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", sparse.SparseEfficiencyWarning)
+                self.by_user[u, m] = rating
+                self.by_movie[m, u] = rating
+            column = self.by_movie[m]
+            self.norms[m] = np.sqrt(column.data @ column.data)
+            if not self.built:
+                return
+            dots = np.asarray(self.by_user[column.indices].T @ column.data).ravel()
+            denominator = self.norms * self.norms[m]
+            sims = np.divide(dots, denominator, out=np.zeros_like(dots), where=denominator > 0).astype(np.float32)
+            sims[m] = 0
+            self.neighbors[m], self.scores[m] = (row[0] for row in self._top_k(sims[None, :]))
+            self._patch_neighbors(m, sims)
+
+    def _ensure(self, user_id, movie_id):
+        """Matrix positions of user_id and movie_id, growing the matrices for new ones"""
+        u = int(np.searchsorted(self.user_ids, user_id))
+        if u == len(self.user_ids) or self.user_ids[u] != user_id:
+            self.user_ids = np.insert(self.user_ids, u, user_id)
+            self.by_user = _insert_row(self.by_user, u)
+            self.by_movie = _insert_column(self.by_movie, u)
+        m = int(np.searchsorted(self.movie_ids, movie_id))
+        if m == len(self.movie_ids) or self.movie_ids[m] != movie_id:
+            self.movie_ids = np.insert(self.movie_ids, m, movie_id)
+            self.by_movie = _insert_row(self.by_movie, m)
+            self.by_user = _insert_column(self.by_user, m)
+            self.norms = np.insert(self.norms, m, 0)
+            if self.built:
+                # Neighbour positions after the new movie move up by one
+                self.neighbors[self.neighbors >= m] += 1
+                self.neighbors = np.insert(self.neighbors, m, -1, axis=0)
+                self.scores = np.insert(self.scores, m, 0, axis=0)
+        return u, m
+
+    def _patch_neighbors(self, m, sims):
+        """Move movie m into, within or out of every other movie's neighbour list"""
+        holds = self.neighbors == m
+        rows_with, slots = np.nonzero(holds)
+        self.scores[rows_with, slots] = sims[rows_with]
+        self.neighbors[rows_with, slots] = np.where(sims[rows_with] > 0, m, -1)
+        # Movies without m take it in place of their weakest neighbour when it now beats that one
+        weakest = np.argmin(np.where(self.neighbors >= 0, self.scores, -1), axis=1)
+        weakest_scores = np.where(self.neighbors[np.arange(len(sims)), weakest] >= 0,
+                                  self.scores[np.arange(len(sims)), weakest], 0)
+        gains = np.nonzero(~holds.any(axis=1) & (sims > weakest_scores))[0]
+        self.neighbors[gains, weakest[gains]] = m
+        self.scores[gains, weakest[gains]] = sims[gains]
+        changed = np.union1d(rows_with, gains)
+        if len(changed):
+            order = np.argsort(-self.scores[changed], axis=1, kind="stable")
+            self.neighbors[changed] = np.take_along_axis(self.neighbors[changed], order, axis=1)
+            self.scores[changed] = np.take_along_axis(self.scores[changed], order, axis=1)
+
+    # ---- LOOKUP ----
+    def recommend(self, user_id, seeds=SEED_MOVIES, limit=None):
+        """[(because_movie_id, movie_id, similarity)] for the user's highest-rated movies, best first
+
+        Movies the user has already rated are left out and each movie is recommended once,
+        for the seed it is most similar to.
+        """
+        # update() grows and re-sorts these arrays on another worker thread
+        with self.lock:
+            return self._recommend(user_id, seeds, limit)
+
+    def _recommend(self, user_id, seeds, limit):
+        u = int(np.searchsorted(self.user_ids, user_id))
+        if not self.built or u == len(self.user_ids) or self.user_ids[u] != user_id:
+            return []
+        row = self.by_user[u]
+        rated, ratings = row.indices, row.data
+        seed_idx = rated[np.argsort(-ratings, kind="stable")[:seeds]]
+        neighbors = self.neighbors[seed_idx].ravel()
+        scores = self.scores[seed_idx].ravel()
+        because = np.repeat(seed_idx, self.top_k)
+        keep = (neighbors >= 0) & ~np.isin(neighbors, rated)
+        neighbors, scores, because = neighbors[keep], scores[keep], because[keep]
+        order = np.argsort(-scores, kind="stable")
+        _, first = np.unique(neighbors[order], return_index=True)
+        picked = order[np.sort(first)][:limit]
+        return list(zip(self.movie_ids[because[picked]].tolist(), self.movie_ids[neighbors[picked]].tolist(),
+                        scores[picked].tolist()))
+
+    def title(self, movie_id):
+        return self.titles.get(movie_id, f"Movie {movie_id}")
+
+
+def _batched(rows):
+    """Yield lists of rows from either rows or batches of rows"""
+    batch = []
+    for item in rows:
+        if item and isinstance(item[0], (list, tuple)):
+            yield item
+            continue
+        batch.append(item)
+        if len(batch) >= LOAD_ARRAYSIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert_row(matrix, position):
+    """Copy of a CSR matrix with an empty row inserted before position"""
+    indptr = np.insert(matrix.indptr, position, matrix.indptr[position])
+    return sparse.csr_matrix((matrix.data, matrix.indices, indptr), shape=(matrix.shape[0] + 1, matrix.shape[1]))
+
+
+def _insert_column(matrix, position):
+    """Copy of a CSR matrix with an empty column inserted before position"""
+    indices = matrix.indices + (matrix.indices >= position)
+    return sparse.csr_matrix((matrix.data, indices, matrix.indptr), shape=(matrix.shape[0], matrix.shape[1] + 1))
+
+
+# ---- SHARED INSTANCE ----
+_recommender = None
+_recommender_lock = threading.Lock()
+
+
+def get_recommender():
+    """The app-wide Recommender, loaded from REVIEW and built on first use"""
+    global _recommender
+    with _recommender_lock:
+        if _recommender is None:
+            from db import stream_cursor
+            from catalog_snapshot import fetch_catalog
+            recommender = Recommender()
+            started = time.perf_counter()
+            count = recommender.load(stream_cursor(RATINGS_QUERY, arraysize=LOAD_ARRAYSIZE, batches=True))
+            titles = fetch_catalog(TITLES_QUERY)
+            if isinstance(titles, str):
+                raise RuntimeError(titles)
+            recommender.load_titles(titles)
+            recommender.build()
+            print(f"🎯 Recommendations built from {count} ratings over {len(recommender.movie_ids)} movies "
+                  f"in {time.perf_counter() - started:.1f}s")
+            _recommender = recommender
+        return _recommender
+
+
+def recommendations_for(user_id, limit=None):
+    """([(because_title, title, similarity)], lookup_ms) for the user's "Because You Rated" tab"""
+    recommender = get_recommender()
+    started = time.perf_counter()
+    picks = recommender.recommend(user_id, limit=limit)
+    lookup_ms = (time.perf_counter() - started) * 1000
+    rows = [(recommender.title(because), recommender.title(movie_id), round(score, 3))
+            for because, movie_id, score in picks]
+    return rows, lookup_ms
+
+
+def record_review(user_id, movie_id, rating):
+    """Fold an added or edited review into the shared Recommender if it has been built"""
+    if _recommender is not None:
+        _recommender.update(user_id, movie_id, rating)
+
+
+def benchmark(recommender, users, repeat=1000):
+    """(p50, p99) recommend() latency in milliseconds over random users"""
+    rng = np.random.default_rng(0)
+    timings = []
+    for user_id in rng.choice(users, size=repeat):
+        started = time.perf_counter()
+        recommender.recommend(int(user_id))
+        timings.append((time.perf_counter() - started) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def main(argv=None):
+    from datagen import Dataset, COLUMNS
+    parser = argparse.ArgumentParser(description="Build item-item recommendations from generated reviews")
+    parser.add_argument("--movies", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--reviews", type=int, default=2000000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    columns = COLUMNS["REVIEW"]
+    picks = [columns.index(name) for name in ("USER_ID", "MOVIE_ID", "RATING")]
+    dataset = Dataset(args.movies, args.users, args.reviews, args.seed)
+    recommender = Recommender()
+    started = time.perf_counter()
+    count = recommender.load([row[i] for i in picks] for row in dataset.rows("REVIEW"))
+    loaded = time.perf_counter()
+    recommender.build()
+    built = time.perf_counter()
+    print(f"📥 Loaded {count} ratings in {loaded - started:.1f}s")
+    print(f"🧮 Built top-{recommender.top_k} neighbours for {len(recommender.movie_ids)} movies in {built - loaded:.1f}s")
+
+    p50, p99 = benchmark(recommender, recommender.user_ids)
+    print(f"🎯 Lookup p50 {p50:.3f} ms, p99 {p99:.3f} ms")
+
+    rng = np.random.default_rng(1)
+    timings = []
+    for _ in range(20):
+        user_id, movie_id = rng.choice(recommender.user_ids), rng.choice(recommender.movie_ids)
+        started = time.perf_counter()
+        recommender.update(int(user_id), int(movie_id), float(rng.integers(1, 6)))
+        timings.append((time.perf_counter() - started) * 1000)
+    print(f"✏️ Incremental update median {np.median(timings):.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+# table_models.py
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from db import fetch_cursor
+
+# Most rows a KeysetTableModel keeps; scrolling stops there (export the dataset for the rest)
+MAX_MODEL_ROWS = 50000
+
+
+class KeysetTableModel(QAbstractTableModel):
+    """Table model that pages through a query by key (not OFFSET) as the view scrolls
+
+    The query must order by the key column and bind :last_key and :page_size, e.g.
+    WHERE REVIEW_ID > :last_key ORDER BY REVIEW_ID FETCH FIRST :page_size ROWS ONLY
+
+    Loading stops at max_rows (truncated is then set). A failed page is latched in
+    error and nothing more is fetched until reload().
+    """
+    loadingChanged = pyqtSignal(bool)
+    pageLoaded = pyqtSignal(int)
+    loadFailed = pyqtSignal(str)
+
+    def __init__(self, executor, query, headers, params=None, key_column=0,
+                 page_size=200, start_key=0, max_rows=MAX_MODEL_ROWS, parent=None):
+        super().__init__(parent)
+        self.executor = executor
+        self.query = query
+        self.headers = headers
+        self.params = dict(params or {})
+        self.key_column = key_column
+        self.page_size = page_size
+        self.start_key = start_key
+        self.max_rows = max_rows
+        self.rows = []
+        self.last_key = start_key
+        self.exhausted = False
+        self.truncated = False
+        self.fetching = False
+        self.requested = 0
+        self.error = None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        return str(self.rows[index.row()][index.column()])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def row_key(self, row):
+        return self.rows[row][self.key_column]
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted and not self.fetching and self.error is None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self.fetching = True
+        self.requested = min(self.page_size, self.max_rows - len(self.rows))
+        self.loadingChanged.emit(True)
+        binds = dict(self.params, last_key=self.last_key, page_size=self.requested)
+        self.executor.submit(
+            fetch_cursor, self.query, binds, key=self,
+            on_result=self._append_page, on_error=self._page_failed
+        )
+
+    def reload(self):
+        """Drop loaded pages and start again from the first key"""
+        self.executor.cancel(self)
+        self.beginResetModel()
+        self.rows = []
+        self.last_key = self.start_key
+        self.exhausted = False
+        self.truncated = False
+        self.fetching = False
+        self.error = None
+        self.endResetModel()
+        self.fetchMore()
+
+    def _append_page(self, rows):
+        self.fetching = False
+        if rows:
+            first = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self.rows.extend(rows)
+            self.endInsertRows()
+            self.last_key = rows[-1][self.key_column]
+        self.truncated = len(self.rows) >= self.max_rows
+        self.exhausted = self.truncated or len(rows) < self.requested
+        self.loadingChanged.emit(False)
+        self.pageLoaded.emit(len(self.rows))
+
+    def _page_failed(self, message):
+        # Latched so the view's canFetchMore()/fetchMore() does not retry in a loop
+        self.fetching = False
+        self.error = message
+        self.loadingChanged.emit(False)
+        self.loadFailed.emit(message)
+
+
+class ColumnarTableModel(QAbstractTableModel):
+    """Read-only table model that keeps query results as one list per column
+
+    Rows are transposed once on load, so a cell costs one reference rather than a
+    QTableWidgetItem and a string; data() formats only the cells the view paints.
+    """
+    def __init__(self, headers, tooltip_columns=(), parent=None):
+        super().__init__(parent)
+        self.headers = list(headers)
+        self.tooltip_columns = frozenset(tooltip_columns)
+        self.columns = [[] for _ in self.headers]
+
+    def rowCount(self, parent=QModelIndex()):
+        return len(self.columns[0]) if self.columns and not parent.isValid() else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole or (role == Qt.ToolTipRole and index.column() in self.tooltip_columns):
+            return str(self.columns[index.column()][index.row()])
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def value(self, row, column):
+        """The stored (unformatted) value of a cell"""
+        return self.columns[column][row]
+
+    def row_key(self, row, column=0):
+        return self.columns[column][row]
+
+    def set_rows(self, rows):
+        """Replace the contents with query rows"""
+        self.beginResetModel()
+        self.columns = self._transpose(rows)
+        self.endResetModel()
+
+    def append_rows(self, rows):
+        """Add a batch of query rows at the end, e.g. one fetchmany() batch"""
+        if not rows:
+            return
+        first = self.rowCount()
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        for column, values in zip(self.columns, self._transpose(rows)):
+            column.extend(values)
+        self.endInsertRows()
+
+    def clear(self):
+        self.set_rows([])
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # Stable sort on the stored values (not their display text), so numbers sort numerically;
+        # NULLs go last when ascending and first when descending
+        keys = self.columns[column]
+        order_by = sorted(range(len(keys)), key=lambda i: (keys[i] is None, keys[i] if keys[i] is not None else 0),
+                          reverse=order == Qt.DescendingOrder)
+        self.beginResetModel()
+        self.columns = [[values[i] for i in order_by] for values in self.columns]
+        self.endResetModel()
+
+    def _transpose(self, rows):
+        if not rows:
+            return [[] for _ in self.headers]
+        return [list(values) for values in zip(*rows)]
@@ -0,0 +1,125 @@
+# workers.py
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class QuerySignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    batch = pyqtSignal(object)
+    progress = pyqtSignal(int, int)
+
+
+class QueryTask(QRunnable):
+    """Runs one db call on a pool thread and reports back through signals"""
+    def __init__(self, func, args, kwargs):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = QuerySignals()
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        if self.cancelled:
+            return
+        try:
+            result = self.func(*self.args, **self.kwargs)
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.failed.emit(str(e))
+            return
+        if self.cancelled:
+            return
+        # fetch_cursor reports errors as a string instead of raising
+        if isinstance(result, str):
+            self.signals.failed.emit(result)
+        else:
+            self.signals.finished.emit(result)
+
+
+class StreamTask(QueryTask):
+    """Runs a generator (e.g. db.stream_cursor) and emits each item as it is produced"""
+    def run(self):
+        if self.cancelled:
+            return
+        items = None
+        try:
+            items = self.func(*self.args, **self.kwargs)
+            for item in items:
+                if self.cancelled:
+                    return
+                self.signals.batch.emit(item)
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.failed.emit(str(e))
+            return
+        finally:
+            # Closing the generator early hands its connection back to the pool
+            if hasattr(items, "close"):
+                items.close()
+        if not self.cancelled:
+            self.signals.finished.emit(None)
+
+
+class QueryExecutor(QObject):
+    """Runs db calls off the GUI thread and delivers results back on it"""
+    def __init__(self, parent=None, thread_pool=None):
+        super().__init__(parent)
+        self.thread_pool = thread_pool or QThreadPool.globalInstance()
+        self.tasks = {}
+
+    def submit(self, func, *args, key=None, on_result=None, on_error=None, on_done=None, on_progress=None, **kwargs):
+        """Queue func(*args, **kwargs); a newer task with the same key cancels the older one
+
+        With on_progress, func also receives progress=callable(done, total) and its calls
+        are forwarded to on_progress on the GUI thread.
+        """
+        task = QueryTask(func, args, kwargs)
+        if on_progress:
+            kwargs["progress"] = task.signals.progress.emit
+            task.signals.progress.connect(lambda done, total: None if task.cancelled else on_progress(done, total))
+        return self._start(task, key, on_result, on_error, on_done)
+
+    def stream(self, func, *args, key=None, on_batch=None, on_result=None, on_error=None, on_done=None, **kwargs):
+        """Like submit, but func returns an iterator whose items go to on_batch as they arrive"""
+        task = StreamTask(func, args, kwargs)
+        if on_batch:
+            task.signals.batch.connect(lambda item: None if task.cancelled else on_batch(item))
+        return self._start(task, key, on_result, on_error, on_done)
+
+    def _start(self, task, key, on_result, on_error, on_done):
+        key = key if key is not None else object()
+        self.cancel(key)
+        task.signals.finished.connect(lambda result: self._deliver(key, task, on_result, result, on_done))
+        task.signals.failed.connect(lambda message: self._deliver(key, task, on_error, message, on_done))
+        self.tasks[key] = task
+        self.thread_pool.start(task)
+        return task
+
+    def _deliver(self, key, task, callback, value, on_done):
+        # Signals are queued to the GUI thread, so re-check cancellation on arrival
+        if task.cancelled:
+            return
+        if self.tasks.get(key) is task:
+            del self.tasks[key]
+        if callback:
+            callback(value)
+        if on_done:
+            on_done()
+
+    def cancel(self, key):
+        task = self.tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def cancel_all(self):
+        for task in self.tasks.values():
+            task.cancel()
+        self.tasks.clear()
+
+    def pending(self):
+        return len(self.tasks)
\ No newline at end of file